@@ -0,0 +1,215 @@
+'''
+Benchmarks of the hot paths of the investors, run on synthetic groups:
+
+    python -m Benchmarks.run_benchmarks [--investors N] [--tickers M] [--years K] [--save-baseline] [--tolerance 1.5]
+
+Every benchmark reports its best time, its throughput and its peak memory. The results are compared with the baseline stored in
+Benchmarks/baseline.json and the run fails if any benchmark is slower than 'tolerance' times its baseline. The baseline is kept
+with the code, taken with the default sizes. Baselines are only comparable on the same machine: run with --save-baseline first
+to take one of your own, and again after a change that is meant to move the numbers.
+'''
+from .synthetic_group import build_group, tickers
+from Source.Investors import InvestmentGroup
+from Source.Investors.investment import Investment
+from Source.Investors.lot_ledger import LotLedger
+from Source.Investors.savings import Savings
+from Source.Prices import FakePriceProvider, FakeHistoryProvider, HistoryCache
+from Source.Export import StatementExporter
+from Source.Storage import JSONStorage, SQLiteStorage
+from datetime import date, datetime, timedelta
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+
+_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+_REPETITIONS = 5
+_PRICE_LATENCY = 0.02
+_FAST_CALLS = 1000
+_MIN_REGRESSION = 0.0005
+
+
+class Benchmark():
+    '''
+    A timed operation. 'setup' builds a fresh argument for every repetition (not timed) and 'operations' is the number of
+    items the operation processes, used for the throughput. Fast operations without side effects are called 'calls' times per
+    repetition so the timer resolution doesn't matter.
+    The times are taken without tracing the memory, which is measured in an extra run.
+    '''
+    def __init__(self, name : str, function, setup = None, operations : int = 1, calls : int = 1):
+        self.name = name
+        self.function = function
+        self.setup = setup or (lambda : None)
+        self.operations = operations
+        self.calls = calls
+
+    def run(self, repetitions : int) -> dict:
+        times = []
+        for _ in range(repetitions):
+            argument = self.setup()
+            start = time.perf_counter()
+            for _ in range(self.calls):
+                self.function(argument)
+            times.append((time.perf_counter() - start) / self.calls)
+
+        argument = self.setup()
+        tracemalloc.start()
+        self.function(argument)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        best = min(times)
+        return({
+            "seconds": best,
+            "throughput": self.operations / best if best > 0 else float('inf'),
+            "peak_memory": peak,
+        })
+
+
+def benchmarks(investors : int, n_tickers : int, years : int, directory : str) -> list[Benchmark]:
+    group = build_group(investors, n_tickers, years)
+    group.current_prices #Warm quote cache, so the valuations don't measure the provider.
+    json_dir = os.path.join(directory, 'json')
+    group.save(json_dir)
+    history = investors * years * 12
+
+    def fresh_group() -> InvestmentGroup:
+        new = build_group(investors, n_tickers, 0, SQLiteStorage(':memory:'))
+        new.current_prices
+        return(new)
+
+    def weighted_group() -> InvestmentGroup:
+        new = fresh_group()
+        new.target_weights = {ticker : 1 for ticker in tickers(n_tickers)}
+        return(new)
+
+    def journal_records(storage):
+        date = datetime(2000, 1, 1)
+        for i in range(history):
+            storage.append(Investment('T000', 100, 1, date), 'Inversor')
+            storage.append(Savings(10, date), 'Inversor')
+        storage.close()
+
+    def new_json_storage() -> JSONStorage:
+        path = os.path.join(directory, 'journal')
+        shutil.rmtree(path, ignore_errors=True)
+        return(JSONStorage(path))
+
+    def unsaved_group() -> InvestmentGroup:
+        shutil.rmtree(os.path.join(directory, 'save'), ignore_errors=True)
+        return(build_group(investors, n_tickers, years))
+
+    incremental = build_group(investors, n_tickers, years, JSONStorage(os.path.join(directory, 'incremental')))
+    incremental.save()
+
+    def save_one(_):
+        incremental.pay_debt(incremental.investors.names()[0], 1)
+        incremental.save()
+
+    recorded = build_group(investors, n_tickers, years, SQLiteStorage(':memory:'))
+    recorded_table = recorded.transaction_table()
+    months = [datetime(2000 + month // 12, month % 12 + 1, 15) for month in range(max(years, 1) * 12)]
+
+    def ledger() -> LotLedger:
+        lots = LotLedger()
+        for i in range(history):
+            lots.buy(1, 100 + i % 50)
+        return(lots)
+
+    def sell_all(lots : LotLedger):
+        while lots.quantity > 0:
+            lots.sell(min(2.5, lots.quantity), 150)
+
+    history_start = date.today() - timedelta(days=365 * max(years, 1))
+    warm_cache = HistoryCache(os.path.join(directory, 'history'), FakeHistoryProvider(latency=_PRICE_LATENCY))
+    warm_cache.ensure(set(tickers(n_tickers)), history_start, date.today())
+
+    def cold_cache() -> HistoryCache:
+        path = os.path.join(directory, 'cold_history')
+        shutil.rmtree(path, ignore_errors=True)
+        return(HistoryCache(path, FakeHistoryProvider(latency=_PRICE_LATENCY)))
+
+    def loaded(source):
+        new = InvestmentGroup(FakePriceProvider())
+        new.load(source)
+
+    return([
+        Benchmark('value_to_invest', lambda _ : group.value_to_invest(), operations=investors, calls=_FAST_CALLS),
+        Benchmark('total_investments_value', lambda _ : group.total_investments_value(), operations=investors, calls=_FAST_CALLS),
+        Benchmark('total_profit', lambda _ : group.total_profit(), operations=investors, calls=_FAST_CALLS),
+        Benchmark('total_savings', lambda _ : group.total_savings(), operations=investors, calls=_FAST_CALLS),
+        Benchmark('mass_invest', lambda new : new.mass_invest(), fresh_group, investors),
+        Benchmark('mass_invest_weighted', lambda new : new.mass_invest(), weighted_group, investors),
+        Benchmark('group_save', lambda new : new.save(os.path.join(directory, 'save')), unsaved_group, investors),
+        Benchmark('group_save_incremental', save_one),
+        Benchmark('group_load', lambda _ : loaded(json_dir), operations=investors),
+        Benchmark('positions_monthly', lambda _ : recorded.positions(months, recorded_table), operations=investors * len(months)),
+        Benchmark('lot_sales', sell_all, ledger, history),
+        Benchmark('statement_export', lambda _ : StatementExporter(recorded, os.path.join(directory, 'export')).export(), operations=3 * history),
+        Benchmark('transaction_persistence', journal_records, new_json_storage, 2 * history),
+        Benchmark('price_fetch', lambda provider : provider.get_prices(set(tickers(n_tickers))),
+                  lambda : FakePriceProvider(latency=_PRICE_LATENCY), n_tickers),
+        Benchmark('history_refresh_cold', lambda cache : cache.history(set(tickers(n_tickers)), history_start), cold_cache, n_tickers),
+        Benchmark('history_refresh_warm', lambda _ : warm_cache.history(set(tickers(n_tickers)), history_start), operations=n_tickers),
+    ])
+
+
+def compare(results : dict, baseline : dict, tolerance : float) -> list[str]:
+    '''
+    Returns the names of the benchmarks slower than 'tolerance' times their baseline (differences under half a millisecond are
+    considered noise).
+    '''
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        reference = baseline[name]["seconds"]
+        if result["seconds"] > reference * tolerance and result["seconds"] - reference > _MIN_REGRESSION:
+            regressions.append(name)
+    return(regressions)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks de las operaciones principales del grupo.")
+    parser.add_argument('--investors', type=int, default=100)
+    parser.add_argument('--tickers', type=int, default=10)
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--repetitions', type=int, default=_REPETITIONS)
+    parser.add_argument('--tolerance', type=float, default=1.5, help="Máximo empeoramiento permitido respecto a la referencia.")
+    parser.add_argument('--baseline', default=_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    arguments = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        results = {}
+        for benchmark in benchmarks(arguments.investors, arguments.tickers, arguments.years, directory):
+            results[benchmark.name] = benchmark.run(arguments.repetitions)
+            result = results[benchmark.name]
+            print(f"{benchmark.name:<25} {result['seconds'] * 1000:10.3f} ms {result['throughput']:14.1f} op/s {result['peak_memory'] / 1024:10.1f} KiB")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    if arguments.save_baseline or not os.path.isfile(arguments.baseline):
+        with open(arguments.baseline, 'w') as file:
+            json.dump(results, file, indent=4)
+        print("Referencia guardada en " + arguments.baseline)
+        return(0)
+
+    with open(arguments.baseline, 'r') as file:
+        baseline = json.load(file)
+    regressions = compare(results, baseline, arguments.tolerance)
+    if regressions:
+        print("Empeoramientos respecto a la referencia: " + ", ".join(regressions))
+        return(1)
+    print("Sin empeoramientos respecto a la referencia.")
+    return(0)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
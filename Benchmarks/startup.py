@@ -0,0 +1,61 @@
+'''
+Startup time of the command line interface:
+
+    python -m Benchmarks.startup [--budget 0.5] [--repetitions 5]
+
+Runs main.py until it shows its first prompt and fails if the best of the repetitions takes longer than the budget (in seconds).
+'''
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+
+_MAIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'main.py')
+_PROMPT = b'-> '
+_BUDGET = 0.5
+_REPETITIONS = 5
+_TIMEOUT = 30
+
+
+def time_to_prompt(main : str = _MAIN, timeout : float = _TIMEOUT) -> float:
+    '''
+    Returns the seconds main.py takes to write its first prompt, measured from the start of the interpreter.
+    '''
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-u', main], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                               stderr=subprocess.DEVNULL, cwd=os.path.dirname(main))
+    try:
+        output = b''
+        while not output.endswith(_PROMPT):
+            chunk = os.read(process.stdout.fileno(), 4096)
+            if not chunk:
+                raise RuntimeError("main.py exited without showing a prompt.")
+            output += chunk
+            if time.perf_counter() - start > timeout:
+                raise TimeoutError("main.py didn't show a prompt in " + str(timeout) + " seconds.")
+        return(time.perf_counter() - start)
+    finally:
+        process.kill()
+        process.wait()
+        process.stdin.close()
+        process.stdout.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Tiempo de arranque de la interfaz de línea de comandos.")
+    parser.add_argument('--budget', type=float, default=_BUDGET, help="Tiempo máximo permitido hasta el primer menú, en segundos.")
+    parser.add_argument('--repetitions', type=int, default=_REPETITIONS)
+    arguments = parser.parse_args()
+
+    best = min(time_to_prompt() for _ in range(arguments.repetitions))
+    print(f"Tiempo hasta el primer menú: {best * 1000:.1f} ms (límite {arguments.budget * 1000:.0f} ms)")
+    if best > arguments.budget:
+        print("El arranque supera el límite.")
+        return(1)
+    return(0)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
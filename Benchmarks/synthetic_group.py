@@ -0,0 +1,59 @@
+from Source.Investors import InvestmentGroup
+from Source.Investors.investor import Investor
+from Source.Investors.investment import Investment
+from Source.Investors.savings import Savings
+from Source.Investors.transfer import Transfer
+from Source.Prices import FakePriceProvider
+from Source.Storage.storage_engine import StorageEngine
+from datetime import datetime
+import random
+
+
+def tickers(n : int) -> list[str]:
+    return(['T' + str(i).zfill(3) for i in range(n)])
+
+
+def build_group(investors : int, n_tickers : int, years : int, storage : StorageEngine = None, latency : float = 0, seed : int = 0) -> InvestmentGroup:
+    '''
+    Builds an InvestmentGroup with 'investors' investors holding stocks of 'n_tickers' tickers and 'years' years of monthly
+    history (an Investment and a Savings per investor and month, plus a debt payment). Prices come from a FakePriceProvider
+    with the given latency. If a storage is given, the history is recorded on it.
+    The same seed always builds the same group.
+    '''
+    generator = random.Random(seed)
+    names = tickers(n_tickers)
+    prices = {ticker : generator.uniform(10, 500) for ticker in names}
+    group = InvestmentGroup(FakePriceProvider(prices, latency), storage=storage)
+    group.investment_ticker = names[0]
+
+    members = []
+    for i in range(investors):
+        investor = Investor('Inversor' + str(i).zfill(4))
+        investor._periodic_contribution = generator.choice([50, 100, 150, 200, 300])
+        investor._relation_savings_inversion = generator.choice([0.2, 0.3, 0.5])
+        members.append(investor)
+
+    for month in range(years * 12):
+        date = datetime(2000 + month // 12, month % 12 + 1, 1, 12)
+        records = []
+        for investor in members:
+            ticker = names[generator.randrange(n_tickers)]
+            price = prices[ticker] * generator.uniform(0.5, 1.5)
+            contribution = investor.periodic_contribution
+            saved = contribution * generator.uniform(0, 0.5)
+            quantity = (contribution - saved) / price
+
+            investor._investments[ticker] = investor._investments.get(ticker, 0) + quantity
+            investor._savings += saved
+            investor._total_contribution += contribution
+            if storage is not None:
+                records.append((investor.name, Investment(ticker, price, quantity, date)))
+                records.append((investor.name, Savings(saved, date)))
+                records.append((investor.name, Transfer(contribution, investor.name, 'Group', date)))
+        if storage is not None:
+            storage.append_all(records)
+
+    group.add_investors(members)
+    if storage is not None:
+        storage.flush()
+    return(group)
@@ -0,0 +1,3 @@
+# Backtesting package initialization
+from .price_history import PriceHistory
+from .backtester import Backtester, BacktestResult
@@ -0,0 +1,131 @@
+from .price_history import PriceHistory
+from ..Investors.holdings_matrix import HoldingsMatrix
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+import csv
+import numpy as np
+
+
+class BacktestResult():
+    '''
+    Equity curves of a backtest.
+        - dates: Investment date of every month.
+        - equity: (parameter sets x investors x months) Value of the investments plus the savings after every monthly investment.
+        - contribution: (investors x months) Money contributed so far by every investor. It doesn't depend on the parameters.
+        - parameters: List of (relation savings-investments, investment rate) pairs, one per parameter set.
+    '''
+    def __init__(self, dates : list[date], equity : np.ndarray, contribution : np.ndarray, parameters : list[tuple[float, float]], names : list[str]):
+        self.dates = dates
+        self.equity = equity
+        self.contribution = contribution
+        self.parameters = parameters
+        self.names = names
+
+    def profit(self) -> np.ndarray:
+        '''
+        Returns the profit of every parameter set and investor at the end of the backtest.
+        '''
+        return(self.equity[:, :, -1] - self.contribution[:, -1])
+
+    def save_csv(self, filename : str) -> None:
+        '''
+        Writes the equity curves with one row per month and parameter set and one column per investor.
+        '''
+        with open(filename, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['Date', 'Relación ahorros-inversiones', 'Porcentaje de inversión'] + self.names)
+            for p, (relation, rate) in enumerate(self.parameters):
+                for m, day in enumerate(self.dates):
+                    writer.writerow([day.isoformat(), relation, rate] + self.equity[p, :, m].tolist())
+
+
+class Backtester():
+    '''
+    Replays the monthly mass investment (Investor.add_investment) over historical prices for many investors and many parameter
+    sets at once. Every parameter set is a (relation savings-investments, investment rate) pair; investors keep their own periodic
+    contribution and starting savings and holdings.
+    All the (parameter set, investor) pairs advance together month by month as NumPy arrays while the price file is streamed.
+    With 'workers', the parameter sets are split across a process pool and every worker streams the file on its own.
+    '''
+    def __init__(self, prices : PriceHistory, ticker : str, periodic_contribution, savings = None, quantities = None, names : list[str] = None):
+        '''
+        Args:
+            prices (PriceHistory): _description_ Historical prices. Must include 'ticker' and all the tickers in 'quantities'.
+            ticker (str): _description_ Ticker bought every month.
+            periodic_contribution (array): _description_ Monthly contribution of every investor.
+            savings (array, optional): _description_ Starting savings of every investor. Defaults to 0.
+            quantities (array, optional): _description_ (investors x tickers) Starting holdings, columns aligned with 'prices.tickers'. Defaults to 0.
+        '''
+        self._prices = prices
+        self._column : int = prices.tickers.index(ticker)
+        self._periodic_contribution = np.asarray(periodic_contribution, dtype=float)
+        n = len(self._periodic_contribution)
+        self._savings = np.zeros(n) if savings is None else np.asarray(savings, dtype=float)
+        self._quantities = np.zeros((n, len(prices.tickers))) if quantities is None else np.asarray(quantities, dtype=float)
+        self._names : list[str] = names or [str(i) for i in range(n)]
+
+    @classmethod
+    def from_holdings(cls, prices : PriceHistory, ticker : str, holdings : HoldingsMatrix):
+        '''
+        Starts the backtest from the current state of the investors of a group.
+        '''
+        quantities = np.zeros((len(holdings.names), len(prices.tickers)))
+        for t, name in enumerate(holdings.tickers):
+            quantities[:, prices.tickers.index(name)] = holdings.quantities[:, t]
+        return(cls(prices, ticker, holdings.periodic_contribution, holdings.savings, quantities, holdings.names))
+
+    def run(self, relations, investment_rates, workers : int = None) -> BacktestResult:
+        '''
+        Backtests every pair (relations[i], investment_rates[i]).
+        '''
+        relations = np.asarray(relations, dtype=float)
+        rates = np.asarray(investment_rates, dtype=float)
+        parameters = list(zip(relations.tolist(), rates.tolist()))
+        state = (self._prices, self._column, self._periodic_contribution, self._savings, self._quantities)
+
+        if workers and workers > 1 and len(parameters) > 1:
+            chunks = np.array_split(np.arange(len(parameters)), min(workers, len(parameters)))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(_backtest, [state] * len(chunks), [relations[c] for c in chunks], [rates[c] for c in chunks]))
+            dates = results[0][0]
+            equity = np.concatenate([result[1] for result in results], axis=0)
+        else:
+            dates, equity = _backtest(state, relations, rates)
+
+        months = np.arange(1, len(dates) + 1)
+        contribution = np.outer(self._periodic_contribution, months)
+        return(BacktestResult(dates, equity, contribution, parameters, self._names))
+
+
+def _backtest(state : tuple, relations : np.ndarray, rates : np.ndarray) -> tuple[list[date], np.ndarray]:
+    '''
+    Advances all the (parameter set, investor) pairs month by month. Returns the dates and the equity curves (parameters x investors x months).
+    Every month follows Investor.value_distribution and Investor.add_investment.
+    '''
+    prices, column, inversion_size, savings, quantities = state
+    n_parameters = len(relations)
+    relation = relations.reshape(-1, 1)
+    rate = rates.reshape(-1, 1)
+    savings = np.broadcast_to(savings, (n_parameters, len(savings))).copy()
+    quantities = np.broadcast_to(quantities, (n_parameters,) + quantities.shape).copy()
+
+    dates = []
+    equity = []
+    for day, price in prices.monthly():
+        invested_value = quantities @ price
+        total = invested_value + savings
+        amount_to_save = np.minimum(relation * total - savings, inversion_size)
+        amount_to_save = np.where(savings - amount_to_save < 0, -savings, amount_to_save)
+
+        remaining = inversion_size - amount_to_save
+        amount_to_invest = remaining * rate
+        amount_to_save = amount_to_save + remaining * (1 - rate)
+
+        quantities[:, :, column] += amount_to_invest / price[column]
+        savings += amount_to_save
+        dates.append(day)
+        equity.append(invested_value + amount_to_invest + savings)
+
+    if not equity:
+        return(dates, np.zeros((n_parameters, len(inversion_size), 0)))
+    return(dates, np.stack(equity, axis=-1))
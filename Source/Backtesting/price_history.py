@@ -0,0 +1,63 @@
+from datetime import date
+from typing import Iterator
+import csv
+import numpy as np
+
+
+class PriceHistory():
+    '''
+    Historical closing prices stored in a local CSV or Parquet file with one row per day: a 'Date' column (YYYY-MM-DD)
+    followed by one column per ticker. The file is streamed row by row (batch by batch for Parquet), so it is never
+    loaded whole in memory. Rows must be sorted by date.
+    '''
+    _DATE_COLUMN = 'Date'
+    _PARQUET_BATCH_SIZE = 4096
+
+    def __init__(self, filename : str, tickers : list[str]):
+        self._filename : str = filename
+        self._tickers : list[str] = list(tickers)
+
+    @property
+    def tickers(self) -> list[str]:
+        return(self._tickers)
+
+    def __iter__(self) -> Iterator[tuple[date, np.ndarray]]:
+        '''
+        Yields every day of the file as (date, prices), with the prices aligned with 'tickers'.
+        '''
+        if self._filename.endswith('.parquet'):
+            return(self._parquet_rows())
+        return(self._csv_rows())
+
+    def monthly(self) -> Iterator[tuple[date, np.ndarray]]:
+        '''
+        Yields the first available day of every month, when the periodic contributions are invested.
+        '''
+        month = None
+        for day, prices in self:
+            if (day.year, day.month) != month:
+                month = (day.year, day.month)
+                yield((day, prices))
+
+    def _csv_rows(self) -> Iterator[tuple[date, np.ndarray]]:
+        with open(self._filename, 'r', newline='') as file:
+            reader = csv.reader(file)
+            header = next(reader)
+            date_column = header.index(PriceHistory._DATE_COLUMN)
+            columns = [header.index(ticker) for ticker in self._tickers]
+            for row in reader:
+                prices = np.array([float(row[column]) for column in columns])
+                yield((date.fromisoformat(row[date_column][:10]), prices))
+
+    def _parquet_rows(self) -> Iterator[tuple[date, np.ndarray]]:
+        import pyarrow.parquet as pq #Optional dependency, only needed for Parquet files.
+        file = pq.ParquetFile(self._filename)
+        for batch in file.iter_batches(batch_size=PriceHistory._PARQUET_BATCH_SIZE, columns=[PriceHistory._DATE_COLUMN] + self._tickers):
+            dates = batch.column(0).to_pylist()
+            prices = np.column_stack([batch.column(i + 1).to_numpy(zero_copy_only=False) for i in range(len(self._tickers))])
+            for day, row in zip(dates, prices):
+                if isinstance(day, str):
+                    day = date.fromisoformat(day[:10])
+                elif hasattr(day, 'date'):
+                    day = day.date()
+                yield((day, row))
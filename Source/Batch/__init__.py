@@ -0,0 +1,2 @@
+# Batch package initialization
+from .monthly_run import GroupResult, discover, run_all
@@ -0,0 +1,174 @@
+'''
+Monthly investment of every group stored under a directory (one JSON group directory each):
+
+    python -m Source.Batch.monthly_run <directory> [--workers N] [--report report.json]
+
+Every group is loaded once, in a worker process, and handed back as a snapshot of its state. The prices of all the groups are then
+fetched with a single request for the union of their tickers, and every group is invested and saved in its own process from its
+snapshot with those prices, without loading it again nor quoting anything. A group that fails is reported and doesn't stop the
+others. If the prices can't be fetched, every group is reported as failed.
+'''
+from ..Investors import InvestmentGroup
+from ..Prices import PriceProvider, YahooPriceProvider
+from ..Storage import JSONStorage
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import NamedTuple
+import argparse
+import json
+import math
+import os
+import sys
+import time
+import traceback
+
+
+class GroupResult(NamedTuple):
+    '''
+    Outcome of the monthly investment of a group. 'invested' is the money taken from the balance of the group.
+    '''
+    directory : str
+    ok : bool
+    investors : int = 0
+    invested : float = 0
+    seconds : float = 0
+    error : str = None
+
+    def to_dict(self) -> dict:
+        data = {
+            "Grupo": self.directory,
+            "Correcto": self.ok,
+            "Inversores": self.investors,
+            "Invertido": self.invested,
+            "Segundos": self.seconds,
+            "Error": self.error,
+        }
+        return(data)
+
+
+class _PrefetchedPriceProvider(PriceProvider):
+    '''
+    Serves the prices fetched by run_all to the workers, so investing a group makes no network calls. Raises a KeyError for any
+    ticker that wasn't fetched instead of quoting it.
+    '''
+    def __init__(self, prices : dict[str, float]):
+        super().__init__()
+        self._prices : dict[str, float] = dict(prices)
+
+    def get_price(self, ticker : str) -> float:
+        return(self._prices[ticker])
+
+    def get_prices(self, tickers : set[str]) -> dict[str, float]:
+        return({ticker : self._prices[ticker] for ticker in tickers})
+
+
+def discover(root : str) -> list[str]:
+    '''
+    Returns the directories directly under 'root' that hold a group with the JSON layout.
+    '''
+    directories = []
+    for name in sorted(os.listdir(root)):
+        directory = os.path.join(root, name)
+        if JSONStorage(directory).exists():
+            directories.append(directory)
+    return(directories)
+
+
+def _load_group(directory : str) -> tuple[set[str], dict]:
+    '''
+    Loads the group and returns the tickers it needs quoted and a snapshot of its state (see InvestmentGroup.snapshot).
+    '''
+    group = InvestmentGroup()
+    group.load(directory)
+    snapshot = group.snapshot()
+    group.storage.close()
+    return(group.quoted_tickers(), snapshot)
+
+
+def _invest_group(directory : str, snapshot : dict, prices : dict[str, float]) -> GroupResult:
+    '''
+    Restores the group from its snapshot, invests with the prices fetched by run_all and saves it. Runs in a worker process, so any error is
+    returned in the result.
+    '''
+    start = time.perf_counter()
+    try:
+        group = InvestmentGroup(_PrefetchedPriceProvider(prices), max_price_age=math.inf)
+        group.restore(snapshot, directory)
+        balance = group.balance
+        group.mass_invest()
+        group.save()
+        group.storage.close()
+        return(GroupResult(directory, True, len(group.investors), balance - group.balance, time.perf_counter() - start))
+    except Exception:
+        return(GroupResult(directory, False, seconds=time.perf_counter() - start, error=traceback.format_exc()))
+
+
+def run_all(directories : list[str], provider : PriceProvider = None, workers : int = None) -> list[GroupResult]:
+    '''
+    Makes the monthly investment of every group in 'directories' in a pool of 'workers' processes (one per core by default).
+    The tickers of all the groups are quoted together by 'provider' (Yahoo Finance by default) before any group is invested.
+    Returns the results in the order of 'directories'. Groups that can't be read or invested get a failed result, and so do all of
+    them if the prices can't be fetched.
+    '''
+    provider = provider or YahooPriceProvider()
+    results : dict[str, GroupResult] = {}
+    with ProcessPoolExecutor(workers) as executor:
+        tickers, snapshots = set(), {}
+        futures = {executor.submit(_load_group, directory) : directory for directory in directories}
+        for future in as_completed(futures):
+            try:
+                group_tickers, snapshot = future.result()
+            except Exception:
+                results[futures[future]] = GroupResult(futures[future], False, error=traceback.format_exc())
+                continue
+            tickers |= group_tickers
+            snapshots[futures[future]] = snapshot
+
+        try:
+            prices = provider.get_prices(tickers)
+        except Exception:
+            error = traceback.format_exc()
+            for directory in snapshots:
+                results[directory] = GroupResult(directory, False, error=error)
+            return([results[directory] for directory in directories])
+
+        futures = {executor.submit(_invest_group, directory, snapshot, prices) : directory for directory, snapshot in snapshots.items()}
+        for future in as_completed(futures):
+            try:
+                results[futures[future]] = future.result()
+            except Exception: #The worker process died.
+                results[futures[future]] = GroupResult(futures[future], False, error=traceback.format_exc())
+    return([results[directory] for directory in directories])
+
+
+def report(results : list[GroupResult]) -> str:
+    lines = [f"{'Grupo':<40} {'Estado':<8} {'Inversores':>10} {'Invertido':>14} {'Segundos':>9}"]
+    for result in results:
+        state = "OK" if result.ok else "ERROR"
+        lines.append(f"{os.path.basename(result.directory):<40} {state:<8} {result.investors:>10} {result.invested:>14.2f} {result.seconds:>9.2f}")
+    failed = [result for result in results if not result.ok]
+    lines.append(f"Grupos: {len(results)}, correctos: {len(results) - len(failed)}, con errores: {len(failed)}, "
+                 f"invertido en total: {sum(result.invested for result in results):.2f}")
+    for result in failed:
+        lines.append("")
+        lines.append("Error en " + result.directory + ":")
+        lines.append(result.error.rstrip())
+    return("\n".join(lines))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Realiza la inversión mensual de todos los grupos de un directorio.")
+    parser.add_argument('directory', help="Directorio con un subdirectorio por grupo.")
+    parser.add_argument('--workers', type=int, default=None, help="Número de procesos (uno por núcleo por defecto).")
+    parser.add_argument('--report', help="Fichero JSON donde guardar el resultado de cada grupo.")
+    arguments = parser.parse_args()
+
+    results = run_all(discover(arguments.directory), workers=arguments.workers)
+    print(report(results))
+    if arguments.report:
+        with open(arguments.report, 'w') as file:
+            json.dump([result.to_dict() for result in results], file, indent=4, ensure_ascii=False)
+    return(0 if all(result.ok for result in results) else 1)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
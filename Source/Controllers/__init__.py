@@ -0,0 +1,3 @@
+# Controllers package initialization
+from .controller import Controller
+from .script_runner import ScriptRunner, CommandResult
@@ -3,16 +3,25 @@ from ..Investors import InvestmentGroup
 from ..Requests import Request
 from ..Views.Menus import Menu
 from ..Views.Menus.menu_manager import MenuManager
+from ..Instrumentation import span, count
 
 class Controller():
     _MAX_MENU_STACK = 5
 
-    def __init__(self, view : View, group : InvestmentGroup):
+    def __init__(self, view : View, group : InvestmentGroup, flush : bool = True):
+        '''
+        Without 'flush', the transactions of the requests stay buffered in the storage of the group until commit is called, so a
+        batch of requests is persisted in a single write.
+        '''
         self._view = view
         self._group = group
+        self._flush = flush
 
         self._REQUESTS_RESPONSE : dict[Request, function] = {
-            Request.MASS_INVESTMENT : lambda : self.group.mass_invest(),
+            Request.MASS_INVESTMENT : lambda fee = None, ticker = None : self.group.mass_invest(fee, ticker, flush=self._flush),
+            Request.PAY_DEBT : lambda name, amount : self.group.pay_debts([(name, amount)], flush=self._flush),
+            Request.WITHDRAW : lambda name, amount : self.group.withdraw_all([(name, amount)], flush=self._flush),
+            Request.DISPLAY_ALL_DATA : self.display_all_data,
         }
 
     @property
@@ -23,9 +32,35 @@ class Controller():
     def group(self) -> InvestmentGroup:
         return(self._group)
 
+    def close(self) -> None:
+        '''
+        Stops refreshing the prices of the group in the background (see run).
+        '''
+        self.group.stop_price_refresh()
+
+    def commit(self) -> None:
+        '''
+        Saves the group to its storage, writing the transactions buffered by the requests.
+        '''
+        with span('request.commit'):
+            self.group.save()
+
+    def display_all_data(self) -> None:
+        print("Saldo del grupo: " + str(self.group.balance))
+        for investor in self.group.investors:
+            print(investor)
+
     def run(self):
+        self.group.start_price_refresh() #Prices are fetched while the user navigates the menus.
         request = self.view.show()
         self.proccess_request(request)
 
-    def proccess_request(self, request : Request):
-        self._REQUESTS_RESPONSE[request]()
+    def proccess_request(self, request : Request, *arguments):
+        '''
+        Runs the handler of the request with its arguments (the investor and the amount of a payment or a withdrawal, the fee and the
+        ticker of a mass investment). With the instrumentation enabled, every request is timed in its own span, so the report breaks
+        down the time of each request into the operations it made.
+        '''
+        count('requests.' + request.name)
+        with span('request.' + request.name):
+            self._REQUESTS_RESPONSE[request](*arguments)
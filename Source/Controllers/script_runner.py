@@ -0,0 +1,156 @@
+'''
+Headless mode of the Controller: runs a script of requests, one per line, without any menu:
+
+    mass_invest [fee] [ticker]
+    pay_debt <investor> <amount>
+    withdraw <investor> <amount>
+    display
+
+Names with spaces go between quotes and everything after a '#' is a comment. The requests are run in order in a single process and
+their transactions are kept pending until the end, when the group is saved once. A script runs whole or not at all: if a line can't
+be parsed nothing is run, and the first request that fails stops the script without saving anything.
+'''
+from .controller import Controller
+from ..Requests import Request
+from typing import Iterable, NamedTuple
+import shlex
+import time
+
+
+class CommandResult(NamedTuple):
+    '''
+    Outcome of a line of a script.
+    '''
+    line : int
+    command : str
+    request : Request = None
+    seconds : float = 0
+    error : str = None
+
+    @property
+    def ok(self) -> bool:
+        return(self.error is None)
+
+    def to_dict(self) -> dict:
+        data = {
+            "Línea": self.line,
+            "Orden": self.command,
+            "Petición": None if self.request is None else self.request.name,
+            "Segundos": self.seconds,
+            "Error": self.error,
+        }
+        return(data)
+
+
+class ScriptRunner():
+    '''
+    Runs the lines of a script through Controller.proccess_request. The controller must not flush the storage after every request
+    (see Controller), and the storage keeps the transactions pending while the script runs (see StorageEngine.deferred), so all of
+    them are written by the commit made after the last line.
+    '''
+    _COMMANDS = {
+        'mass_invest': Request.MASS_INVESTMENT,
+        'pay_debt': Request.PAY_DEBT,
+        'withdraw': Request.WITHDRAW,
+        'display': Request.DISPLAY_ALL_DATA,
+    }
+    #Types of the arguments of every request and how many of them are required.
+    _ARGUMENTS = {
+        Request.MASS_INVESTMENT: ((float, str), 0),
+        Request.PAY_DEBT: ((str, float), 2),
+        Request.WITHDRAW: ((str, float), 2),
+        Request.DISPLAY_ALL_DATA: ((), 0),
+    }
+
+    def __init__(self, controller : Controller):
+        self._controller : Controller = controller
+        self._commit_seconds : float = None
+
+    @property
+    def commit_seconds(self) -> float:
+        '''
+        Returns the time taken by the commit of the last run, or None if it wasn't committed.
+        '''
+        return(self._commit_seconds)
+
+    def run(self, lines : Iterable[str]) -> list[CommandResult]:
+        '''
+        Runs every request of 'lines' and then saves the group. Returns the result of every line run, in order.
+        All the lines are parsed first: if any of them is wrong, nothing is run and the results are the parsing errors.
+        If a request fails, the rest aren't run and nothing is saved: the transactions of the previous ones are discarded and the
+        group is loaded again from its storage, as it was before the script.
+        '''
+        self._commit_seconds = None
+        commands, errors = [], []
+        for number, line in enumerate(lines, 1):
+            command = line.split('#', 1)[0].strip()
+            if command:
+                try:
+                    commands.append((number, command, *ScriptRunner.parse(command)))
+                except ValueError as error:
+                    errors.append(CommandResult(number, command, error=str(error)))
+        if errors:
+            return(errors)
+
+        group = self._controller.group
+        storage = group.storage
+        results = []
+        with storage.deferred():
+            for number, command, request, arguments in commands:
+                results.append(self._run_command(number, command, request, arguments))
+                if not results[-1].ok:
+                    storage.discard()
+                    group.load(storage)
+                    return(results)
+            start = time.perf_counter()
+            self._controller.commit()
+            self._commit_seconds = time.perf_counter() - start
+        return(results)
+
+    def _run_command(self, number : int, command : str, request : Request, arguments : list) -> CommandResult:
+        start = time.perf_counter()
+        try:
+            self._controller.proccess_request(request, *arguments)
+        except Exception as error:
+            return(CommandResult(number, command, request, time.perf_counter() - start, type(error).__name__ + ": " + str(error)))
+        return(CommandResult(number, command, request, time.perf_counter() - start))
+
+    @staticmethod
+    def parse(command : str) -> tuple[Request, list]:
+        '''
+        Returns the request of a line of a script and its arguments.
+        Raises a ValueError if the command is unknown or its arguments are wrong.
+        '''
+        words = shlex.split(command)
+        request = ScriptRunner._COMMANDS.get(words[0].lower())
+        if request is None:
+            raise ValueError("Orden desconocida: " + words[0])
+        types, required = ScriptRunner._ARGUMENTS[request]
+        values = words[1:]
+        if not required <= len(values) <= len(types):
+            raise ValueError("Número de argumentos incorrecto para " + words[0])
+        return(request, [kind(value) for kind, value in zip(types, values)])
+
+
+def report(results : list[CommandResult], commit_seconds : float = None) -> str:
+    '''
+    Returns the time taken by every kind of request (number, total, mean and maximum), the one of the commit ('commit_seconds', None
+    if the group wasn't saved) and the lines that failed.
+    '''
+    lines = [f"{'Petición':<20} {'Número':>8} {'Total (s)':>10} {'Media (ms)':>11} {'Máx. (ms)':>10}"]
+    by_request : dict[Request, list[float]] = {}
+    for result in results:
+        if result.request is not None:
+            by_request.setdefault(result.request, []).append(result.seconds)
+    for request, seconds in by_request.items():
+        lines.append(f"{request.name:<20} {len(seconds):>8} {sum(seconds):>10.3f} {1000 * sum(seconds) / len(seconds):>11.3f} {1000 * max(seconds):>10.3f}")
+    if commit_seconds is not None:
+        lines.append(f"{'Guardado':<20} {1:>8} {commit_seconds:>10.3f}")
+    failed = [result for result in results if not result.ok]
+    lines.append(f"Órdenes: {len(results)}, correctas: {len(results) - len(failed)}, con errores: {len(failed)}, "
+                 f"tiempo total: {sum(result.seconds for result in results) + (commit_seconds or 0):.3f} s")
+    if commit_seconds is None:
+        lines.append("El grupo no se ha guardado: ninguna orden ha tenido efecto.")
+    for result in failed:
+        lines.append(f"Línea {result.line} ({result.command}): {result.error}")
+    return("\n".join(lines))
@@ -0,0 +1,2 @@
+# Export package initialization
+from .statement_export import ExportFormat, StatementExporter
@@ -0,0 +1,226 @@
+'''
+Export of the statements, holdings and transaction history of every investor of a group:
+
+    python -m Source.Export.statement_export <group directory> <output directory> [--format csv|parquet] [--start 2024-01-01] [--end 2025-01-01]
+
+Every investor gets a directory with three files: their statement ('estado'), the stocks they hold ('posiciones') and their
+transactions ('movimientos'). 'resumen' has the statements of all of them. Parquet files need pyarrow.
+'''
+from ..Investors import InvestmentGroup
+from ..Investors.transfer import Transfer
+from ..Instrumentation import timed, count
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from datetime import datetime
+from enum import Enum
+import argparse
+import csv
+import os
+import sys
+
+
+class ExportFormat(Enum):
+    CSV = 'csv'
+    PARQUET = 'parquet'
+
+
+_STATEMENT_COLUMNS = [("Nombre", str), ("Ahorros", float), ("Deuda", float), ("Contribución total", float), ("Valor", float),
+                      ("Beneficio", float), ("Ganancia realizada", float), ("Ganancia latente", float)]
+_HOLDING_COLUMNS = [("Valor", str), ("Nº de acciones", float), ("Precio", float), ("Importe", float), ("Coste", float), ("Ganancia latente", float)]
+_HISTORY_COLUMNS = [("Fecha", str), ("Tipo", str), ("Valor", str), ("Precio", float), ("Nº de acciones", float), ("Cantidad", float),
+                    ("Comisión", float), ("Origen", str), ("Destino", str)]
+
+
+class _CSVWriter():
+    def __init__(self, filename : str, columns : list[tuple[str, type]]):
+        self._file = open(filename, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow([name for name, kind in columns])
+
+    def write(self, rows : list[tuple]) -> None:
+        self._writer.writerows(rows)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class _ParquetWriter():
+    '''
+    Every chunk of rows is written as a row group, so the file never has to be held in memory.
+    '''
+    def __init__(self, filename : str, columns : list[tuple[str, type]]):
+        import pyarrow as pa #Optional dependency, only needed for Parquet.
+        import pyarrow.parquet as pq
+        self._pa = pa
+        self._schema = pa.schema([(name, pa.string() if kind is str else pa.float64()) for name, kind in columns])
+        self._writer = pq.ParquetWriter(filename, self._schema)
+
+    def write(self, rows : list[tuple]) -> None:
+        columns = list(zip(*rows)) if rows else [[] for _ in self._schema]
+        arrays = [self._pa.array(column, type=field.type) for column, field in zip(columns, self._schema)]
+        self._writer.write_table(self._pa.Table.from_arrays(arrays, schema=self._schema))
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+class StatementExporter():
+    '''
+    Writes the statement, the holdings and the transaction history of every investor of a group to CSV or Parquet files.
+    The history is read from the storage of the group in a single pass and every row is routed to the file of its investor. Rows are
+    written in chunks of 'chunk_size' by a pool of threads, so the files of different investors are written in parallel while the
+    chunks of the same file keep their order. Besides the chunk being filled for every investor, at most a few chunks per worker are
+    kept in memory, whatever the length of the history.
+    '''
+    _CHUNK_SIZE = 1000
+    _MAX_WORKERS = 8
+    _PENDING_PER_WORKER = 4
+    _WRITERS = {ExportFormat.CSV : _CSVWriter, ExportFormat.PARQUET : _ParquetWriter}
+    _SUMMARY = 'resumen'
+    _STATEMENT = 'estado'
+    _HOLDINGS = 'posiciones'
+    _HISTORY = 'movimientos'
+
+    def __init__(self, group : InvestmentGroup, directory : str, format : ExportFormat = ExportFormat.CSV, chunk_size : int = _CHUNK_SIZE, workers : int = _MAX_WORKERS):
+        self._group : InvestmentGroup = group
+        self._directory : str = directory
+        self._format : ExportFormat = format
+        self._chunk_size : int = max(1, chunk_size)
+        self._workers : int = max(1, workers)
+
+    def filename(self, name : str, investor : str = None) -> str:
+        '''
+        Returns the path of the file 'name' of an investor (of the whole group if None).
+        '''
+        directory = self._directory if investor is None else os.path.join(self._directory, investor)
+        return(os.path.join(directory, name + '.' + self._format.value))
+
+    @timed()
+    def export(self, start : datetime = None, end : datetime = None) -> list[str]:
+        '''
+        Writes the files of every investor with their current state, valued at the current prices, and the transactions recorded
+        between 'start' and 'end'. Returns the paths of the files written.
+        '''
+        group = self._group
+        current_prices = group.current_prices
+        investors = list(group.investors)
+        for investor in investors:
+            os.makedirs(os.path.join(self._directory, investor.name), exist_ok=True)
+
+        statements = [investor.statement(current_prices) for investor in investors]
+        files = [self.filename(StatementExporter._SUMMARY)]
+        self._write_file(files[0], _STATEMENT_COLUMNS, [StatementExporter._row(statement, _STATEMENT_COLUMNS) for statement in statements])
+
+        with ThreadPoolExecutor(self._workers) as executor:
+            pending = deque()
+            for investor, statement in zip(investors, statements):
+                files.append(self.filename(StatementExporter._STATEMENT, investor.name))
+                pending.append(executor.submit(self._write_file, files[-1], _STATEMENT_COLUMNS, [StatementExporter._row(statement, _STATEMENT_COLUMNS)]))
+                files.append(self.filename(StatementExporter._HOLDINGS, investor.name))
+                pending.append(executor.submit(self._write_file, files[-1], _HOLDING_COLUMNS, StatementExporter._holdings(investor, current_prices)))
+
+            writers = {}
+            try:
+                for investor in investors:
+                    files.append(self.filename(StatementExporter._HISTORY, investor.name))
+                    writers[investor.name] = StatementExporter._WRITERS[self._format](files[-1], _HISTORY_COLUMNS)
+                self._write_history(executor, pending, writers, start, end)
+                for future in pending:
+                    future.result()
+            finally:
+                #The history files are closed even if a write failed, once no chunk is being written to them.
+                wait(pending)
+                for writer in writers.values():
+                    writer.close()
+        return(files)
+
+    def _write_history(self, executor : ThreadPoolExecutor, pending : deque, writers : dict, start : datetime, end : datetime) -> None:
+        '''
+        Streams the transactions of the storage to the history writers of their investors. Transactions of investors no longer in the
+        group are skipped.
+        '''
+        group_account = InvestmentGroup._GROUP_ACCOUNT
+        chunks = {name : [] for name in writers}
+        last = {}
+        rows = 0
+
+        def submit(name : str) -> None:
+            last[name] = executor.submit(StatementExporter._write_after, last.get(name), writers[name], chunks[name])
+            pending.append(last[name])
+            chunks[name] = []
+            while len(pending) > self._workers * StatementExporter._PENDING_PER_WORKER:
+                pending.popleft().result()
+
+        for owner, transaction in self._group.storage.transactions(None, start, end):
+            name = owner
+            if isinstance(transaction, Transfer):
+                name = transaction.destination if transaction.source == group_account else transaction.source
+            chunk = chunks.get(name)
+            if chunk is None:
+                continue
+            chunk.append(StatementExporter._transaction_row(transaction))
+            rows += 1
+            if len(chunk) >= self._chunk_size:
+                submit(name)
+        for name, chunk in chunks.items():
+            if chunk:
+                submit(name)
+        count('export.transactions', rows)
+
+    def _write_file(self, filename : str, columns : list[tuple[str, type]], rows : list[tuple]) -> None:
+        writer = StatementExporter._WRITERS[self._format](filename, columns)
+        try:
+            for first in range(0, len(rows), self._chunk_size):
+                writer.write(rows[first:first + self._chunk_size])
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _write_after(previous : Future, writer, rows : list[tuple]) -> None:
+        '''
+        Writes a chunk once the previous chunk of the same file is written. The previous one was submitted first, so it is already running.
+        '''
+        if previous is not None:
+            previous.result()
+        writer.write(rows)
+
+    @staticmethod
+    def _row(data : dict, columns : list[tuple[str, type]]) -> tuple:
+        return(tuple(data.get(name) for name, kind in columns))
+
+    @staticmethod
+    def _holdings(investor, current_prices : dict[str, float]) -> list[tuple]:
+        rows = []
+        for ticker, quantity in sorted(investor.investments.items()):
+            price = current_prices[ticker]
+            cost = investor.cost_basis(ticker)
+            rows.append((ticker, quantity, price, quantity * price, cost, quantity * price - cost))
+        return(rows)
+
+    @staticmethod
+    def _transaction_row(transaction) -> tuple:
+        data = transaction.to_dict()
+        return((data["Fecha"], type(transaction).__name__, data.get("Valor"),
+                data.get("Precio de compra", data.get("Precio de venta")), data.get("Nº de acciones"), data["Cantidad"], data["Comisión"],
+                data.get("Origen"), data.get("Destino")))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Exporta los estados, posiciones y movimientos de todos los inversores de un grupo.")
+    parser.add_argument('group', help="Directorio del grupo.")
+    parser.add_argument('output', help="Directorio donde se escriben los ficheros.")
+    parser.add_argument('--format', choices=[format.value for format in ExportFormat], default=ExportFormat.CSV.value)
+    parser.add_argument('--start', type=datetime.fromisoformat, default=None, help="Primera fecha de los movimientos (incluida).")
+    parser.add_argument('--end', type=datetime.fromisoformat, default=None, help="Última fecha de los movimientos (excluida).")
+    parser.add_argument('--workers', type=int, default=StatementExporter._MAX_WORKERS)
+    arguments = parser.parse_args()
+
+    group = InvestmentGroup()
+    group.load(arguments.group)
+    files = StatementExporter(group, arguments.output, ExportFormat(arguments.format), workers=arguments.workers).export(arguments.start, arguments.end)
+    print(str(len(files)) + " ficheros escritos en " + arguments.output)
+    return(0)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,2 @@
+# Instrumentation package initialization
+from .instrumentation import Instrumentation, INSTRUMENTATION, span, timed, count
@@ -0,0 +1,183 @@
+from functools import wraps
+import json
+import threading
+import time
+
+
+class _SpanStats():
+    __slots__ = ('count', 'total', 'max')
+
+    def __init__(self):
+        self.count : int = 0
+        self.total : float = 0
+        self.max : float = 0
+
+    def add(self, seconds : float) -> None:
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+
+class _NullSpan():
+    '''
+    Span used while the instrumentation is disabled. Does nothing.
+    '''
+    def __enter__(self):
+        return(self)
+
+    def __exit__(self, *args) -> None:
+        pass
+
+
+class _Span():
+    def __init__(self, instrumentation, name : str):
+        self._instrumentation = instrumentation
+        self._name = name
+
+    def __enter__(self):
+        stack = self._instrumentation._stack()
+        stack.append(self._name)
+        self._path = '/'.join(stack)
+        self._start = time.perf_counter()
+        return(self)
+
+    def __exit__(self, *args) -> None:
+        seconds = time.perf_counter() - self._start
+        self._instrumentation._stack().pop()
+        self._instrumentation._record(self._path, seconds)
+
+
+class Instrumentation():
+    '''
+    Timing spans and counters for the hot paths of the program. Disabled by default: while disabled, spans are a shared object
+    that does nothing and counters return straight away, so the instrumented code pays a single attribute check.
+    Spans are aggregated by their path (the names of the spans they are nested in, joined by '/'), which gives the breakdown of
+    every request. The results can be printed or exported as JSON lines or in the Prometheus text format.
+    '''
+    _NULL_SPAN = _NullSpan()
+    _PROMETHEUS_PREFIX = 'inversion_management'
+
+    def __init__(self):
+        self.enabled : bool = False
+        self._spans : dict[str, _SpanStats] = {}
+        self._counters : dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self._spans.clear()
+            self._counters.clear()
+
+    def span(self, name : str):
+        '''
+        Returns a context manager that times its block under 'name'.
+        '''
+        if not self.enabled:
+            return(Instrumentation._NULL_SPAN)
+        return(_Span(self, name))
+
+    def count(self, name : str, value : float = 1) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def timed(self, name : str = None):
+        '''
+        Decorator that times every call of the function in a span (named after the function by default).
+        '''
+        def decorator(function):
+            span_name = name or function.__qualname__
+
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return(function(*args, **kwargs))
+                with _Span(self, span_name):
+                    return(function(*args, **kwargs))
+            return(wrapper)
+        return(decorator)
+
+    def spans(self) -> dict[str, tuple[int, float, float]]:
+        '''
+        Returns the (calls, total seconds, max seconds) of every span path.
+        '''
+        with self._lock:
+            return({path : (stats.count, stats.total, stats.max) for path, stats in self._spans.items()})
+
+    def counters(self) -> dict[str, float]:
+        with self._lock:
+            return(dict(self._counters))
+
+    def report(self) -> str:
+        '''
+        Returns a table with the time spent in every span, nested under the span it was called from.
+        '''
+        lines = [f"{'Span':<70} {'Llamadas':>9} {'Total (ms)':>12} {'Máx (ms)':>10}"]
+        for path, (calls, total, maximum) in sorted(self.spans().items()):
+            depth = path.count('/')
+            label = '  ' * depth + path.rsplit('/', 1)[-1]
+            lines.append(f"{label:<70} {calls:>9} {total * 1000:>12.3f} {maximum * 1000:>10.3f}")
+        for name, value in sorted(self.counters().items()):
+            lines.append(f"{name:<70} {value:>9g}")
+        return("\n".join(lines))
+
+    def export_jsonl(self, filename : str) -> None:
+        with open(filename, 'a') as file:
+            timestamp = time.time()
+            for path, (calls, total, maximum) in self.spans().items():
+                file.write(json.dumps({"time": timestamp, "span": path, "calls": calls, "total_seconds": total, "max_seconds": maximum}) + "\n")
+            for name, value in self.counters().items():
+                file.write(json.dumps({"time": timestamp, "counter": name, "value": value}) + "\n")
+
+    def export_prometheus(self, filename : str) -> None:
+        prefix = Instrumentation._PROMETHEUS_PREFIX
+        spans = sorted(self.spans().items())
+        lines = []
+        for field, (metric, kind) in enumerate([('span_calls_total', 'counter'), ('span_seconds_total', 'counter'), ('span_max_seconds', 'gauge')]):
+            lines.append(f"# TYPE {prefix}_{metric} {kind}")
+            for path, values in spans:
+                label = '{span="' + path.replace('\\', '\\\\').replace('"', '\\"') + '"}'
+                lines.append(f"{prefix}_{metric}{label} {values[field]}")
+        for name, value in sorted(self.counters().items()):
+            metric = prefix + '_' + ''.join(c if c.isalnum() else '_' for c in name) + '_total'
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        with open(filename, 'w') as file:
+            file.write("\n".join(lines) + "\n")
+
+    def export(self, filename : str) -> None:
+        '''
+        Exports in the Prometheus text format if the file ends with '.prom', as JSON lines otherwise.
+        '''
+        if filename.endswith('.prom'):
+            self.export_prometheus(filename)
+        else:
+            self.export_jsonl(filename)
+
+    def _stack(self) -> list[str]:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return(stack)
+
+    def _record(self, path : str, seconds : float) -> None:
+        with self._lock:
+            stats = self._spans.get(path)
+            if stats is None:
+                stats = self._spans[path] = _SpanStats()
+            stats.add(seconds)
+
+
+INSTRUMENTATION = Instrumentation()
+span = INSTRUMENTATION.span
+timed = INSTRUMENTATION.timed
+count = INSTRUMENTATION.count
@@ -0,0 +1,95 @@
+from .investor import Investor
+from types import MappingProxyType
+from typing import NamedTuple, Self
+import math
+
+
+class GroupSummary(NamedTuple):
+    '''
+    Read-only snapshot of the running totals of a group.
+    '''
+    total_savings : float
+    total_debt : float
+    total_contribution : float
+    quantities : MappingProxyType
+
+
+class GroupAggregates():
+    '''
+    Running totals of the investors of a group: savings, debt, contribution and the quantity held of every ticker.
+    They are updated in O(1) with the change produced by every operation, instead of summing all the investors again.
+    '''
+    _RELATIVE_TOLERANCE = 1e-9
+    _ABSOLUTE_TOLERANCE = 1e-6
+
+    def __init__(self):
+        self.total_savings : float = 0
+        self.total_debt : float = 0
+        self.total_contribution : float = 0
+        self.quantities : dict[str, float] = {}
+
+    @classmethod
+    def from_investors(cls, investors : list[Investor]) -> Self:
+        '''
+        Computes the totals from scratch.
+        '''
+        aggregates = cls()
+        for investor in investors:
+            aggregates.add_investor(investor)
+        return(aggregates)
+
+    def apply(self, savings : float = 0, debt : float = 0, contribution : float = 0, ticker : str = None, quantity : float = 0) -> None:
+        '''
+        Adds the changes of an operation to the totals.
+        '''
+        self.total_savings += savings
+        self.total_debt += debt
+        self.total_contribution += contribution
+        if ticker is not None:
+            self.quantities[ticker] = self.quantities.get(ticker, 0) + quantity
+
+    def add_investor(self, investor : Investor, sign : int = 1) -> None:
+        self.apply(sign * investor.savings, sign * investor.debt, sign * investor.total_contribution)
+        for ticker, quantity in investor.investments.items():
+            self.apply(ticker=ticker, quantity=sign * quantity)
+
+    def remove_investor(self, investor : Investor) -> None:
+        self.add_investor(investor, -1)
+
+    def held_tickers(self) -> set[str]:
+        '''
+        Returns the tickers with stocks held. The ones sold down to 0 (within the tolerance) are left out.
+        '''
+        return({ticker for ticker, quantity in self.quantities.items() if abs(quantity) > GroupAggregates._ABSOLUTE_TOLERANCE})
+
+    def investments_value(self, current_prices : dict[str, float]) -> float:
+        '''
+        Returns the value of all the stocks held by the group: the dot product of the quantities and the prices.
+        Only the prices of the held tickers (see held_tickers) are needed.
+        '''
+        tickers = self.held_tickers()
+        if not tickers:
+            return(0)
+        import numpy as np #Imported on first use, so it isn't loaded at startup.
+        quantities = np.fromiter((self.quantities[ticker] for ticker in tickers), dtype=float, count=len(tickers))
+        prices = np.fromiter((current_prices[ticker] for ticker in tickers), dtype=float, count=len(tickers))
+        return(float(quantities @ prices))
+
+    def summary(self) -> GroupSummary:
+        return(GroupSummary(self.total_savings, self.total_debt, self.total_contribution, MappingProxyType(dict(self.quantities))))
+
+    def differences(self, other : Self) -> list[str]:
+        '''
+        Returns the names of the totals that don't match (within a floating point tolerance) the ones of 'other'.
+        '''
+        def close(a : float, b : float) -> bool:
+            return(math.isclose(a, b, rel_tol=GroupAggregates._RELATIVE_TOLERANCE, abs_tol=GroupAggregates._ABSOLUTE_TOLERANCE))
+
+        differences = []
+        for name in ('total_savings', 'total_debt', 'total_contribution'):
+            if not close(getattr(self, name), getattr(other, name)):
+                differences.append(name)
+        for ticker in self.quantities.keys() | other.quantities.keys():
+            if not close(self.quantities.get(ticker, 0), other.quantities.get(ticker, 0)):
+                differences.append(ticker)
+        return(differences)
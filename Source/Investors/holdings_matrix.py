@@ -0,0 +1,92 @@
+from .investor import Investor
+from .value_distribution import ValueDistribution
+import numpy as np
+
+
+class HoldingsMatrix():
+    '''
+    Columnar view of the investors of a group, so the whole group can be valued with vectorized operations.
+        - quantities: investors x tickers matrix with the number of stocks of every ticker each investor holds.
+        - savings, debt, total_contribution, periodic_contribution, relation_savings_inversion: One value per investor.
+    Rows follow the order of 'names' and columns the order of 'tickers' (see 'ticker_index').
+    All the methods receive a price vector aligned with the columns (see 'price_vector').
+    '''
+    def __init__(self, investors : list[Investor]):
+        self._names : list[str] = [investor.name for investor in investors]
+        tickers = set()
+        for investor in investors:
+            tickers.update(investor.investments.keys())
+        self._tickers : list[str] = sorted(tickers)
+        self._ticker_index : dict[str, int] = {ticker : i for i, ticker in enumerate(self._tickers)}
+
+        n = len(investors)
+        self.quantities = np.zeros((n, len(self._tickers)))
+        self.savings = np.empty(n)
+        self.debt = np.empty(n)
+        self.total_contribution = np.empty(n)
+        self.periodic_contribution = np.empty(n)
+        self.relation_savings_inversion = np.empty(n)
+        for row, investor in enumerate(investors):
+            for ticker, quantity in investor.investments.items():
+                self.quantities[row, self._ticker_index[ticker]] = quantity
+            self.savings[row] = investor.savings
+            self.debt[row] = investor.debt
+            self.total_contribution[row] = investor.total_contribution
+            self.periodic_contribution[row] = investor.periodic_contribution
+            self.relation_savings_inversion[row] = investor._relation_savings_inversion
+
+    @property
+    def names(self) -> list[str]:
+        return(self._names)
+
+    @property
+    def tickers(self) -> list[str]:
+        return(self._tickers)
+
+    @property
+    def ticker_index(self) -> dict[str, int]:
+        return(self._ticker_index)
+
+    def price_vector(self, current_prices : dict[str, float]) -> np.ndarray:
+        '''
+        Returns the prices of the dictionary 'current_prices' as a vector aligned with the columns of the matrix.
+        '''
+        return(np.array([current_prices[ticker] for ticker in self._tickers], dtype=float))
+
+    def investments_value(self, prices : np.ndarray) -> np.ndarray:
+        '''
+        Returns the current value of the investments of every investor.
+        '''
+        return(self.quantities @ prices)
+
+    def profit(self, prices : np.ndarray) -> np.ndarray:
+        return(self.investments_value(prices) - self.total_contribution)
+
+    def difference(self, prices : np.ndarray) -> np.ndarray:
+        '''
+        Returns, for every investor, the quantity needed to achieve the desired relationship between savings and investments.
+        Same as Investor.difference: (relation - savings / total) * total = relation * total - savings.
+        '''
+        total = self.investments_value(prices) + self.savings
+        return(self.relation_savings_inversion * total - self.savings)
+
+    def value_distribution(self, prices : np.ndarray, inversion_percent : float = 1) -> tuple[np.ndarray, np.ndarray]:
+        '''
+        Returns the amounts every investor would invest and save if an investment was made now (see Investor.value_distribution).
+        'inversion_percent' can be a number or a vector with one value per investor.
+        '''
+        inversion_size = self.periodic_contribution
+        amount_to_save = np.minimum(self.difference(prices), inversion_size)
+        amount_to_save = np.where(self.savings - amount_to_save < 0, -self.savings, amount_to_save)
+
+        remaining = inversion_size - amount_to_save
+        amount_to_invest = remaining * inversion_percent
+        amount_to_save = amount_to_save + remaining * (1 - np.asarray(inversion_percent))
+        return(amount_to_invest, amount_to_save)
+
+    def distributions(self, prices : np.ndarray, inversion_percent : float = 1) -> dict[str, ValueDistribution]:
+        '''
+        Returns the ValueDistribution of every investor, keyed by name.
+        '''
+        invest, save = self.value_distribution(prices, inversion_percent)
+        return({name : ValueDistribution(float(i), float(s)) for name, i, s in zip(self._names, invest, save)})
@@ -1,15 +1,19 @@
 from .transaction import Transaction
 from datetime import datetime
 from typing import Self
-import os
-import json
 
 class Investment(Transaction):
+    __slots__ = ('_ticker', '_purchase_price', '_stock_quantity')
     _FILENAME = '-investment.json'
-    def __init__(self, savings : float, purchase_price:float, quantity:float, date:datetime=datetime.now(), fee:float=0) -> None:
+    def __init__(self, ticker : str, purchase_price:float, quantity:float, date:datetime=None, fee:float=0) -> None:
         super().__init__(purchase_price * quantity, date, fee)
+        self._ticker = ticker
         self._purchase_price = purchase_price
         self._stock_quantity = quantity
+
+    @property
+    def ticker(self) -> str:
+        return(self._ticker)
     
     @property
     def purchase_price(self) -> float:
@@ -33,6 +37,7 @@ class Investment(Transaction):
     
     def __str__(self) -> str:
         output = "Fecha compra: " + str(self.date) + ", "
+        output += "Valor: " + str(self._ticker) + ", "
         output += "Precio de compra: " + str(self._purchase_price) + ", "
         output += "Nº de acciones: " + str(self._stock_quantity) + ", "
         output += "Comisión: " + str(self._fee)
@@ -41,11 +46,12 @@ class Investment(Transaction):
 
     @classmethod
     def from_dict(cls, data:dict) -> Self:
-        inversion = cls(data["Precio de compra"], data["Nº de acciones"], data["Fecha"], data["Comisión"])
+        inversion = cls(data["Valor"], data["Precio de compra"], data["Nº de acciones"], cls._parse_date(data["Fecha"]), data["Comisión"])
         return(inversion)
 
     def to_dict(self) -> dict:
         data = super().to_dict()
+        data["Valor"] = self._ticker
         data["Precio de compra"] = self._purchase_price
         data["Nº de acciones"] = self._stock_quantity
         return(data)
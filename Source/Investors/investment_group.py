@@ -1,31 +1,81 @@
 from .investor import Investor
+from .investor_registry import InvestorRegistry
 from .transfer import Transfer
+from .investment import Investment
+from .savings import Savings
+from .sale import Sale
 from .periodic_registry import PeriodicRegistry
 from .value_distribution import ValueDistribution
-import yfinance as yf
-from typing import Self
-import json
+from .group_aggregates import GroupAggregates, GroupSummary
+from .lot_ledger import LotLedger
+from ..Prices import PriceProvider, YahooPriceProvider, QuoteCache
+from ..Storage.storage_engine import StorageEngine
+from ..Instrumentation import timed
+from concurrent.futures import Future
+from datetime import date, datetime
+from typing import Iterator, Self, TYPE_CHECKING
 import os
+import threading
+
+if TYPE_CHECKING: #The modules that use NumPy are imported on first use, so it isn't loaded at startup.
+    from .holdings_matrix import HoldingsMatrix
+    from .mass_investment_simulation import SimulationResult
+    from .transaction_table import TransactionTable
+    from .position_history import PositionSeries
+    from .target_allocation import Allocation
+    from ..Prices import PriceStore
 
 class InvestmentGroup():
-    _FILENAME = 'InvestmentGroup.json'
-    _TRANSACTIONS_DIR = 'Transactions'
+    _MAX_PRICE_AGE = 300
+    _GROUP_ACCOUNT = 'Group'
+    _SNAPSHOT_INTERVAL = 10000
     
-    def __init__(self):
+    def __init__(self, price_provider : PriceProvider = None, max_price_age : float = _MAX_PRICE_AGE, prices_file : str = None, storage : StorageEngine = None, check_invariants : bool = False, price_store : 'PriceStore' = None):
         '''
         Creates a new InvestmentGroup object.
         _balance (float): _description_ When clients contribute money to the group, it is stored here. When money is taken for investments or savings, it is taken from here. So:
             - If the balance is positive, there is remaining money to be invested or saved.
             - If the balance is negative, someone in the group is in debt.
-        _investors (list): _description_ List of investors in the group.
+        _investors (InvestorRegistry): _description_ Investors in the group, indexed by name.
         _investment_rate (float): _description_ Percentage of the adjusted contribution to be invested. That means, after balancing the savings and investments of the investor.
+        _investment_ticker (str): _description_ Ticker of the stock bought with the periodic contributions.
+        _quotes (QuoteCache): _description_ Cache of the current prices of the stocks. They are fetched from 'price_provider' (Yahoo Finance by default)
+            when they are older than 'max_price_age' seconds. If 'prices_file' is given, the quotes are persisted there between executions.
+        _storage (StorageEngine): _description_ Where the group, its investors and its transactions are persisted. Defaults to the JSON layout in the current directory.
+        _aggregates (GroupAggregates): _description_ Running totals of the investors, updated by every operation of the group.
+            With 'check_invariants' they are verified against a full recompute after every operation.
+        _dirty (set[str]): _description_ Names of the investors modified since the group was last saved to or loaded from '_saved_to'.
+            Saving again to that storage (or to its directory) only rewrites them (and the header). Saving to any other storage writes every investor.
+        _price_store (PriceStore): _description_ Local store of historical closing prices, used to value the group at past dates.
+        _target_weights (dict[str, float]): _description_ Share of the investments the group wants in every ticker. When the group or any investor
+            has target weights, the periodic contributions are split across their tickers by a TargetAllocator, with whole stocks if '_whole_shares'
+            and without orders under '_minimum_order' or whose periodic fee is more than '_max_fee_ratio' of their value.
+        The log of transactions of the storage is the source of truth: loading reads the latest snapshot of the group and replays the
+        transactions recorded after it. Saving takes a new snapshot after changes that aren't transactions (investors added or removed,
+        new settings) or every '_SNAPSHOT_INTERVAL' transactions, so the replayed tail stays short.
         '''
         self._balance : float = 0
-        self._investors : list[Investor] = []
+        self._investors : InvestorRegistry = InvestorRegistry()
         self._periodic_fee : float = 1
         self._investment_rate : float = 1
-        self._prices_updated : bool = False
-        self._current_prices : dict[str, float] = {}
+        self._investment_ticker : str = None
+        self._quotes : QuoteCache = QuoteCache(price_provider or YahooPriceProvider(), max_price_age, prices_file)
+        self._storage : StorageEngine = storage
+        self._holdings : 'HoldingsMatrix' = None
+        self._aggregates : GroupAggregates = GroupAggregates()
+        self._check_invariants : bool = check_invariants
+        self._dirty : set[str] = set()
+        self._removed : set[str] = set()
+        self._saved_to : StorageEngine = None
+        self._price_store : 'PriceStore' = price_store
+        self._snapshot_needed : bool = True
+        self._unsnapshotted : int = 0
+        self._target_weights : dict[str, float] = {}
+        self._minimum_order : float = 0
+        self._max_fee_ratio : float = None
+        self._whole_shares : bool = True
+        self._lock = threading.Lock()
+        self._refreshed_tickers : frozenset[str] = frozenset()
 
 
     @property
@@ -35,104 +85,534 @@ class InvestmentGroup():
         '''
         return self._balance
 
+    @property
+    def investors(self) -> InvestorRegistry:
+        return self._investors
+
+    @property
+    def storage(self) -> StorageEngine:
+        '''
+        Returns the storage where the transactions of the group are recorded. It is created the first time it is needed.
+        '''
+        if self._storage is None:
+            self._storage = InvestmentGroup._as_storage(os.curdir)
+        return self._storage
+
+    @property
+    def price_provider(self) -> PriceProvider:
+        return self._quotes.provider
+
+    @property
+    def quotes(self) -> QuoteCache:
+        return self._quotes
+
+    @property
+    def price_store(self) -> 'PriceStore':
+        return self._price_store
+
+    @price_store.setter
+    def price_store(self, price_store : 'PriceStore') -> None:
+        self._price_store = price_store
+
     @property
     def current_prices(self) -> dict[str, float]:
-        if not self._prices_updated:
-            self.update_stock_prices()
-            self._prices_updated = True
-        return self._current_prices
-        
-            
+        '''
+        Returns the current prices of the stocks the group is investing in.
+        Only the prices older than the maximum age of the quote cache are fetched again.
+        '''
+        return self._get_current_prices(self.tickers())
+
+    def tickers(self) -> set[str]:
+        '''
+        Returns the tickers of the stocks the group is investing in.
+        '''
+        tickers = set()
+        for investor in self._investors:
+            tickers.update(investor.investments.keys())
+        return tickers
+
+    def holdings(self, refresh : bool = False) -> 'HoldingsMatrix':
+        '''
+        Returns the investors of the group as a HoldingsMatrix, used to value all of them at once.
+        The matrix is kept until the group modifies its investors. Use 'refresh' after modifying them from outside the group.
+        '''
+        if self._holdings is None or refresh:
+            from .holdings_matrix import HoldingsMatrix
+            self._holdings = HoldingsMatrix(self._investors)
+        return self._holdings
+
+    @property
+    def dirty_investors(self) -> frozenset[str]:
+        '''
+        Returns the names of the investors that have been modified since the group was last saved or loaded.
+        '''
+        return frozenset(self._dirty)
+
+    def _holdings_changed(self, names = None) -> None:
+        '''
+        Called after modifying investors: 'names' are the modified ones (all of them if None), which are marked to be saved.
+        '''
+        self._holdings = None
+        self._dirty.update(self._investors.names() if names is None else names)
+        self._copy_quoted_tickers()
+        if self._check_invariants:
+            self.check_aggregates()
+
+    def add_investor(self, investor : Investor) -> None:
+        self.add_investors([investor])
+
+    def add_investors(self, investors : list[Investor]) -> None:
+        '''
+        Adds several investors at once. Raises a ValueError without adding any of them if a name is already in use.
+        '''
+        investors = list(investors)
+        self._investors.add_all(investors)
+        for investor in investors:
+            self._aggregates.add_investor(investor)
+            self._removed.discard(investor.name)
+        self._snapshot_needed = True
+        self._holdings_changed(investor.name for investor in investors)
+
+    def remove_investor(self, name : str) -> Investor:
+        return self.remove_investors([name])[0]
+
+    def remove_investors(self, names : list[str]) -> list[Investor]:
+        '''
+        Removes several investors at once. Raises a KeyError without removing any of them if a name is unknown.
+        '''
+        investors = self._investors.remove_all(names)
+        for investor in investors:
+            self._aggregates.remove_investor(investor)
+            self._dirty.discard(investor.name)
+            self._removed.add(investor.name)
+        self._snapshot_needed = True
+        self._holdings_changed(())
+        return investors
+
+    def summary(self) -> GroupSummary:
+        '''
+        Returns the running totals of the group (savings, debt, contribution and quantity of every ticker).
+        '''
+        return self._aggregates.summary()
+
+    def check_aggregates(self) -> None:
+        '''
+        Verifies the running totals against a full recompute over the investors.
+        '''
+        differences = self._aggregates.differences(GroupAggregates.from_investors(self._investors))
+        if differences:
+            raise AssertionError("Running totals out of sync: " + ", ".join(differences))
+
+    def refresh_aggregates(self) -> None:
+        '''
+        Recomputes the running totals and the holdings matrix. Needed only after modifying the investors from outside the group.
+        '''
+        self._aggregates = GroupAggregates.from_investors(self._investors)
+        self._snapshot_needed = True
+        self._holdings_changed()
+
+    def _price_vector(self) -> tuple:
+        '''
+        Returns the holdings matrix of the group and the current prices as a vector aligned with its columns.
+        '''
+        holdings = self.holdings()
+        return holdings, holdings.price_vector(self._get_current_prices(set(holdings.tickers)))
 
     def total_profit(self) -> float:
         '''
         Returns the total profit of the group.
         '''
-        return sum([investor.profit() for investor in self._investors])
+        return self.total_investments_value() - self._aggregates.total_contribution
 
     def total_savings(self) -> float:
         '''
         Returns the total savings of the group.
         '''
-        return sum([investor.savings() for investor in self._investors])
-    
+        return self._aggregates.total_savings
+
+    def total_debt(self) -> float:
+        return self._aggregates.total_debt
+
     def total_investments_value (self) -> float:
         '''
         Returns the total value of the investments of the group.
         '''
-        return sum([investor.investments_current_value() for investor in self._investors])
+        return self._aggregates.investments_value(self._get_current_prices(self._aggregates.held_tickers()))
 
+    @timed()
+    def investments_value_at(self, day : date) -> dict[str, float]:
+        '''
+        Returns the value the current investments of every investor had on 'day', with the closes of the price store (the last
+        one on or before that day). It doesn't access the network. Raises a KeyError if a ticker has no price by then.
+        '''
+        holdings = self.holdings()
+        values = holdings.investments_value(holdings.price_vector(self._historical_prices(set(holdings.tickers), day)))
+        return dict(zip(holdings.names, values.tolist()))
+
+    def total_investments_value_at(self, day : date) -> float:
+        '''
+        Returns the value the current investments of the group had on 'day'. See investments_value_at.
+        '''
+        return self._aggregates.investments_value(self._historical_prices(self._aggregates.held_tickers(), day))
+
+    def _historical_prices(self, tickers : set[str], day : date) -> dict[str, float]:
+        if self._price_store is None:
+            raise ValueError("The group has no price store.")
+        return self._price_store.prices_at(tickers, day)
+
+    @timed()
     def _get_current_prices(self, tickers : set[str]) -> dict[str, float]:
         '''
         Returns a dictionary with the current prices of the tickers in the set 'tickers'.
-        It has to access the Yahoo Finance API to get the current prices so take in mind is an inefficient operation.
+        Cached quotes are reused while they are fresh. The rest are quoted together by the price provider, which usually has to access
+        the network so take in mind is an inefficient operation.
         '''
-        current_prices = {}
-        for ticker in tickers:
-            current_prices[ticker] = yf.Ticker(ticker).history(period='1d', interval='1m')['Close'].iloc[-1]
-        return current_prices
+        return self._quotes.get(tickers)
 
-    def update_stock_prices(self) -> None:
+    def quoted_tickers(self) -> set[str]:
         '''
-        Updates the variable self._current_prices with the current value of the stocks the group is investing in.
+        Returns the tickers whose prices the group needs: the ones it holds, the one it invests in and the ones in the target weights
+        of the group and its investors.
         '''
-        tickers = set()
+        tickers = self.tickers() | self._weighted_tickers()
+        if self._investment_ticker is not None:
+            tickers.add(self._investment_ticker)
+        return tickers
+
+    def _weighted_tickers(self) -> set[str]:
+        '''
+        Returns the tickers in the target weights of the group and its investors, which a mass investment may buy.
+        '''
+        tickers = set(self._target_weights)
         for investor in self._investors:
-            tickers.update(investor.investments.keys())
-        
-        self._current_prices = self._get_current_prices(tickers)
+            tickers.update(investor.target_weights)
+        return tickers
+
+    def prefetch_prices(self) -> Future:
+        '''
+        Starts fetching the prices the group needs in the background. Later operations wait for that fetch instead of starting another one.
+        '''
+        return self._quotes.prefetch(self.quoted_tickers())
+
+    def start_price_refresh(self, interval : float = None) -> None:
+        '''
+        Keeps the prices the group needs fresh with a background thread, so operations don't have to wait for the price provider.
+        The thread never reads the investors, which may be changing: it quotes a copy of the tickers taken after every change.
+        See QuoteCache.start_refresh.
+        '''
+        self._quotes.start_refresh(self._quoted_copy, interval)
+
+    def _quoted_copy(self) -> frozenset[str]:
+        with self._lock:
+            return self._refreshed_tickers
 
+    def _copy_quoted_tickers(self) -> None:
+        '''
+        Copies the tickers refreshed in the background: the ones held according to the running totals, the one the group invests in
+        and the ones in the target weights.
+        '''
+        tickers = self._aggregates.held_tickers() | self._weighted_tickers()
+        if self._investment_ticker is not None:
+            tickers.add(self._investment_ticker)
+        with self._lock:
+            self._refreshed_tickers = frozenset(tickers)
+
+    def stop_price_refresh(self) -> None:
+        self._quotes.stop_refresh()
+
+    @timed()
+    def update_stock_prices(self) -> None:
+        '''
+        Discards the cached prices of the stocks the group is investing in and fetches them again.
+        '''
+        tickers = self.tickers()
+        self._quotes.invalidate(tickers)
+        self._get_current_prices(tickers)
+
+    @timed()
     def value_to_invest(self) -> float:
         '''
         If an investment was considered to be mande now, how much would the group invest.
         '''
-        value = 0
-        for investor in self._investors:
-            value += investor.value_distribution(self.current_prices, self._investment_rate).investment
-        return value
+        holdings, prices = self._price_vector()
+        investment, savings = holdings.value_distribution(prices, self._investment_rate)
+        return float(investment.sum())
 
-    def pay_debt(self, name : str, amount : float) -> None:
+    def value_distributions(self) -> dict[str, ValueDistribution]:
+        '''
+        Returns how the periodic contribution of every investor would be split between investment and savings if an investment was made now.
+        '''
+        holdings, prices = self._price_vector()
+        return holdings.distributions(prices, self._investment_rate)
+
+    def simulate_mass_invest(self, ticker : str, price_scenarios : list[dict[str, float]], investment_rates : list[float] = None, workers : int = None) -> 'SimulationResult':
+        '''
+        Evaluates a mass investment in 'ticker' for every price scenario and investment rate (the group's one by default) without
+        modifying the investors nor writing anything. See MassInvestmentSimulation.
+        '''
+        from .mass_investment_simulation import MassInvestmentSimulation
+        simulation = MassInvestmentSimulation(self.holdings(), ticker)
+        rates = [self._investment_rate] if investment_rates is None else investment_rates
+        return simulation.run(simulation.scenarios(price_scenarios), rates, workers)
+
+    def pay_debt(self, name : str, amount : float, flush : bool = True) -> None:
         '''
         Pays x amount of money of the debt of the investor with the name 'name'.
-        Saves a Transfer object with the transaction.
+        Records a Transfer object with the transaction in the storage, written straight away if 'flush'.
+        Raises a KeyError if there is no investor with that name.
         '''
-        for investor in self._investors:
-            if investor.name == name:
-                investor.pay_debt(amount)
-                self._balance += amount
-                break
-        
-        transfer = Transfer(amount, name, 'Group')
-        os.makedirs(InvestmentGroup._TRANSACTIONS_DIR, exist_ok=True)
-        transfer.save(os.path.join(InvestmentGroup._TRANSACTIONS_DIR, transfer.filename()))
+        self.pay_debts([(name, amount)], flush)
 
+    @timed()
+    def pay_debts(self, payments : list[tuple[str, float]], flush : bool = True) -> None:
+        '''
+        Applies several (name, amount) debt payments, like the ones of a bank statement.
+        All the names are validated before applying any payment and all the Transfer objects are written together in a single write.
+        '''
+        payments = list(payments)
+        self._investors.validate({name for name, amount in payments})
 
-    def withdraw(self, name : str, amount : float) -> None:
+        transfers = [(name, Transfer(amount, name, InvestmentGroup._GROUP_ACCOUNT)) for name, amount in payments]
+        self.replay(transfers)
+        self._record(transfers, flush)
+
+    def withdraw(self, name : str, amount : float, flush : bool = True) -> None:
         '''
         Withdraws x amount of money from the savings of the investor with the name 'name'.
-        Saves a Transfer object with the transaction.
+        Records a Transfer object with the transaction in the storage, written straight away if 'flush'.
+        Raises a KeyError if there is no investor with that name.
         
         Precondition: The investor must have enough money in savings to withdraw the amount.
         '''
-        for investor in self._investors:
-            if investor.name == name:
-                investor.withdraw(amount)
-                break
-        
-        transfer = Transfer(amount, 'Group', name)
-        os.makedirs(InvestmentGroup._TRANSACTIONS_DIR, exist_ok=True)
-        transfer.save(os.path.join(InvestmentGroup._TRANSACTIONS_DIR, transfer.filename()))
+        self.withdraw_all([(name, amount)], flush)
 
-    def mass_invest(self, fee : float) -> None:
+    @timed()
+    def withdraw_all(self, withdrawals : list[tuple[str, float]], flush : bool = True) -> None:
         '''
-        Iterates through all the investors in the group and invests their corresponding periodic contribution respecting
-        the percentage of investments and saving of each investor. Saves all the investments as Investment objects.
+        Applies several (name, amount) withdrawals. All the names are validated before applying any of them and all the Transfer
+        objects are written together in a single write.
         '''
-        current_prices = self.get_stocks_value()
-        for investor in self._investors:
-            registry = investor.add_investment(current_prices, fee)
+        withdrawals = list(withdrawals)
+        self._investors.validate({name for name, amount in withdrawals})
+
+        transfers = [(name, Transfer(amount, InvestmentGroup._GROUP_ACCOUNT, name)) for name, amount in withdrawals]
+        self.replay(transfers)
+        self._record(transfers, flush)
+
+    def sell(self, name : str, ticker : str, quantity : float, fee : float = None, flush : bool = True) -> Sale:
+        '''
+        Sells 'quantity' stocks of 'ticker' of the investor with the name 'name' at the current price. The money obtained, once the fee
+        (the periodic fee of the group by default) is paid, goes to the savings of the investor.
+        Records a Sale object with the transaction in the storage.
+        Raises a KeyError if there is no investor with that name and a ValueError, without selling anything, if they don't hold that many stocks.
+        '''
+        fee = self._periodic_fee if fee is None else fee
+        self._investors.validate({name})
+        held = self._investors.get(name).investments.get(ticker, 0)
+        if quantity <= 0 or quantity > held + LotLedger._TOLERANCE:
+            raise ValueError(f"{name} can't sell {quantity} stocks of {ticker}, they hold {held}.")
+
+        sale = Sale(ticker, self._get_current_prices({ticker})[ticker], min(quantity, held), fee=fee)
+        self.replay([(name, sale)])
+        self._record([(name, sale)], flush)
+        return sale
+
+    def gains(self) -> dict[str, tuple[float, float]]:
+        '''
+        Returns the realized and the unrealized gain of every investor, keyed by name. See Investor.realized_gain and Investor.unrealized_gain.
+        '''
+        current_prices = self.current_prices
+        return {investor.name : (investor.realized_gain(), investor.unrealized_gain(current_prices)) for investor in self._investors}
+
+    def apply(self, owner : str, transaction) -> None:
+        '''
+        Applies a recorded transaction to its investor and to the balance and the running totals of the group, the same way the
+        operation that recorded it did. An investor unknown to the group (added after the last snapshot) is created with default settings.
+        '''
+        self.replay([(owner, transaction)])
+
+    def replay(self, records) -> set[str]:
+        '''
+        Applies the (owner, transaction) pairs in order (see apply). Returns the names of the investors modified.
+        '''
+        names = set()
+        for owner, transaction in records:
+            names.add(self._apply(owner, transaction))
+        self._holdings_changed(names)
+        return names
+
+    def _apply(self, owner : str, transaction) -> str:
+        name = owner
+        if isinstance(transaction, Transfer):
+            name = transaction.destination if transaction.source == InvestmentGroup._GROUP_ACCOUNT else transaction.source
+        investor = self._investors.get(name)
+        if investor is None:
+            investor = Investor(name)
+            self._investors.add(investor)
+            self._snapshot_needed = True
+        investor.apply(transaction)
+
+        amount = transaction.amount
+        if isinstance(transaction, Investment):
+            self._balance -= amount
+            self._aggregates.apply(debt=amount, contribution=amount, ticker=transaction.ticker, quantity=transaction.stock_quantity)
+        elif isinstance(transaction, Savings):
+            self._balance -= amount
+            self._aggregates.apply(savings=amount, debt=amount, contribution=amount)
+        elif isinstance(transaction, Sale):
+            self._aggregates.apply(savings=transaction.proceeds, ticker=transaction.ticker, quantity=-transaction.stock_quantity)
+        elif transaction.source == name: #Debt payment.
+            self._balance += amount
+            self._aggregates.apply(debt=-amount)
+        else: #Withdrawal.
+            self._aggregates.apply(savings=-amount)
+        return name
+
+    def history(self, owner : str = None, start = None, end = None) -> Iterator[tuple[str, PeriodicRegistry]]:
+        '''
+        Streams the (owner, registry) pairs of the periodic investments recorded between 'start' and 'end', optionally only the ones of 'owner'.
+        '''
+        return PeriodicRegistry.from_records(self.storage.transactions(owner, start, end, kinds=(Investment, Savings)))
+
+    def transaction_table(self, owner : str = None, start = None, end = None) -> 'TransactionTable':
+        '''
+        Loads the recorded transactions (optionally only the ones of 'owner' between 'start' and 'end') into a compact TransactionTable.
+        '''
+        from .transaction_table import TransactionTable
+        return TransactionTable.from_records(self.storage.transactions(owner, start, end))
+
+    def positions(self, dates : list, table : 'TransactionTable' = None) -> 'PositionSeries':
+        '''
+        Returns the holdings, savings, debt and market value (with the closes of the price store) of every investor at the end of every
+        date of 'dates', computed in a single pass over the recorded transactions. See PositionHistory.
+        A TransactionTable with the whole history (see transaction_table) can be given to reuse it between queries.
+        '''
+        from .position_history import PositionHistory
+        table = self.transaction_table() if table is None else table
+        return PositionHistory(self.holdings(), table, self._balance, InvestmentGroup._GROUP_ACCOUNT).at(dates, self._price_store)
+
+    def statement(self, day : date) -> dict[str, dict]:
+        '''
+        Returns the state of every investor at the end of 'day', keyed by name. See positions.
+        '''
+        return self.positions([day]).statement(0)
+
+    def _record(self, transactions : list, flush : bool = True) -> None:
+        '''
+        Appends the (owner, transaction) pairs to the storage, writing them straight away if 'flush'.
+        '''
+        storage = self.storage
+        storage.append_all(transactions)
+        self._unsnapshotted += len(transactions)
+        if flush:
+            storage.flush()
+
+    @property
+    def investment_ticker(self) -> str:
+        return self._investment_ticker
+
+    @investment_ticker.setter
+    def investment_ticker(self, ticker : str) -> None:
+        self._investment_ticker = ticker
+        self._snapshot_needed = True
+        self._copy_quoted_tickers()
+
+    @property
+    def target_weights(self) -> dict[str, float]:
+        return self._target_weights
+
+    @target_weights.setter
+    def target_weights(self, weights : dict[str, float]) -> None:
+        self._target_weights = Investor.normalized_weights(weights)
+        self._snapshot_needed = True
+        self._copy_quoted_tickers()
+
+    def set_target_weights(self, name : str, weights : dict[str, float]) -> None:
+        '''
+        Sets the target weights of the investor with the name 'name' (an empty dictionary to follow the ones of the group).
+        Raises a KeyError if there is no investor with that name and a ValueError if the weights are invalid.
+        '''
+        self._investors.validate({name})
+        self._investors.get(name).target_weights = weights
+        self._dirty.add(name)
+        self._snapshot_needed = True
+        self._copy_quoted_tickers()
+
+    def set_allocation_limits(self, minimum_order : float = 0, max_fee_ratio : float = None, whole_shares : bool = True) -> None:
+        '''
+        Sets how the contributions are split across the target weights: the smallest order placed, the largest share of an order
+        its fee can be (None for no limit) and whether only whole stocks are bought.
+        '''
+        self._minimum_order = minimum_order
+        self._max_fee_ratio = max_fee_ratio
+        self._whole_shares = whole_shares
+        self._snapshot_needed = True
+
+    @timed()
+    def mass_invest(self, fee : float = None, ticker : str = None, flush : bool = True) -> None:
+        '''
+        Iterates through all the investors in the group and invests their corresponding periodic contribution respecting
+        the percentage of investments and saving of each investor. Records all the investments as Investment objects in the storage,
+        which are written together in a single bulk write once all the investors are done.
+        The fee defaults to the periodic fee of the group. If a ticker is given, everything is invested in it. Otherwise the contributions
+        are split across the target weights of every investor (or of the group, see allocate) or, without any, invested in the
+        investment ticker of the group.
+        Without 'flush', the transactions stay buffered in the storage until it is flushed (or the group saved).
+        '''
+        fee = self._periodic_fee if fee is None else fee
+        storage = self.storage
+        if ticker is None and (self._target_weights or any(investor.target_weights for investor in self._investors)):
+            holdings = self.holdings()
+            registries = zip(holdings.names, self._allocated_registries(holdings, fee))
+        else:
+            ticker = self._investment_ticker if ticker is None else ticker
+            if ticker is None:
+                raise ValueError("No ticker to invest in.")
+            current_prices = self._get_current_prices(self.tickers() | {ticker})
+            registries = ((investor.name, investor.add_investment(current_prices, ticker, fee, self._investment_rate)) for investor in self._investors)
+
+        for name, registry in registries:
             self._balance -= registry.total_contribution
-            registry.save(investor.name)
+            self._aggregates.apply(registry.amount_saved, registry.total_contribution, registry.total_contribution)
+            for investment in registry.investments:
+                self._aggregates.apply(ticker=investment.ticker, quantity=investment.stock_quantity)
+            registry.save(storage, name)
+            self._unsnapshotted += len(registry.investments) + 1
+        self._holdings_changed()
+        if flush:
+            storage.flush()
+
+    def _allocated_registries(self, holdings : 'HoldingsMatrix', fee : float) -> Iterator[PeriodicRegistry]:
+        '''
+        Splits the periodic contribution of every investor of 'holdings' across their target weights and yields their registries, in
+        the order of the rows. Nothing is modified until every investor has weights.
+        '''
+        allocation = self.allocate(holdings, fee)
+        current_prices = self._get_current_prices(set(allocation.tickers))
+        for row, name in enumerate(holdings.names):
+            quantities = {ticker : float(quantity) for ticker, quantity in zip(allocation.tickers, allocation.quantities[row]) if quantity > 0}
+            yield self._investors.get(name).add_investments(current_prices, quantities, fee)
+
+    def allocate(self, holdings : 'HoldingsMatrix' = None, fee : float = None) -> 'Allocation':
+        '''
+        Returns what a mass investment with target weights would buy, without modifying anything: the invested part of the periodic
+        contribution of every investor (see value_distribution) is split across their target weights, or the ones of the group if
+        they have none, or the investment ticker. The rows follow the names of 'holdings' (the holdings of the group by default).
+        Raises a ValueError if an investor has nothing to invest in.
+        '''
+        from .target_allocation import TargetAllocator
+        holdings = self.holdings() if holdings is None else holdings
+        fee = self._periodic_fee if fee is None else fee
+        default = self._target_weights or ({self._investment_ticker : 1} if self._investment_ticker is not None else {})
+        weights = [self._investors.get(name).target_weights or default for name in holdings.names]
+        if not all(weights):
+            raise ValueError("No ticker to invest in.")
+
+        tickers = sorted(set().union(*weights))
+        current_prices = self._get_current_prices(set(holdings.tickers) | set(tickers))
+        budgets, savings = holdings.value_distribution(holdings.price_vector(current_prices), self._investment_rate)
+        allocator = TargetAllocator(tickers, self._minimum_order, fee, self._max_fee_ratio, self._whole_shares)
+        return allocator.allocate_holdings(holdings, budgets, weights, current_prices)
 
     @classmethod
     def from_dict(cls, data : dict) -> Self:
@@ -140,23 +620,111 @@ class InvestmentGroup():
         Creates a new InvestmentGroup object from a dictionary.
         '''
         group = cls()
-        group._balance = data['Balance']
+        group._restore(data, [])
         return(group)
 
-    def load(self, dir : str):
+    def restore(self, snapshot : dict, location) -> None:
         '''
-        Loads the InvestmentGroup object and all of it's investors from a directory.
+        Replaces the state of the group with a snapshot of it (see snapshot) taken at the end of the log of 'location' (a directory
+        or a StorageEngine), without reading the storage. Following transactions are recorded there. It hands a loaded group to another
+        process without loading it again. The next save writes every investor and a new snapshot.
         '''
-        os.chdir(dir)
-        with open(self._FILENAME, 'r') as file:
-            data = json.load(file)
-            self = InvestmentGroup.from_dict(data)
-        
-        for investor in os.listdir():
-            if os.path.isdir(investor):
-                new_investor = Investor()
-                new_investor.load(os.path.join(dir, investor + Investor.filename()))
-                self._investors.append(new_investor)
+        self._restore_snapshot(snapshot)
+        self._storage = self._storage_at(location)
+
+    def _restore(self, data : dict, investors : list[Investor]) -> None:
+        '''
+        Replaces the header and the investors of the group with the ones read from a storage.
+        '''
+        self._balance = data['Balance']
+        self._periodic_fee = data.get('Comisión periódica', self._periodic_fee)
+        self._investment_rate = data.get('Porcentaje de inversión', self._investment_rate)
+        self._investment_ticker = data.get('Valor de inversión', self._investment_ticker)
+        self._target_weights = dict(data.get('Pesos objetivo', self._target_weights))
+        self._minimum_order = data.get('Orden mínima', self._minimum_order)
+        self._max_fee_ratio = data.get('Comisión máxima', self._max_fee_ratio)
+        self._whole_shares = data.get('Acciones enteras', self._whole_shares)
+        self._investors = InvestorRegistry(investors)
+        self.refresh_aggregates()
+
+    @staticmethod
+    def _as_storage(location) -> StorageEngine:
+        '''
+        Directories are stored with the JSON layout.
+        '''
+        from ..Storage import JSONStorage #Imported here because the storages depend on this package.
+        if isinstance(location, StorageEngine):
+            return location
+        return JSONStorage(location)
+
+    def _storage_at(self, location) -> StorageEngine:
+        '''
+        Returns the storage of 'location', reusing the one the group already uses when 'location' is its directory, so saving to the
+        same directory again only writes the modified investors.
+        '''
+        if not isinstance(location, StorageEngine):
+            for storage in (self._storage, self._saved_to):
+                dirname = getattr(storage, 'dirname', None)
+                if dirname is not None and os.path.abspath(dirname) == os.path.abspath(location):
+                    return storage
+        return InvestmentGroup._as_storage(location)
+
+    @timed()
+    def load(self, location):
+        '''
+        Loads the InvestmentGroup object and all of it's investors from a directory (JSON layout) or a StorageEngine.
+        The state is rebuilt from the latest snapshot and the transactions recorded after it. Groups saved before snapshots existed
+        are read from the documents of their investors.
+        Following transactions are recorded in the same storage. If the prices are being refreshed in the background, the ones of the
+        loaded investors start being fetched straight away.
+        '''
+        storage = self._storage_at(location)
+        snapshot = storage.snapshot()
+        if snapshot is None:
+            storage.load_group(self)
+            tail, replayed = [], set()
+        else:
+            self._restore_snapshot(snapshot)
+            tail = list(storage.replay(snapshot["Posición"]))
+            replayed = self.replay(tail)
+        self._storage = storage
+        self._saved(storage)
+        self._dirty.update(replayed) #Their documents are older than the log.
+        self._snapshot_needed = snapshot is None
+        self._unsnapshotted = len(tail)
+        if self._quotes.refreshing:
+            self.prefetch_prices()
+
+    def state_at(self, end : datetime) -> Self:
+        '''
+        Rebuilds the group as it was at 'end' from the latest snapshot taken before then and the transactions recorded after it and
+        dated before 'end'. The returned group is meant to be inspected, not modified.
+        Raises a ValueError if the storage has no snapshot taken before 'end'.
+        '''
+        storage = self.storage
+        snapshot = storage.snapshot(end)
+        if snapshot is None:
+            raise ValueError("No snapshot of the group before " + str(end))
+        group = InvestmentGroup(self.price_provider, self._quotes.max_age, price_store=self._price_store)
+        group._restore_snapshot(snapshot)
+        group.replay(storage.replay(snapshot["Posición"], end))
+        return group
+
+    def snapshot(self, position = None) -> dict:
+        '''
+        Returns the whole state of the group (header and investors) with the position of the log it corresponds to (the current
+        position of the storage by default) and the moment it was taken.
+        '''
+        data = {
+            "Posición": self.storage.position() if position is None else position,
+            "Fecha": datetime.now().isoformat(),
+            "Grupo": self.to_dict(),
+            "Inversores": [investor.to_dict() for investor in self._investors],
+        }
+        return data
+
+    def _restore_snapshot(self, snapshot : dict) -> None:
+        self._restore(snapshot["Grupo"], [Investor.from_dict(data) for data in snapshot["Inversores"]])
 
     def to_dict(self) -> dict:
         '''
@@ -164,21 +732,50 @@ class InvestmentGroup():
         '''
         data = {
             'Balance': self._balance,
+            'Comisión periódica': self._periodic_fee,
+            'Porcentaje de inversión': self._investment_rate,
+            'Valor de inversión': self._investment_ticker,
+            'Pesos objetivo': dict(self._target_weights),
+            'Orden mínima': self._minimum_order,
+            'Comisión máxima': self._max_fee_ratio,
+            'Acciones enteras': self._whole_shares,
         }
         return data
 
-    def save(self, dirname : str):
+    @timed()
+    def save(self, location = None):
+        '''
+        Saves the InvestmentGroup object and all of it's investors to a directory (JSON layout) or a StorageEngine.
+        If no location is given, the group's own storage is used. The pending transactions are written too.
+        Saving to another storage makes it the group's own: the log of the previous storage is copied to it first, so the history of
+        the group moves with it, and following transactions are recorded there. Raises a ValueError if the other storage already has
+        transactions.
+        When saving again to the storage the group was last saved to or loaded from, only the modified investors are written.
+        A snapshot is taken when needed (see __init__).
+        '''
+        if location is None:
+            storage = self.storage
+        else:
+            storage = self._storage_at(location)
+            if self._storage is not None and storage is not self._storage:
+                self._storage.flush()
+                self._storage.copy_log(storage)
+            self._storage = storage
+        names = set(self._dirty) if storage is self._saved_to else None
+        storage.save_group(self, names, set(self._removed))
+        if names is None or self._snapshot_needed or self._unsnapshotted >= InvestmentGroup._SNAPSHOT_INTERVAL:
+            storage.save_snapshot(self.snapshot(storage.position()))
+            self._snapshot_needed = False
+            self._unsnapshotted = 0
+        self._saved(storage)
+
+    def _saved(self, storage : StorageEngine) -> None:
         '''
-        Saves the InvestmentGroup object and all of it's investors to a file.
+        Records that 'storage' holds the current state of the group.
         '''
-        os.makedirs(dirname, exist_ok=True)
-        with open(os.path.join(dirname, self._FILENAME), 'w') as file:
-            json.dump(self.to_dict(), file)
-        
-        for investor in self._investors:
-            os.makedirs(os.path.join(dirname, investor.name), exist_ok=True)
-            investor.save(os.path.join(dirname, investor.name + Investor.filename()))
-            os.chdir(dirname)
+        self._saved_to = storage
+        self._dirty.clear()
+        self._removed.clear()
 
     def investment_confirmation(self) -> None:
         '''
@@ -188,7 +785,7 @@ class InvestmentGroup():
         print("El procentaje de reducción de inversión es de: " + str(self._investment_rate))
         print("La comisión establecida es de: " + str(self._periodic_fee))
         print("Los precios actuales son:")
-        current_prices = self.get_stocks_value()
+        current_prices = self.current_prices
         for ticker, price in current_prices.items():
             print("\t-" + ticker + ": " + str(price))
 
@@ -1,9 +1,13 @@
 from .investment import Investment
 from .savings import Savings
+from .transfer import Transfer
+from .sale import Sale
+from .lot_ledger import CostBasisPolicy, LotLedger
 from .periodic_registry import PeriodicRegistry
 from .value_distribution import ValueDistribution
+from ..Instrumentation import timed
+from datetime import datetime
 from typing import Self
-import os
 import json
 
 class Investor():
@@ -14,7 +18,7 @@ class Investor():
     def filename() -> str:
         return(Investor._FILENAME)
 
-    def __init__(self, name:str) -> None:
+    def __init__(self, name:str, cost_basis_policy:CostBasisPolicy=CostBasisPolicy.FIFO) -> None:
         """_summary_
         Investor serves as a database for individual users.
         Args:
@@ -24,6 +28,10 @@ class Investor():
             _debt (float): _description_ Money owed by the user to the fund.
             _total_contribution (float): _description_ Total quantity of money contributed by the user.
             _relation_savings_inversion (float, optional): _description_ Desired relationship between the total savings and the total inverted value. Defaults to 0.5.
+            cost_basis_policy (CostBasisPolicy, optional): _description_ How the cost of the stocks sold is computed. Defaults to FIFO.
+            _lots (dict): _description_ Dictionary with ticker as key and the LotLedger with the purchases of that ticker as value.
+            _target_weights (dict): _description_ Dictionary with ticker as key and the share of the investments the user wants in it as value.
+                If empty, the target weights of the group are used.
         """
         self._name : str = name
         self._savings :float = 0
@@ -33,6 +41,9 @@ class Investor():
         self._total_contribution :float = 0
 
         self._relation_savings_inversion = Investor._DEFAULT_RELATION_SAVINGS_INVERSION
+        self._cost_basis_policy : CostBasisPolicy = cost_basis_policy
+        self._lots : dict[str, LotLedger] = {}
+        self._target_weights : dict[str, float] = {}
     
     @property
     def name(self) -> str:
@@ -58,6 +69,43 @@ class Investor():
     def periodic_contribution(self) -> float:
         return(self._periodic_contribution)
 
+    @property
+    def target_weights(self) -> dict[str, float]:
+        return(self._target_weights)
+
+    @target_weights.setter
+    def target_weights(self, weights:dict[str, float]) -> None:
+        self._target_weights = Investor.normalized_weights(weights)
+
+    @staticmethod
+    def normalized_weights(weights:dict[str, float]) -> dict[str, float]:
+        """_summary_
+        Returns the weights scaled so they add up to 1, without the null ones. An empty dictionary means no target.
+        Raises a ValueError if a weight is negative or all of them are 0.
+        """
+        if not weights:
+            return({})
+        if any(weight < 0 for weight in weights.values()):
+            raise ValueError("Target weights can't be negative.")
+        total = sum(weights.values())
+        if total <= 0:
+            raise ValueError("Target weights must add up to more than 0.")
+        return({ticker : weight / total for ticker, weight in weights.items() if weight > 0})
+
+    @property
+    def cost_basis_policy(self) -> CostBasisPolicy:
+        return(self._cost_basis_policy)
+
+    def ledger(self, ticker:str) -> LotLedger:
+        """_summary_
+        Returns the lots of the ticker held by the user. Stocks held before their purchases were tracked become a single lot with no cost.
+        """
+        ledger = self._lots.get(ticker)
+        if ledger is None:
+            ledger = self._lots[ticker] = LotLedger(self._cost_basis_policy)
+            ledger.buy(self._investments.get(ticker, 0), 0)
+        return(ledger)
+
     def withdraw(self, amount:float) -> None:
         """_summary_
         Withdraws money from the savings of the user.
@@ -94,14 +142,15 @@ class Investor():
         distribution = ValueDistribution(amount_to_invest, amount_to_save)
         return(distribution)
 
-    def add_investment(self, current_prices:float, ticker:str, fee:float=0, inversion_percent:float=1) -> PeriodicRegistry:
+    def add_investment(self, current_prices:dict, ticker:str, fee:float=0, inversion_percent:float=1) -> PeriodicRegistry:
         """_summary_
         Given the periodic contribution, splits it into the inversion and the savings mounts. Creates and saves the new inversion of the user.
         Also increases it's debt by the inversion size and updates the total contribution by the same amount.
 
     
         Args:
-            current_price (float): _description_ Current price of the action to buy.
+            current_prices (dict): _description_ Dictionary with the ticker as key and the current price as value.
+            ticker (str): _description_ Ticker of the stock to buy.
             fee (float, optional): _description_ Fee of the movement. Defaults to 0.
             inversion_percent (float, optional): _description_ For cases when a full inversion is not desired, instead of investing the usual quantity only a percentaje will be used. Deafults to 1.    
         """
@@ -111,31 +160,106 @@ class Investor():
 
         distribution = self.value_distribution(current_prices, inversion_percent)
         amount_to_invest = distribution.investment
-        amount_to_save = distribution.savings
+        amount_to_save = distribution.saving
 
         quantity = amount_to_invest / current_prices[ticker]
-        inversion = Investment(current_prices[ticker], quantity, fee)
+        inversion = Investment(ticker, current_prices[ticker], quantity, fee=fee)
         savings = Savings(amount_to_save)
         registry = PeriodicRegistry(inversion, savings)
 
-        self._investments[ticker] += quantity
+        self.ledger(ticker).buy(quantity, current_prices[ticker], inversion.date, fee)
+        self._investments[ticker] = self._investments.get(ticker, 0) + quantity
         self._savings += amount_to_save
 
         return(registry)
 
+    def add_investments(self, current_prices:dict, quantities:dict[str, float], fee:float=0) -> PeriodicRegistry:
+        """_summary_
+        Invests the periodic contribution of the user in several tickers, as decided by a TargetAllocator. The part of the contribution
+        not spent on the stocks is saved. Like add_investment, its debt and its total contribution increase by the whole contribution.
+
+        Args:
+            current_prices (dict): _description_ Dictionary with the ticker as key and the current price as value.
+            quantities (dict): _description_ Dictionary with the ticker as key and the number of stocks to buy as value.
+            fee (float, optional): _description_ Fee of every order. Defaults to 0.
+        """
+        inversion_size = self.periodic_contribution
+        self._total_contribution += inversion_size
+        self._debt += inversion_size
+
+        date = datetime.now()
+        investments = [Investment(ticker, current_prices[ticker], quantity, date, fee) for ticker, quantity in quantities.items() if quantity > 0]
+        for investment in investments:
+            self.ledger(investment.ticker).buy(investment.stock_quantity, investment.purchase_price, date, fee)
+            self._investments[investment.ticker] = self._investments.get(investment.ticker, 0) + investment.stock_quantity
+        savings = Savings(inversion_size - sum(investment.amount for investment in investments), date)
+        self._savings += savings.amount
+
+        return(PeriodicRegistry(investments, savings))
+
+    def sell(self, ticker:str, quantity:float, price:float, fee:float=0) -> Sale:
+        """_summary_
+        Sells stocks of the user. The money obtained, once the fee is paid, goes to its savings. Its debt and total contribution don't change.
+        The gain of the sale is computed with the cost basis policy of the user and added to its realized gain.
+
+        Args:
+            ticker (str): _description_ Ticker of the stock to sell.
+            quantity (float): _description_ Number of stocks to sell.
+            price (float): _description_ Current price of the stock.
+            fee (float, optional): _description_ Fee of the movement. Defaults to 0.
+
+        Returns:
+            Sale: _description_ The transaction of the sale.
+
+        Raises a ValueError if the user doesn't hold that many stocks.
+        """
+        sale = Sale(ticker, price, quantity, fee=fee)
+        self.apply(sale)
+        return(sale)
+
     def pay_debt(self, amount:float) -> None:
         self._debt -= amount
 
+    def apply(self, transaction) -> None:
+        """_summary_
+        Applies a recorded transaction of the investor to its state, the same way the operation that recorded it did.
+        Replaying the transactions of the investor over a snapshot of its state rebuilds the state at the end of the replay.
+
+        Args:
+            transaction (Transaction): _description_ Investment or Savings of a periodic contribution, Sale of stocks, or Transfer of a debt
+                payment (from the investor) or a withdrawal (to the investor).
+        """
+        if isinstance(transaction, Investment):
+            self.ledger(transaction.ticker).buy(transaction.stock_quantity, transaction.purchase_price, transaction.date, transaction.fee)
+            self._investments[transaction.ticker] = self._investments.get(transaction.ticker, 0) + transaction.stock_quantity
+            self._total_contribution += transaction.amount
+            self._debt += transaction.amount
+        elif isinstance(transaction, Savings):
+            self._savings += transaction.amount
+            self._total_contribution += transaction.amount
+            self._debt += transaction.amount
+        elif isinstance(transaction, Sale):
+            ticker = transaction.ticker
+            self.ledger(ticker).sell(transaction.stock_quantity, transaction.sale_price, transaction.fee)
+            remaining = self._investments[ticker] - transaction.stock_quantity
+            if remaining <= LotLedger._TOLERANCE:
+                del self._investments[ticker]
+            else:
+                self._investments[ticker] = remaining
+            self._savings += transaction.proceeds
+        elif isinstance(transaction, Transfer):
+            if transaction.source == self._name:
+                self.pay_debt(transaction.amount)
+            if transaction.destination == self._name:
+                self.withdraw(transaction.amount)
+
     def difference(self, current_prices : dict[str, float]) -> float:
         """_summary_
         Returns the neccesary quantity to achieve the desired relationship between the savings value and the invested ones.
         """
         total = self.investments_current_value(current_prices) + self.savings
-        savings_percentage = self.savings / total
-        needed_quantity = 0
-        displacement = self._relation_savings_inversion - savings_percentage
-        
-        needed_quantity = displacement * total
+        #(relation - savings / total) * total, without dividing by a total that can be 0 for new investors.
+        needed_quantity = self._relation_savings_inversion * total - self.savings
         
         return(needed_quantity)
     
@@ -168,13 +292,60 @@ class Investor():
         profit = self.investments_current_value(current_prices) - self._total_contribution
         return(profit)
 
+    def realized_gain(self) -> float:
+        """_summary_
+        Returns the gain of all the sales of the user, net of fees.
+        """
+        return(sum(ledger.realized for ledger in self._lots.values()))
+
+    def unrealized_gain(self, current_prices:dict) -> float:
+        """_summary_
+        Returns the gain the user would make selling all its stocks at the current prices: their value minus their cost basis.
+        Stocks held before their purchases were tracked have no cost.
+
+        Args:
+            current_prices (dict): _description_ Dictionary with the ticker as key and the current price as value.
+        """
+        gain = 0
+        for ticker, quantity in self._investments.items():
+            gain += quantity * current_prices[ticker] - self.cost_basis(ticker)
+        return(gain)
+
+    def cost_basis(self, ticker:str) -> float:
+        """_summary_
+        Returns the cost of the stocks of the ticker held by the user. Stocks held before their purchases were tracked have no cost.
+        """
+        ledger = self._lots.get(ticker)
+        return(ledger.cost if ledger is not None else 0)
+
+    def statement(self, current_prices:dict) -> dict:
+        """_summary_
+        Returns the current state of the user, valued at the current prices, as a dictionary.
+
+        Args:
+            current_prices (dict): _description_ Dictionary with the ticker as key and the current price as value.
+        """
+        value = self.investments_current_value(current_prices)
+        data = {
+            "Nombre": self._name,
+            "Ahorros": self._savings,
+            "Deuda": self._debt,
+            "Contribución total": self._total_contribution,
+            "Valor": value,
+            "Beneficio": value - self._total_contribution,
+            "Ganancia realizada": self.realized_gain(),
+            "Ganancia latente": self.unrealized_gain(current_prices),
+        }
+        return(data)
+
     def __str__(self) -> str:
+        """_summary_
+        Data stored for the user. Its value and profit depend on the current prices, see statement.
+        """
         s = "Datos de " + self._name + ":\n"
         s += "\t- Ahorros: " + str(self._savings) + "\n"
         s += "\t- Deuda: " + str(self._debt) + "\n"
         s += "Contribución total: " + str(self.total_contribution) + "\n"
-        s += "Valor actual: " + str(self.investments_current_value()) + "\n"
-        s += "Beneficio total: " + str(self.profit()) + "\n"
         s += "Valor a invertir cada mes: " + str(self.periodic_contribution) + "\n"
         s += "Relación ahorros-inversiones: " + str(self._relation_savings_inversion) + "\n"
         s+= "\t- Inversiones: \n"
@@ -186,31 +357,39 @@ class Investor():
         data = {
             "Nombre": self._name,
             "Ahorros": self._savings,
-            "Inversiones": self._investments,
+            "Inversiones": dict(self._investments),
             "Deuda": self._debt,
             "Contribución total": self._total_contribution,
             "Contribución periódica": self._periodic_contribution,
-            "Relación ahorros-inversiones": self._relation_savings_inversion
+            "Relación ahorros-inversiones": self._relation_savings_inversion,
+            "Método de coste": self._cost_basis_policy.value,
+            "Lotes": {ticker : ledger.to_dict() for ticker, ledger in self._lots.items()},
+            "Pesos objetivo": dict(self._target_weights)
         }
         return(data)
 
-    def save(self, dir:str) -> None:
-        with open(os.path.join(dir, self.name), 'w') as file:
+    @timed()
+    def save(self, filename:str) -> None:
+        with open(filename, 'w') as file:
             json.dump(self.to_dict(), file)
     
     @classmethod
     def from_dict(cls, data:dict) -> Self:
-        investor = cls(data["Nombre"])
+        investor = cls(data["Nombre"], CostBasisPolicy(data.get("Método de coste", CostBasisPolicy.FIFO.value)))
         investor._savings = data["Ahorros"]
         investor._investments = data["Inversiones"]
         investor._debt = data["Deuda"]
         investor._total_contribution = data["Contribución total"]
         investor._periodic_contribution = data["Contribución periódica"]
         investor._relation_savings_inversion = data["Relación ahorros-inversiones"]
+        investor._lots = {ticker : LotLedger.from_dict(ledger) for ticker, ledger in data.get("Lotes", {}).items()}
+        investor._target_weights = dict(data.get("Pesos objetivo", {}))
         return(investor)
     
-    def load(self, filename:str) -> None:
+    @classmethod
+    @timed()
+    def load(cls, filename:str) -> Self:
         with open(filename, 'r') as file:
             data = json.load(file)
-            self = Investor.from_dict(data)
+        return(cls.from_dict(data))
         
\ No newline at end of file
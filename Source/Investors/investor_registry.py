@@ -0,0 +1,68 @@
+from .investor import Investor
+from typing import Iterator
+
+
+class InvestorRegistry():
+    '''
+    Investors of a group indexed by name. Lookups by name are O(1) and iteration follows the order the investors were added.
+    Bulk operations validate every name before modifying anything, so they are applied completely or not at all.
+    '''
+    def __init__(self, investors : list[Investor] = ()):
+        self._investors : dict[str, Investor] = {}
+        self.add_all(investors)
+
+    def __len__(self) -> int:
+        return(len(self._investors))
+
+    def __iter__(self) -> Iterator[Investor]:
+        return(iter(self._investors.values()))
+
+    def __contains__(self, name : str) -> bool:
+        return(name in self._investors)
+
+    def __getitem__(self, name : str) -> Investor:
+        return(self._investors[name])
+
+    def get(self, name : str, default : Investor = None) -> Investor:
+        return(self._investors.get(name, default))
+
+    def names(self) -> list[str]:
+        return(list(self._investors.keys()))
+
+    def missing(self, names) -> list[str]:
+        '''
+        Returns the names of 'names' that don't belong to any investor of the registry.
+        '''
+        return([name for name in names if name not in self._investors])
+
+    def validate(self, names) -> None:
+        '''
+        Raises a KeyError with all the names of 'names' that don't belong to any investor.
+        '''
+        missing = self.missing(names)
+        if missing:
+            raise KeyError(", ".join(missing))
+
+    def add(self, investor : Investor) -> None:
+        self.add_all([investor])
+
+    def add_all(self, investors : list[Investor]) -> None:
+        investors = list(investors)
+        seen = set()
+        repeated = set()
+        for investor in investors:
+            if investor.name in self._investors or investor.name in seen:
+                repeated.add(investor.name)
+            seen.add(investor.name)
+        if repeated:
+            raise ValueError("Investors already registered: " + ", ".join(sorted(repeated)))
+        for investor in investors:
+            self._investors[investor.name] = investor
+
+    def remove(self, name : str) -> Investor:
+        return(self.remove_all([name])[0])
+
+    def remove_all(self, names : list[str]) -> list[Investor]:
+        names = list(names)
+        self.validate(names)
+        return([self._investors.pop(name) for name in names])
@@ -0,0 +1,133 @@
+from collections import deque
+from datetime import datetime
+from enum import Enum
+from typing import Iterator, Self
+
+
+class CostBasisPolicy(Enum):
+    '''
+    How the cost of the stocks sold is computed.
+        - FIFO: The oldest lots are sold first, each one at its own cost.
+        - AVERAGE: Every stock sold costs the average cost of all the stocks held.
+    '''
+    FIFO = 'FIFO'
+    AVERAGE = 'Coste medio'
+
+
+class LotLedger():
+    '''
+    Purchases (lots) of a ticker held by an investor, with their cost basis. The cost of a lot includes the fee of its purchase.
+    Lots are kept in purchase order and sales consume them from the oldest one, so every lot is visited once when it is bought and
+    once when it is sold: a sale costs O(1) amortized, whatever the number of lots.
+    The quantity, the cost of the stocks held and the realized gain are kept as running totals, so gains never rescan the lots.
+    '''
+    _TOLERANCE = 1e-9
+
+    def __init__(self, policy : CostBasisPolicy = CostBasisPolicy.FIFO):
+        self._policy : CostBasisPolicy = policy
+        self._lots : deque[list] = deque() #[quantity, cost per stock, date]
+        self._quantity : float = 0
+        self._cost : float = 0
+        self._realized : float = 0
+
+    @property
+    def policy(self) -> CostBasisPolicy:
+        return(self._policy)
+
+    @property
+    def quantity(self) -> float:
+        return(self._quantity)
+
+    @property
+    def cost(self) -> float:
+        '''
+        Returns the cost basis of the stocks held.
+        '''
+        return(self._cost)
+
+    @property
+    def average_cost(self) -> float:
+        return(self._cost / self._quantity if self._quantity else 0)
+
+    @property
+    def realized(self) -> float:
+        '''
+        Returns the gain of all the sales, net of fees.
+        '''
+        return(self._realized)
+
+    def unrealized(self, current_price : float) -> float:
+        '''
+        Returns the gain the stocks held would make if they were sold at 'current_price' (without fees).
+        '''
+        return(self._quantity * current_price - self._cost)
+
+    def __len__(self) -> int:
+        return(len(self._lots))
+
+    def lots(self) -> Iterator[tuple[float, float, datetime]]:
+        '''
+        Yields the (quantity, cost per stock, date) of the lots held, oldest first. With the AVERAGE policy, the cost of every lot is
+        the average cost.
+        '''
+        average = self.average_cost
+        for quantity, cost, date in self._lots:
+            yield((quantity, average if self._policy == CostBasisPolicy.AVERAGE else cost, date))
+
+    def buy(self, quantity : float, price : float, date : datetime = None, fee : float = 0) -> None:
+        if quantity <= 0:
+            return
+        self._lots.append([quantity, price + fee / quantity, date])
+        self._quantity += quantity
+        self._cost += price * quantity + fee
+
+    def sell(self, quantity : float, price : float, fee : float = 0) -> float:
+        '''
+        Removes 'quantity' stocks, sold at 'price', and returns the gain of the sale net of the fee.
+        Raises a ValueError if there aren't enough stocks.
+        '''
+        if quantity > self._quantity + LotLedger._TOLERANCE:
+            raise ValueError(f"Can't sell {quantity} stocks, only {self._quantity} are held.")
+        quantity = min(quantity, self._quantity)
+
+        if self._policy == CostBasisPolicy.AVERAGE:
+            cost = self._cost * quantity / self._quantity
+        else:
+            cost = 0
+        remaining = quantity
+        while remaining > LotLedger._TOLERANCE and self._lots:
+            lot = self._lots[0]
+            sold = min(lot[0], remaining)
+            if self._policy == CostBasisPolicy.FIFO:
+                cost += sold * lot[1]
+            lot[0] -= sold
+            remaining -= sold
+            if lot[0] <= LotLedger._TOLERANCE:
+                self._lots.popleft()
+
+        self._quantity -= quantity
+        self._cost -= cost
+        if not self._lots:
+            self._quantity, self._cost = 0, 0
+        gain = price * quantity - fee - cost
+        self._realized += gain
+        return(gain)
+
+    def to_dict(self) -> dict:
+        data = {
+            "Método": self._policy.value,
+            "Lotes": [[quantity, cost, None if date is None else date.isoformat()] for quantity, cost, date in self._lots],
+            "Coste": self._cost,
+            "Realizado": self._realized,
+        }
+        return(data)
+
+    @classmethod
+    def from_dict(cls, data : dict) -> Self:
+        ledger = cls(CostBasisPolicy(data["Método"]))
+        for quantity, cost, date in data["Lotes"]:
+            ledger._lots.append([quantity, cost, None if date is None else datetime.fromisoformat(date)])
+            ledger._quantity += quantity
+        ledger._cost = data["Coste"]
+        ledger._realized = data["Realizado"]
+        return(ledger)
@@ -0,0 +1,89 @@
+from .holdings_matrix import HoldingsMatrix
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+
+class SimulationResult():
+    '''
+    Outcome of a simulated mass investment. The first two axes are always (investment rate, price scenario):
+        - invested, saved, bought: (rates x scenarios x investors) Money invested, money saved and stocks bought by every investor.
+        - savings: (rates x scenarios x investors) Savings of every investor after the investment.
+        - holdings: (rates x scenarios x investors x tickers) Stocks held by every investor after the investment.
+    '''
+    def __init__(self, names : list[str], tickers : list[str], invested : np.ndarray, saved : np.ndarray, bought : np.ndarray, savings : np.ndarray, holdings : np.ndarray):
+        self.names = names
+        self.tickers = tickers
+        self.invested = invested
+        self.saved = saved
+        self.bought = bought
+        self.savings = savings
+        self.holdings = holdings
+
+
+class MassInvestmentSimulation():
+    '''
+    Evaluates what InvestmentGroup.mass_invest would do under many price scenarios and investment rates at once, without modifying
+    the investors nor writing anything. It follows the same rules as Investor.add_investment: the periodic contribution is split with
+    Investor.value_distribution and the invested part buys stocks of 'ticker'.
+    The price scenarios are a matrix (scenarios x tickers) whose columns follow 'tickers'.
+    '''
+    def __init__(self, holdings : HoldingsMatrix, ticker : str):
+        self._holdings = holdings
+        self._ticker = ticker
+        self._tickers : list[str] = list(holdings.tickers)
+        quantities = holdings.quantities
+        if ticker not in holdings.ticker_index:
+            self._tickers.append(ticker)
+            quantities = np.hstack([quantities, np.zeros((quantities.shape[0], 1))])
+        self._quantities : np.ndarray = quantities
+        self._column : int = self._tickers.index(ticker)
+
+    @property
+    def tickers(self) -> list[str]:
+        return(self._tickers)
+
+    def scenarios(self, prices : list[dict[str, float]]) -> np.ndarray:
+        '''
+        Builds the matrix of price scenarios from a list of {ticker : price} dictionaries.
+        '''
+        return(np.array([[scenario[ticker] for ticker in self._tickers] for scenario in prices], dtype=float))
+
+    def run(self, price_scenarios : np.ndarray, investment_rates = (1,), workers : int = None) -> SimulationResult:
+        '''
+        Simulates the mass investment for every combination of price scenario and investment rate.
+        With 'workers', the scenarios are split in chunks that are evaluated in a process pool.
+        '''
+        price_scenarios = np.atleast_2d(np.asarray(price_scenarios, dtype=float))
+        rates = np.asarray(investment_rates, dtype=float).reshape(-1, 1, 1)
+        holdings = self._holdings
+        state = (self._quantities, holdings.savings, holdings.periodic_contribution, holdings.relation_savings_inversion, self._column)
+
+        if workers and workers > 1 and len(price_scenarios) > 1:
+            chunks = np.array_split(price_scenarios, min(workers, len(price_scenarios)))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(_simulate, [state] * len(chunks), chunks, [rates] * len(chunks)))
+            invested, saved, bought = (np.concatenate([result[i] for result in results], axis=1) for i in range(3))
+        else:
+            invested, saved, bought = _simulate(state, price_scenarios, rates)
+
+        savings = holdings.savings + saved
+        final_holdings = np.broadcast_to(self._quantities, bought.shape + (len(self._tickers),)).copy()
+        final_holdings[..., self._column] += bought
+        return(SimulationResult(holdings.names, self._tickers, invested, saved, bought, savings, final_holdings))
+
+
+def _simulate(state : tuple, price_scenarios : np.ndarray, rates : np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    '''
+    Vectorized version of Investor.value_distribution followed by the purchase of Investor.add_investment.
+    Returns the invested, saved and bought arrays (rates x scenarios x investors).
+    '''
+    quantities, savings, inversion_size, relation, column = state
+    total = price_scenarios @ quantities.T + savings
+    amount_to_save = np.minimum(relation * total - savings, inversion_size)
+    amount_to_save = np.where(savings - amount_to_save < 0, -savings, amount_to_save)
+
+    remaining = inversion_size - amount_to_save
+    invested = remaining * rates
+    saved = amount_to_save + remaining * (1 - rates)
+    bought = invested / price_scenarios[:, column].reshape(1, -1, 1)
+    return(invested, saved, bought)
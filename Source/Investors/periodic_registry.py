@@ -1,18 +1,39 @@
 from .investment import Investment
-from typing import Self
+from typing import Iterator, Self
 from Source.Investors.savings import Savings
 import datetime
-import json
-import os
 
 class PeriodicRegistry():
-    def __init__(self, investment : Investment, savings : Savings):
-        self._investment = investment
+    '''
+    Transactions of a periodic contribution of an investor: the investments it bought (one per ticker, none if nothing was worth
+    buying) and the part that was saved.
+    '''
+    def __init__(self, investments : Investment | list[Investment], savings : Savings):
+        self._investments : list[Investment] = [investments] if isinstance(investments, Investment) else list(investments)
         self._savings = savings
-    
+
+    @property
+    def investment(self) -> Investment:
+        '''
+        Returns the first investment of the registry, None if there is none.
+        '''
+        return(self._investments[0] if self._investments else None)
+
+    @property
+    def investments(self) -> list[Investment]:
+        return(self._investments)
+
+    @property
+    def savings(self) -> Savings:
+        return(self._savings)
+
     @property
     def date(self) -> datetime:
-        return(self._investment.date)
+        return(self._savings.date)
+
+    @property
+    def amount_invested(self) -> float:
+        return(sum(investment.amount for investment in self._investments))
     
     @property
     def amount_saved(self) -> float:
@@ -20,17 +41,46 @@ class PeriodicRegistry():
 
     @property
     def total_contribution(self) -> float:
-        return(self._investment.amount + self._savings.amount)
+        return(self.amount_invested + self._savings.amount)
 
 
     def __str__(self) -> str:
-        pass
+        output = "Fecha: " + str(self.date) + ", "
+        output += "Invertido: " + str(self.amount_invested) + " (" + ", ".join(investment.ticker for investment in self._investments) + "), "
+        output += "Ahorrado: " + str(self._savings.amount) + ", "
+        output += "Comisión: " + str(sum(investment.fee for investment in self._investments))
+        return(output)
+
+    def save(self, journal, owner : str) -> None:
+        '''
+        Appends the investments and the savings of the registry to the journal 'journal' (TransactionJournal) as transactions of 'owner'.
+        '''
+        for investment in self._investments:
+            investment.save(journal, owner)
+        self._savings.save(journal, owner)
 
-    def save(self, dir:str) -> None:
-        os.makedirs(dir, exist_ok=True)
-        self._investment.save()
-        self._savings.save()
+    @classmethod
+    def from_records(cls, records) -> Iterator[tuple[str, Self]]:
+        '''
+        Groups every Savings with the Investments of the same owner that precede it (as PeriodicRegistry.save writes them) and yields
+        the resulting (owner, registry) pairs. Other transactions are skipped.
+        '''
+        investments : dict[str, list[Investment]] = {}
+        for owner, transaction in records:
+            if isinstance(transaction, Investment):
+                investments.setdefault(owner, []).append(transaction)
+            elif isinstance(transaction, Savings):
+                yield((owner, cls(investments.pop(owner, []), transaction)))
 
     @classmethod
-    def from_dir(cls, dir:str) -> Self:
-        pass
\ No newline at end of file
+    def from_dir(cls, dir:str, owner : str = None, start : datetime = None, end : datetime = None) -> Iterator[tuple[str, Self]]:
+        '''
+        Streams the (owner, registry) pairs recorded in the group directory 'dir' (JSON layout), optionally only the ones of 'owner'
+        between 'start' and 'end'. Only the records in the range are read.
+        '''
+        from ..Storage import JSONStorage #Imported here because the storages depend on this package.
+        storage = JSONStorage(dir)
+        try:
+            yield from cls.from_records(storage.transactions(owner, start, end, kinds=(Investment, Savings)))
+        finally:
+            storage.close()
\ No newline at end of file
@@ -0,0 +1,161 @@
+from .holdings_matrix import HoldingsMatrix
+from .transaction_table import TransactionTable
+from .investment import Investment
+from .savings import Savings
+from .sale import Sale
+from datetime import date, datetime, time
+import numpy as np
+
+
+class PositionSeries():
+    '''
+    State of the investors of a group at a series of dates, as it was at the end of each date:
+        - dates: The dates of the series, sorted.
+        - savings, debt, contribution: (dates x investors) Savings, debt and total contribution of every investor.
+        - quantities: (dates x investors x tickers) Stocks held by every investor.
+        - prices: (dates x tickers) Closing price of every ticker (the last one on or before the date). NaN if unknown.
+        - value: (dates x investors) Market value of the investments of every investor. NaN if a held ticker has no price.
+        - balance: (dates) Balance of the group.
+    '''
+    def __init__(self, dates : list, names : list[str], tickers : list[str], savings : np.ndarray, debt : np.ndarray, contribution : np.ndarray,
+                 quantities : np.ndarray, prices : np.ndarray, balance : np.ndarray):
+        self.dates = dates
+        self.names = names
+        self.tickers = tickers
+        self.savings = savings
+        self.debt = debt
+        self.contribution = contribution
+        self.quantities = quantities
+        self.prices = prices
+        self.value = np.where(quantities != 0, quantities * prices[:, np.newaxis, :], 0).sum(axis=2)
+        self.balance = balance
+
+    def statement(self, index : int) -> dict[str, dict]:
+        '''
+        Returns the state of every investor at the date 'index' of the series, keyed by name.
+        '''
+        statement = {}
+        for row, name in enumerate(self.names):
+            statement[name] = {
+                "Fecha": self.dates[index].isoformat(),
+                "Ahorros": float(self.savings[index, row]),
+                "Deuda": float(self.debt[index, row]),
+                "Contribución total": float(self.contribution[index, row]),
+                "Inversiones": {ticker : float(quantity) for ticker, quantity in zip(self.tickers, self.quantities[index, row]) if quantity != 0},
+                "Valor": float(self.value[index, row]),
+            }
+        return(statement)
+
+
+class PositionHistory():
+    '''
+    Point-in-time state of the investors of a group, computed from their current state and the recorded transactions.
+    Every transaction is added, in a single pass, to the first date of the series it belongs to. A cumulative sum over the dates then gives
+    the change of every investor up to each date, so the history is never scanned again for each date. The state at a date is the
+    state before any transaction (the current state minus all of them) plus the changes up to that date.
+    Transactions are applied as InvestmentGroup.apply does. The ones of investors that are no longer in the group are ignored.
+    '''
+    _INVESTMENT = TransactionTable._KINDS.index(Investment)
+    _SAVINGS = TransactionTable._KINDS.index(Savings)
+    _SALE = TransactionTable._KINDS.index(Sale)
+
+    def __init__(self, holdings : HoldingsMatrix, table : TransactionTable, balance : float, group_account : str):
+        self._holdings = holdings
+        self._table = table
+        self._balance = balance
+        self._group_account = group_account
+
+    def at(self, dates : list, price_store = None) -> PositionSeries:
+        '''
+        Returns the state at the end of every date of 'dates' (dates or datetimes). The market values use the closes of 'price_store'
+        (PriceStore); without it they are NaN.
+        '''
+        dates = sorted(dates)
+        holdings, table = self._holdings, self._table
+        tickers = list(holdings.tickers)
+        ticker_columns = dict(holdings.ticker_index)
+        for id in np.unique(table.column('tickers')):
+            if id >= 0 and table.strings[id] not in ticker_columns:
+                ticker_columns[table.strings[id]] = len(tickers)
+                tickers.append(table.strings[id])
+        n_dates, n_investors, n_tickers = len(dates), len(holdings.names), len(tickers)
+
+        kinds = table.column('kinds')
+        amounts = table.column('amounts')
+        is_investment = kinds == PositionHistory._INVESTMENT
+        is_savings = kinds == PositionHistory._SAVINGS
+        is_sale = kinds == PositionHistory._SALE
+        is_transfer = ~(is_investment | is_savings | is_sale)
+        is_withdrawal = is_transfer & (table.column('sources') == table.id(self._group_account))
+        is_payment = is_transfer & ~is_withdrawal
+
+        #Investor and ticker of every row as positions of the matrices (-1 if not in them).
+        investor_ids = np.where(is_withdrawal, table.column('destinations'), np.where(is_payment, table.column('sources'), table.column('owners')))
+        rows = self._positions(investor_ids, {name : row for row, name in enumerate(holdings.names)})
+        columns = self._positions(table.column('tickers'), ticker_columns)
+
+        #First date of the series whose state includes every transaction (n_dates if none).
+        keys = np.array([PositionHistory._epoch(day) for day in dates], dtype=np.int64)
+        buckets = np.searchsorted(keys, table.column('dates'), side='left')
+
+        contributed = np.where(is_investment | is_savings, amounts, 0)
+        deltas = {
+            'savings': np.where(is_savings, amounts, 0) + np.where(is_sale, amounts - table.column('fees'), 0) - np.where(is_withdrawal, amounts, 0),
+            'debt': contributed - np.where(is_payment, amounts, 0),
+            'contribution': contributed,
+        }
+        known = rows >= 0
+        series = {}
+        current = {'savings': holdings.savings, 'debt': holdings.debt, 'contribution': holdings.total_contribution}
+        for name, delta in deltas.items():
+            changes = np.zeros((n_dates + 1, n_investors))
+            np.add.at(changes, (buckets[known], rows[known]), delta[known])
+            series[name] = PositionHistory._accumulate(changes, current[name])
+
+        held = known & (is_investment | is_sale) & (columns >= 0)
+        traded = np.where(is_sale, -table.column('quantities'), table.column('quantities'))
+        changes = np.zeros((n_dates + 1, n_investors, n_tickers))
+        np.add.at(changes, (buckets[held], rows[held], columns[held]), traded[held])
+        current_quantities = np.zeros((n_investors, n_tickers))
+        current_quantities[:, :holdings.quantities.shape[1]] = holdings.quantities
+        quantities = PositionHistory._accumulate(changes, current_quantities)
+
+        changes = np.zeros(n_dates + 1)
+        np.add.at(changes, buckets, np.where(is_payment, amounts, 0) - contributed)
+        balance = PositionHistory._accumulate(changes, self._balance)
+
+        prices = np.full((n_dates, n_tickers), np.nan)
+        if price_store is not None:
+            for column, ticker in enumerate(tickers):
+                if ticker not in price_store:
+                    continue
+                for index, day in enumerate(dates):
+                    try:
+                        prices[index, column] = price_store.price_at(ticker, day)
+                    except KeyError:
+                        pass
+        return(PositionSeries(dates, list(holdings.names), tickers, series['savings'], series['debt'], series['contribution'], quantities, prices, balance))
+
+    @staticmethod
+    def _accumulate(changes : np.ndarray, current) -> np.ndarray:
+        '''
+        Turns the changes bucketed by date (the last bucket holds the ones after the last date) into the state at every date.
+        '''
+        cumulative = np.cumsum(changes, axis=0)
+        return(current - cumulative[-1] + cumulative[:-1])
+
+    def _positions(self, ids : np.ndarray, positions : dict[str, int]) -> np.ndarray:
+        '''
+        Maps the name ids of a column of the table to positions of 'positions' (-1 for names not in it).
+        '''
+        lookup = np.array([positions.get(string, -1) for string in self._table.strings] + [-1], dtype=np.int64)
+        return(lookup[ids]) #Empty ids (-1) take the last element.
+
+    @staticmethod
+    def _epoch(day) -> int:
+        '''
+        Returns the end of the day (or the moment, for datetimes) in the epoch microseconds of TransactionTable.
+        '''
+        if not isinstance(day, datetime):
+            day = datetime.combine(day, time.max)
+        return(TransactionTable._epoch(day))
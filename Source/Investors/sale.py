@@ -0,0 +1,57 @@
+from .transaction import Transaction
+from datetime import datetime
+from typing import Self
+
+class Sale(Transaction):
+    __slots__ = ('_ticker', '_sale_price', '_stock_quantity')
+    _FILENAME = '-sale.json'
+
+    def __init__(self, ticker : str, sale_price : float, quantity : float, date : datetime = None, fee : float = 0) -> None:
+        super().__init__(sale_price * quantity, date, fee)
+        self._ticker = ticker
+        self._sale_price = sale_price
+        self._stock_quantity = quantity
+
+    @property
+    def ticker(self) -> str:
+        return(self._ticker)
+
+    @property
+    def sale_price(self) -> float:
+        return(self._sale_price)
+
+    @property
+    def stock_quantity(self) -> float:
+        return(self._stock_quantity)
+
+    @property
+    def proceeds(self) -> float:
+        '''
+        Money obtained from the sale once the fee is paid. It goes to the savings of the investor.
+        '''
+        return(self.amount - self.fee)
+
+    def __str__(self) -> str:
+        output = "Fecha venta: " + str(self.date) + ", "
+        output += "Valor: " + str(self._ticker) + ", "
+        output += "Precio de venta: " + str(self._sale_price) + ", "
+        output += "Nº de acciones: " + str(self._stock_quantity) + ", "
+        output += "Comisión: " + str(self._fee)
+
+        return(output)
+
+    @classmethod
+    def from_dict(cls, data : dict) -> Self:
+        sale = cls(data["Valor"], data["Precio de venta"], data["Nº de acciones"], cls._parse_date(data["Fecha"]), data["Comisión"])
+        return(sale)
+
+    def to_dict(self) -> dict:
+        data = super().to_dict()
+        data["Valor"] = self._ticker
+        data["Precio de venta"] = self._sale_price
+        data["Nº de acciones"] = self._stock_quantity
+        return(data)
+
+    def filename(self) -> str:
+        f = str(self.date) + Sale._FILENAME
+        return(f)
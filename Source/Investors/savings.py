@@ -1,12 +1,12 @@
 from .transaction import Transaction
 from typing import Self
 import datetime
-import json
 
 class Savings(Transaction):
+    __slots__ = ()
     _FILENAME = '-savings.json'
 
-    def __init__(self, amount:float, date:datetime=datetime.datetime.now()) -> None:
+    def __init__(self, amount:float, date:datetime=None) -> None:
         super().__init__(amount, date, 0)
     
     def __str__(self) -> str:
@@ -18,7 +18,7 @@ class Savings(Transaction):
 
     @classmethod
     def from_dict(cls, data:dict) -> Self:
-        savings = cls(data["Cantidad"], data["Fecha"], data["Comisión"])
+        savings = cls(data["Cantidad"], cls._parse_date(data["Fecha"]))
         return(savings)
     
     def to_dict(self) -> dict:
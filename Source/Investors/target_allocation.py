@@ -0,0 +1,140 @@
+from .holdings_matrix import HoldingsMatrix
+from typing import NamedTuple
+import numpy as np
+
+
+class Allocation(NamedTuple):
+    '''
+    Outcome of an allocation, with one row per investor and one column per ticker of 'tickers':
+        - quantities: (investors x tickers) Stocks to buy.
+        - invested: (investors) Money spent on them.
+        - leftover: (investors) Part of the budget that wasn't spent (orders too small or whole shares that didn't fit).
+    '''
+    tickers : list[str]
+    quantities : np.ndarray
+    invested : np.ndarray
+    leftover : np.ndarray
+
+
+class TargetAllocator():
+    '''
+    Splits the money every investor invests across several tickers, moving their holdings toward target weights.
+    The target of every ticker is its weight times the value the investor will hold (current value of the weighted tickers plus the
+    budget). Every investor gets the purchases closest (least squares) to their targets that spend the budget, without selling: the
+    projection of the gaps to the targets onto the budget, solved for all the investors at once with a sort per row.
+    Orders below 'minimum_order', or whose 'fee' is more than 'max_fee_ratio' of their value, are dropped and their money is spread
+    over the other tickers. With 'whole_shares', the purchases are rounded down to whole stocks and the money left buys single stocks
+    of the tickers furthest below their target while it is enough, one round per ticker at most.
+    Fees are not taken from the budget, as in Investor.add_investment: they only decide which orders are worth placing.
+    '''
+    def __init__(self, tickers : list[str], minimum_order : float = 0, fee : float = 0, max_fee_ratio : float = None, whole_shares : bool = True):
+        self._tickers : list[str] = list(tickers)
+        self._whole_shares : bool = whole_shares
+        self._threshold : float = max(minimum_order, fee / max_fee_ratio if max_fee_ratio else 0)
+
+    @property
+    def tickers(self) -> list[str]:
+        return(self._tickers)
+
+    @property
+    def threshold(self) -> float:
+        '''
+        Returns the smallest order placed.
+        '''
+        return(self._threshold)
+
+    def weight_matrix(self, weights : list[dict[str, float]]) -> np.ndarray:
+        '''
+        Builds the (investors x tickers) matrix of target weights from one {ticker : weight} dictionary per investor.
+        '''
+        matrix = np.zeros((len(weights), len(self._tickers)))
+        columns = {ticker : column for column, ticker in enumerate(self._tickers)}
+        for row, investor_weights in enumerate(weights):
+            for ticker, weight in investor_weights.items():
+                matrix[row, columns[ticker]] = weight
+        return(matrix)
+
+    def allocate_holdings(self, holdings : HoldingsMatrix, budgets : np.ndarray, weights : list[dict[str, float]], current_prices : dict[str, float]) -> Allocation:
+        '''
+        Allocates the budgets of the investors of a HoldingsMatrix (one per row) with one {ticker : weight} dictionary per investor.
+        '''
+        prices = np.array([current_prices[ticker] for ticker in self._tickers], dtype=float)
+        values = np.zeros((len(holdings.names), len(self._tickers)))
+        for column, ticker in enumerate(self._tickers):
+            if ticker in holdings.ticker_index:
+                values[:, column] = holdings.quantities[:, holdings.ticker_index[ticker]] * prices[column]
+        return(self.allocate(values, budgets, self.weight_matrix(weights), prices))
+
+    def allocate(self, values : np.ndarray, budgets : np.ndarray, weights : np.ndarray, prices : np.ndarray) -> Allocation:
+        '''
+        Args:
+            values (np.ndarray): _description_ (investors x tickers) Current value of the stocks of every ticker held by every investor.
+            budgets (np.ndarray): _description_ (investors) Money every investor invests.
+            weights (np.ndarray): _description_ (investors x tickers) Target weights. Every row adds up to 1.
+            prices (np.ndarray): _description_ (tickers) Current price of every ticker.
+        '''
+        budgets = np.maximum(np.asarray(budgets, dtype=float), 0)
+        targets = weights * ((values * (weights > 0)).sum(axis=1) + budgets)[:, np.newaxis]
+        gaps = targets - values
+        active = (weights > 0) & (prices > 0)
+
+        #Drops, one per investor and round, the smallest order under the threshold until every order is worth placing.
+        for _ in range(len(self._tickers) + 1):
+            amounts = TargetAllocator._project(gaps, budgets, active)
+            small = active & (amounts < self._threshold)
+            small_amounts = np.where(small & (amounts > 0), amounts, np.inf)
+            drop = small & ~(amounts > 0)
+            rows = np.flatnonzero(np.isfinite(small_amounts).any(axis=1))
+            drop[rows, np.argmin(small_amounts[rows], axis=1)] = True
+            if not drop.any():
+                break
+            active &= ~drop
+
+        safe_prices = np.where(prices > 0, prices, 1)
+        if not self._whole_shares:
+            quantities = np.where(active, amounts / safe_prices, 0)
+        else:
+            quantities = TargetAllocator._whole(amounts, budgets, safe_prices, active, self._threshold)
+        invested = quantities @ np.where(prices > 0, prices, 0)
+        return(Allocation(self._tickers, quantities, invested, budgets - invested))
+
+    @staticmethod
+    def _project(gaps : np.ndarray, budgets : np.ndarray, active : np.ndarray) -> np.ndarray:
+        '''
+        Returns, for every row, the non-negative amounts of the active columns that add up to the budget and are closest to the gaps:
+        max(gap - level, 0), with the level of every row found from its sorted gaps.
+        '''
+        n_columns = gaps.shape[1]
+        masked = np.where(active, gaps, -np.inf)
+        ordered = -np.sort(-masked, axis=1)
+        finite = np.isfinite(ordered)
+        sums = np.cumsum(np.where(finite, ordered, 0), axis=1)
+        counts = np.arange(1, n_columns + 1)
+        fits = finite & (ordered - (sums - budgets[:, np.newaxis]) / counts > 0)
+        sizes = fits.sum(axis=1)
+
+        rows = np.arange(len(gaps))
+        levels = np.where(sizes > 0, (sums[rows, np.maximum(sizes - 1, 0)] - budgets) / np.maximum(sizes, 1), np.inf)
+        amounts = np.maximum(masked - levels[:, np.newaxis], 0)
+        return(np.where(active & (budgets[:, np.newaxis] > 0), amounts, 0))
+
+    @staticmethod
+    def _whole(amounts : np.ndarray, budgets : np.ndarray, prices : np.ndarray, active : np.ndarray, threshold : float) -> np.ndarray:
+        '''
+        Rounds the amounts down to whole stocks, drops the orders left under the threshold and spends what remains on single stocks
+        of the tickers with the largest gap to their amount. A ticker can only take one of those stocks, since its gap is then negative.
+        '''
+        shares = np.where(active, np.floor(amounts / prices + 1e-9), 0)
+        shares[shares * prices < threshold] = 0
+        leftover = budgets - shares @ prices
+        remaining = np.where(active, amounts - shares * prices, 0)
+        for _ in range(amounts.shape[1]):
+            candidates = active & (remaining > 0) & (prices <= leftover[:, np.newaxis]) & ((shares > 0) | (prices >= threshold))
+            rows = np.flatnonzero(candidates.any(axis=1))
+            if len(rows) == 0:
+                break
+            columns = np.argmax(np.where(candidates[rows], remaining[rows], -np.inf), axis=1)
+            shares[rows, columns] += 1
+            leftover[rows] -= prices[columns]
+            remaining[rows, columns] -= prices[columns]
+        return(shares)
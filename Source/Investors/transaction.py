@@ -1,13 +1,14 @@
 from abc import ABC, abstractmethod
 from typing import Self
-import json
 import datetime
 
 
 class Transaction(ABC):
-    def __init__(self, amount : float, date : datetime = datetime.datetime.now(), fee : float = 0) -> None:
+    __slots__ = ('_amount', '_date', '_fee')
+
+    def __init__(self, amount : float, date : datetime = None, fee : float = 0) -> None:
         self._amount = amount
-        self._date = date
+        self._date = datetime.datetime.now() if date is None else date
         self._fee = fee
     
     @property
@@ -24,9 +25,9 @@ class Transaction(ABC):
     
     def to_dict(self) -> dict:
         data = {
-            "amount" : self.amount,
-            "date" : self.date,
-            "fee" : self.fee
+            "Cantidad" : self.amount,
+            "Fecha" : self.date.isoformat(),
+            "Comisión" : self.fee
         }
         return(data)
     
@@ -34,10 +35,15 @@ class Transaction(ABC):
     def __str__(self) -> str:
         pass
 
-    def save(self) -> None:
-        '''Saves the transaction in a file in the current dir.'''
-        with open(self.filename(), 'a') as file:
-            file.write(json.dump(self.to_dict()) + "\n")
+    def save(self, journal, owner : str = None) -> None:
+        '''Appends the transaction to the journal 'journal' (TransactionJournal). 'owner' is the name of the investor it belongs to, if any.'''
+        journal.append(self, owner)
+
+    @staticmethod
+    def _parse_date(date) -> datetime:
+        if isinstance(date, str):
+            return(datetime.datetime.fromisoformat(date))
+        return(date)
 
     @classmethod
     @abstractmethod
@@ -0,0 +1,103 @@
+from .transaction import Transaction
+from .transfer import Transfer
+from .transaction_journal import TransactionJournal
+from datetime import datetime
+from typing import Iterator
+import json
+import math
+import mmap
+
+
+class TransactionHistory():
+    '''
+    Lazy reader of the transactions of a TransactionJournal.
+    Date ranges are located through the index of the journal (binary searched when the journal is in date order), so the log is read
+    from the first record of the range onwards instead of from the beginning. Records are parsed and yielded one at a time, so the
+    memory used doesn't depend on the length of the history.
+    '''
+    _ENTRY_FIELDS = 2
+
+    def __init__(self, journal : TransactionJournal):
+        self._journal = journal
+
+    def read(self, owner : str = None, start : datetime = None, end : datetime = None, kinds : tuple[type] = None,
+             ticker : str = None, counterparty : str = None) -> Iterator[tuple[str, Transaction]]:
+        '''
+        Yields the (owner, transaction) pairs that match all the given filters:
+            - owner: Transactions of the investor, including the transfers from or to them.
+            - start, end: Date range, 'start' included and 'end' excluded.
+            - kinds: Types of transaction (Investment, Savings, Transfer, Sale).
+            - ticker: Investments and sales of that ticker.
+            - counterparty: Transfers from or to that name.
+        '''
+        journal = self._journal
+        journal.flush()
+        if len(journal) == 0:
+            return
+
+        with open(journal.index_filename, 'rb') as index_file, open(journal.log_filename, 'rb') as log:
+            index = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+            entries = memoryview(index).cast('q')
+            try:
+                if journal.sorted:
+                    first = 0 if start is None else self._bisect(entries, math.floor(start.timestamp()))
+                    last = len(journal) if end is None else self._bisect(entries, math.ceil(end.timestamp()))
+                    if first < last:
+                        log.seek(entries[first * TransactionHistory._ENTRY_FIELDS + 1])
+                    for position in range(first, last):
+                        record = TransactionHistory._match(log.readline(), owner, start, end, kinds, ticker, counterparty)
+                        if record is not None:
+                            yield(record)
+                else:
+                    for position in range(len(journal)):
+                        if not TransactionHistory._in_range(entries[position * TransactionHistory._ENTRY_FIELDS], start, end):
+                            continue
+                        log.seek(entries[position * TransactionHistory._ENTRY_FIELDS + 1])
+                        record = TransactionHistory._match(log.readline(), owner, start, end, kinds, ticker, counterparty)
+                        if record is not None:
+                            yield(record)
+            finally:
+                entries.release()
+                index.close()
+
+    def _bisect(self, entries : memoryview, key : int) -> int:
+        '''
+        Returns the position of the first record whose date (epoch seconds) is not earlier than 'key'.
+        '''
+        low, high = 0, len(self._journal)
+        while low < high:
+            middle = (low + high) // 2
+            if entries[middle * TransactionHistory._ENTRY_FIELDS] < key:
+                low = middle + 1
+            else:
+                high = middle
+        return(low)
+
+    @staticmethod
+    def _in_range(date : int, start : datetime, end : datetime) -> bool:
+        if start is not None and date < math.floor(start.timestamp()):
+            return(False)
+        if end is not None and date >= math.ceil(end.timestamp()):
+            return(False)
+        return(True)
+
+    @staticmethod
+    def _match(line : bytes, owner : str, start : datetime, end : datetime, kinds : tuple[type], ticker : str, counterparty : str) -> tuple[str, Transaction]:
+        '''
+        Parses a line of the log and returns its (owner, transaction) if it matches the filters, None otherwise.
+        '''
+        record_owner, transaction = TransactionJournal.from_record(json.loads(line))
+        if start is not None and transaction.date < start:
+            return(None)
+        if end is not None and transaction.date >= end:
+            return(None)
+        if kinds is not None and not isinstance(transaction, tuple(kinds)):
+            return(None)
+        if ticker is not None and getattr(transaction, 'ticker', None) != ticker:
+            return(None)
+        is_transfer = isinstance(transaction, Transfer)
+        if counterparty is not None and not (is_transfer and counterparty in (transaction.source, transaction.destination)):
+            return(None)
+        if owner is not None and owner != record_owner and not (is_transfer and owner in (transaction.source, transaction.destination)):
+            return(None)
+        return((record_owner, transaction))
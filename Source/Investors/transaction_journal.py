@@ -0,0 +1,326 @@
+from .transaction import Transaction
+from .investment import Investment
+from .savings import Savings
+from .transfer import Transfer
+from .sale import Sale
+from ..Instrumentation import timed, count
+from array import array
+from contextlib import contextmanager
+from enum import Enum, auto
+from typing import Iterator
+import json
+import math
+import os
+
+
+class FsyncPolicy(Enum):
+    '''
+    When the journal forces its writes to reach the disk.
+        - NEVER: The operating system decides. Fastest, but the last writes can be lost on a power failure.
+        - ON_FLUSH: Once every time the buffer is written.
+        - ALWAYS: After every appended transaction. Each append is written straight away, without buffering.
+    '''
+    NEVER = auto()
+    ON_FLUSH = auto()
+    ALWAYS = auto()
+
+
+class TransactionJournal():
+    '''
+    Append-only log with all the transactions of a group.
+    Every transaction is stored as a line of JSON with its type ('Tipo') and the investor it belongs to ('Titular').
+    Appended transactions are buffered and written together in a single write once 'buffer_size' of them are pending
+    or when the journal is flushed.
+    A sidecar index file keeps, for every record, its date (epoch seconds) and its byte offset in the log as two 64-bit
+    integers, so any record can be reached with a single seek.
+    While the transactions are appended in date order the index is sorted by date and can be binary searched. Appending an older
+    transaction leaves a marker file next to the journal so readers know they have to scan the index instead.
+    '''
+    _LOG_EXTENSION = '.jsonl'
+    _INDEX_EXTENSION = '.idx'
+    _UNSORTED_EXTENSION = '.unsorted'
+    _DEFAULT_BUFFER_SIZE = 256
+    _TAIL_BLOCK_SIZE = 4096
+    _ENTRY_SIZE = 2 * array('q').itemsize
+    _TYPES : dict[str, type] = {
+        Investment.__name__ : Investment,
+        Savings.__name__ : Savings,
+        Transfer.__name__ : Transfer,
+        Sale.__name__ : Sale,
+    }
+
+    def __init__(self, filename : str, fsync : FsyncPolicy = FsyncPolicy.ON_FLUSH, buffer_size : int = _DEFAULT_BUFFER_SIZE):
+        '''
+        Args:
+            filename (str): _description_ Path of the journal without extension. The log and the index are stored next to each other.
+            fsync (FsyncPolicy, optional): _description_ When to force the writes to the disk. Defaults to ON_FLUSH.
+            buffer_size (int, optional): _description_ Number of pending transactions that triggers a write. Defaults to 256.
+        '''
+        self._filename : str = filename
+        self._fsync : FsyncPolicy = fsync
+        self._buffer_size : int = 1 if fsync == FsyncPolicy.ALWAYS else max(1, buffer_size)
+        self._buffer : list[bytes] = []
+        self._buffer_dates : list[int] = []
+        self._log = None
+        self._index = None
+        self._size : int = 0
+        self._records : int = 0
+        self._last_date : int = None
+        self._sorted : bool = not os.path.isfile(self._filename + TransactionJournal._UNSORTED_EXTENSION)
+
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._check_index()
+
+    @property
+    def log_filename(self) -> str:
+        return(self._filename + TransactionJournal._LOG_EXTENSION)
+
+    @property
+    def index_filename(self) -> str:
+        return(self._filename + TransactionJournal._INDEX_EXTENSION)
+
+    @property
+    def sorted(self) -> bool:
+        '''
+        Whether the records (and so the index) are in date order.
+        '''
+        return(self._sorted)
+
+    @property
+    def fsync(self) -> FsyncPolicy:
+        return(self._fsync)
+
+    def __len__(self) -> int:
+        return(self._records + len(self._buffer))
+
+    def __enter__(self):
+        return(self)
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    @staticmethod
+    def to_record(transaction : Transaction, owner : str = None) -> dict:
+        record = transaction.to_dict()
+        record["Tipo"] = type(transaction).__name__
+        record["Titular"] = owner
+        return(record)
+
+    @staticmethod
+    def from_record(record : dict) -> tuple[str, Transaction]:
+        '''
+        Returns the owner and the transaction stored in a record of the journal.
+        '''
+        transaction = TransactionJournal._TYPES[record["Tipo"]].from_dict(record)
+        return(record["Titular"], transaction)
+
+    def append(self, transaction : Transaction, owner : str = None) -> None:
+        '''
+        Adds a transaction to the journal. It is written once the buffer is full or the journal is flushed.
+        '''
+        line = json.dumps(TransactionJournal.to_record(transaction, owner), ensure_ascii=False) + "\n"
+        date = int(transaction.date.timestamp())
+        if self._last_date is not None and date < self._last_date and self._sorted:
+            self._set_sorted(False)
+        self._last_date = date if self._last_date is None else max(self._last_date, date)
+        self._buffer.append(line.encode('utf-8'))
+        self._buffer_dates.append(date)
+        if len(self._buffer) >= self._buffer_size:
+            self.flush()
+
+    def append_all(self, transactions : list[tuple[str, Transaction]]) -> None:
+        '''
+        Adds several (owner, transaction) pairs to the journal.
+        '''
+        for owner, transaction in transactions:
+            self.append(transaction, owner)
+
+    @contextmanager
+    def held(self):
+        '''
+        Keeps all the transactions appended inside the block in the buffer, however many they are, until the journal is flushed.
+        Raises a ValueError with the ALWAYS fsync policy, which has to write every transaction straight away.
+        '''
+        if self._fsync == FsyncPolicy.ALWAYS:
+            raise ValueError("A journal that writes every transaction straight away can't hold them.")
+        buffer_size = self._buffer_size
+        self._buffer_size = math.inf
+        try:
+            yield self
+        finally:
+            self._buffer_size = buffer_size
+
+    def discard(self) -> None:
+        '''
+        Drops the transactions that haven't been written yet.
+        '''
+        count('journal.records_discarded', len(self._buffer))
+        self._buffer.clear()
+        self._buffer_dates.clear()
+
+    @timed()
+    def flush(self) -> None:
+        '''
+        Writes all the pending transactions to the log and their entries to the index, with one write for each file.
+        '''
+        if not self._buffer:
+            return
+        self._open()
+
+        entries = array('q')
+        offset = self._size
+        for line, date in zip(self._buffer, self._buffer_dates):
+            entries.append(date)
+            entries.append(offset)
+            offset += len(line)
+
+        self._log.write(b''.join(self._buffer))
+        self._log.flush()
+        self._index.write(entries.tobytes())
+        self._index.flush()
+        if self._fsync != FsyncPolicy.NEVER:
+            os.fsync(self._log.fileno())
+            os.fsync(self._index.fileno())
+
+        count('journal.records_written', len(self._buffer))
+        count('journal.bytes_written', offset - self._size)
+        self._size = offset
+        self._records += len(self._buffer)
+        self._buffer.clear()
+        self._buffer_dates.clear()
+
+    def close(self) -> None:
+        self.flush()
+        for file in (self._log, self._index):
+            if file is not None:
+                file.close()
+        self._log = None
+        self._index = None
+
+    def offsets(self) -> array:
+        '''
+        Returns the index of the journal as a flat array of (date, offset) pairs. Pending transactions are not included.
+        '''
+        entries = array('q')
+        if os.path.isfile(self.index_filename):
+            with open(self.index_filename, 'rb') as file:
+                entries.frombytes(file.read())
+        return(entries)
+
+    def read(self, position : int) -> tuple[str, Transaction]:
+        '''
+        Returns the owner and the transaction stored in the record number 'position'.
+        '''
+        self.flush()
+        date, offset = self._entry(position)
+        with open(self.log_filename, 'rb') as file:
+            file.seek(offset)
+            return(TransactionJournal.from_record(json.loads(file.readline())))
+
+    def replay(self, start : int = 0) -> Iterator[tuple[str, Transaction]]:
+        '''
+        Yields the (owner, transaction) pairs of the journal in the order they were appended, starting at the record number 'start'.
+        '''
+        self.flush()
+        if not os.path.isfile(self.log_filename):
+            return
+        with open(self.log_filename, 'rb') as file:
+            if start > 0:
+                if start >= self._records:
+                    return
+                date, offset = self._entry(start)
+                file.seek(offset)
+            for line in file:
+                yield(TransactionJournal.from_record(json.loads(line)))
+
+    def _entry(self, position : int) -> tuple[int, int]:
+        '''
+        Returns the (date, offset) entry of the index for the record number 'position'.
+        '''
+        if not 0 <= position < self._records:
+            raise IndexError(position)
+        with open(self.index_filename, 'rb') as file:
+            file.seek(position * TransactionJournal._ENTRY_SIZE)
+            entry = array('q')
+            entry.frombytes(file.read(TransactionJournal._ENTRY_SIZE))
+        return(entry[0], entry[1])
+
+    def _set_sorted(self, sorted : bool) -> None:
+        marker = self._filename + TransactionJournal._UNSORTED_EXTENSION
+        if sorted and os.path.isfile(marker):
+            os.remove(marker)
+        elif not sorted:
+            open(marker, 'w').close()
+        self._sorted = sorted
+
+    def _open(self) -> None:
+        if self._log is None:
+            self._log = open(self.log_filename, 'ab')
+            self._index = open(self.index_filename, 'ab')
+
+    def _check_index(self) -> None:
+        '''
+        Makes sure the index covers exactly the log (a crash between both writes can leave it behind) and rebuilds it otherwise.
+        A record left half-written at the end of the log by a crash is dropped first.
+        '''
+        if not os.path.isfile(self.log_filename):
+            for filename in (self.log_filename, self.index_filename):
+                if os.path.isfile(filename):
+                    os.remove(filename)
+            self._set_sorted(True)
+            return
+
+        self._size = self._drop_torn_tail()
+        entry_size = TransactionJournal._ENTRY_SIZE
+        index_size = os.path.getsize(self.index_filename) if os.path.isfile(self.index_filename) else 0
+        if index_size > 0 and index_size % entry_size == 0:
+            with open(self.index_filename, 'rb') as file:
+                file.seek(index_size - entry_size)
+                entry = array('q')
+                entry.frombytes(file.read(entry_size))
+            with open(self.log_filename, 'rb') as file:
+                file.seek(entry[1])
+                if entry[1] + len(file.readline()) == self._size:
+                    self._records = index_size // entry_size
+                    self._last_date = entry[0] if self._sorted else max(self.offsets()[0::2])
+                    return
+        elif index_size == 0 and self._size == 0:
+            return
+
+        self._rebuild_index()
+
+    def _drop_torn_tail(self) -> int:
+        '''
+        Truncates the log after its last complete record (the last one ending in a newline) and returns its size.
+        '''
+        with open(self.log_filename, 'rb+') as file:
+            end = size = file.seek(0, os.SEEK_END)
+            while end > 0:
+                start = max(0, end - TransactionJournal._TAIL_BLOCK_SIZE)
+                file.seek(start)
+                newline = file.read(end - start).rfind(b'\n')
+                if newline >= 0:
+                    break
+                end = start
+            complete = start + newline + 1 if end > 0 else 0
+            if complete < size:
+                file.truncate(complete)
+        return(complete)
+
+    def _rebuild_index(self) -> None:
+        entries = array('q')
+        offset = 0
+        with open(self.log_filename, 'rb') as file:
+            for line in file:
+                owner, transaction = TransactionJournal.from_record(json.loads(line))
+                entries.append(int(transaction.date.timestamp()))
+                entries.append(offset)
+                offset += len(line)
+        with open(self.index_filename, 'wb') as file:
+            file.write(entries.tobytes())
+        self._records = len(entries) // 2
+        dates = entries[0::2]
+        self._last_date = max(dates) if dates else None
+        self._set_sorted(all(a <= b for a, b in zip(dates, dates[1:])))
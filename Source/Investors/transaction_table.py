@@ -0,0 +1,198 @@
+from .transaction import Transaction
+from .investment import Investment
+from .savings import Savings
+from .transfer import Transfer
+from .sale import Sale
+from array import array
+from datetime import datetime, timedelta
+from typing import Iterator, Self
+import numpy as np
+
+
+class TransactionTable():
+    '''
+    Compact, columnar storage for a long transaction history.
+    Every transaction is a row spread over typed arrays (amount, fee, price, quantity, date as epoch microseconds...) and the
+    names of investors and tickers are interned as integer ids, so a row takes a few dozen bytes instead of a whole object.
+    Transaction objects are only created when a row is accessed, and filters are array scans that return row indices.
+    '''
+    _KINDS : list[type] = [Investment, Savings, Transfer, Sale]
+    _NO_ID = -1
+    _MICROSECONDS = 10 ** 6
+    _COLUMNS = {
+        'kinds': np.int8, 'dates': np.int64, 'amounts': np.float64, 'fees': np.float64, 'prices': np.float64,
+        'quantities': np.float64, 'owners': np.int32, 'tickers': np.int32, 'sources': np.int32, 'destinations': np.int32,
+    }
+
+    def __init__(self):
+        self._kinds = array('b')
+        self._dates = array('q')
+        self._amounts = array('d')
+        self._fees = array('d')
+        self._prices = array('d')
+        self._quantities = array('d')
+        self._owners = array('i')
+        self._tickers = array('i')
+        self._sources = array('i')
+        self._destinations = array('i')
+        self._strings : list[str] = []
+        self._ids : dict[str, int] = {}
+
+    @classmethod
+    def from_records(cls, records) -> Self:
+        '''
+        Builds a table from (owner, transaction) pairs, like the ones yielded by StorageEngine.transactions.
+        '''
+        table = cls()
+        table.extend(records)
+        return(table)
+
+    def __len__(self) -> int:
+        return(len(self._kinds))
+
+    def __getitem__(self, row : int) -> tuple[str, Transaction]:
+        '''
+        Returns the (owner, transaction) of the row, creating the Transaction object.
+        '''
+        if row < 0:
+            row += len(self)
+        kind = TransactionTable._KINDS[self._kinds[row]]
+        date = self._datetime(self._dates[row])
+        if kind is Investment:
+            transaction = Investment(self._string(self._tickers[row]), self._prices[row], self._quantities[row], date, self._fees[row])
+        elif kind is Savings:
+            transaction = Savings(self._amounts[row], date)
+        elif kind is Sale:
+            transaction = Sale(self._string(self._tickers[row]), self._prices[row], self._quantities[row], date, self._fees[row])
+        else:
+            transaction = Transfer(self._amounts[row], self._string(self._sources[row]), self._string(self._destinations[row]), date, self._fees[row])
+        return((self._string(self._owners[row]), transaction))
+
+    def __iter__(self) -> Iterator[tuple[str, Transaction]]:
+        return(self.rows(range(len(self))))
+
+    def rows(self, indices) -> Iterator[tuple[str, Transaction]]:
+        '''
+        Yields the (owner, transaction) of every row in 'indices', creating the objects one at a time.
+        '''
+        for row in indices:
+            yield(self[int(row)])
+
+    @property
+    def nbytes(self) -> int:
+        '''
+        Returns the memory taken by the columns.
+        '''
+        columns = (self._kinds, self._dates, self._amounts, self._fees, self._prices, self._quantities,
+                   self._owners, self._tickers, self._sources, self._destinations)
+        return(sum(column.itemsize * len(column) for column in columns))
+
+    def append(self, transaction : Transaction, owner : str = None) -> None:
+        self._kinds.append(TransactionTable._KINDS.index(type(transaction)))
+        self._dates.append(self._epoch(transaction.date))
+        self._amounts.append(transaction.amount)
+        self._fees.append(transaction.fee)
+        self._owners.append(self._intern(owner))
+        if isinstance(transaction, Investment):
+            self._prices.append(transaction.purchase_price)
+            self._quantities.append(transaction.stock_quantity)
+            self._tickers.append(self._intern(transaction.ticker))
+        elif isinstance(transaction, Sale):
+            self._prices.append(transaction.sale_price)
+            self._quantities.append(transaction.stock_quantity)
+            self._tickers.append(self._intern(transaction.ticker))
+        else:
+            self._prices.append(0)
+            self._quantities.append(0)
+            self._tickers.append(TransactionTable._NO_ID)
+        if isinstance(transaction, Transfer):
+            self._sources.append(self._intern(transaction.source))
+            self._destinations.append(self._intern(transaction.destination))
+        else:
+            self._sources.append(TransactionTable._NO_ID)
+            self._destinations.append(TransactionTable._NO_ID)
+
+    def extend(self, records) -> None:
+        for owner, transaction in records:
+            self.append(transaction, owner)
+
+    def select(self, owner : str = None, start : datetime = None, end : datetime = None, kind : type = None, ticker : str = None, counterparty : str = None) -> np.ndarray:
+        '''
+        Returns the indices of the rows that match all the given filters:
+            - owner: Transactions of the investor, including the transfers from or to them.
+            - start, end: Date range, 'start' included and 'end' excluded.
+            - kind: Investment, Savings, Transfer or Sale.
+            - ticker: Investments and sales of that ticker.
+            - counterparty: Transfers from or to that name.
+        '''
+        mask = np.ones(len(self), dtype=bool)
+        if start is not None:
+            mask &= np.frombuffer(self._dates, dtype=np.int64) >= self._epoch(start)
+        if end is not None:
+            mask &= np.frombuffer(self._dates, dtype=np.int64) < self._epoch(end)
+        if kind is not None:
+            mask &= np.frombuffer(self._kinds, dtype=np.int8) == TransactionTable._KINDS.index(kind)
+        if ticker is not None:
+            mask &= np.frombuffer(self._tickers, dtype=np.int32) == self._ids.get(ticker, TransactionTable._NO_ID - 1)
+        if owner is not None:
+            mask &= self._involves(owner, np.frombuffer(self._owners, dtype=np.int32))
+        if counterparty is not None:
+            mask &= self._involves(counterparty)
+        return(np.flatnonzero(mask))
+
+    @property
+    def strings(self) -> list[str]:
+        '''
+        Returns the interned names (investors, tickers...), indexed by their id.
+        '''
+        return(self._strings)
+
+    def id(self, string : str) -> int:
+        '''
+        Returns the id of an interned name, or a negative number that matches no row if it isn't in the table.
+        '''
+        return(self._ids.get(string, TransactionTable._NO_ID - 1))
+
+    def column(self, name : str) -> np.ndarray:
+        '''
+        Returns a column as a NumPy view: 'kinds' (positions in _KINDS), 'dates' (epoch microseconds), 'amounts', 'fees', 'prices',
+        'quantities', and the name ids 'owners', 'tickers', 'sources' and 'destinations' (-1 when empty, see 'strings').
+        The view must not be kept while rows are appended.
+        '''
+        return(np.frombuffer(getattr(self, '_' + name), dtype=TransactionTable._COLUMNS[name]))
+
+    def amounts(self, indices : np.ndarray = None) -> np.ndarray:
+        '''
+        Returns the amounts of the rows in 'indices' (all of them by default).
+        '''
+        amounts = np.frombuffer(self._amounts, dtype=np.float64)
+        return(amounts.copy() if indices is None else amounts[indices])
+
+    def _involves(self, name : str, owners : np.ndarray = None) -> np.ndarray:
+        id = self._ids.get(name, TransactionTable._NO_ID - 1)
+        mask = (np.frombuffer(self._sources, dtype=np.int32) == id) | (np.frombuffer(self._destinations, dtype=np.int32) == id)
+        if owners is not None:
+            mask |= owners == id
+        return(mask)
+
+    def _intern(self, string : str) -> int:
+        if string is None:
+            return(TransactionTable._NO_ID)
+        id = self._ids.get(string)
+        if id is None:
+            id = len(self._strings)
+            self._ids[string] = id
+            self._strings.append(string)
+        return(id)
+
+    def _string(self, id : int) -> str:
+        return(None if id == TransactionTable._NO_ID else self._strings[id])
+
+    @staticmethod
+    def _epoch(date : datetime) -> int:
+        return(round(date.timestamp() * TransactionTable._MICROSECONDS))
+
+    @staticmethod
+    def _datetime(epoch : int) -> datetime:
+        seconds, microseconds = divmod(epoch, TransactionTable._MICROSECONDS)
+        return(datetime.fromtimestamp(seconds) + timedelta(microseconds=microseconds))
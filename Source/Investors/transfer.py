@@ -1,10 +1,11 @@
 from .transaction import Transaction
 from typing import Self
 import datetime
-import json
 
 class Transfer(Transaction):
-    def __init__(self, amount:float, source:str, destination:str, date:datetime=datetime.datetime.now(), fee:float=0) -> None:
+    __slots__ = ('_source', '_destination')
+
+    def __init__(self, amount:float, source:str, destination:str, date:datetime=None, fee:float=0) -> None:
         super().__init__(amount, date, fee)
         self._source = source
         self._destination = destination
@@ -28,7 +29,7 @@ class Transfer(Transaction):
 
     @classmethod
     def from_dict(cls, data:dict) -> Self:
-        transfer = cls(data["Cantidad"], data["Origen"], data["Destino"], data["Fecha"], data["Comisión"])
+        transfer = cls(data["Cantidad"], data["Origen"], data["Destino"], cls._parse_date(data["Fecha"]), data["Comisión"])
         return(transfer)
     
     def to_dict(self) -> dict:
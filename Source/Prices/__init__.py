@@ -0,0 +1,27 @@
+# Prices package initialization
+from .price_provider import PriceProvider
+from .yahoo_price_provider import YahooPriceProvider
+from .fake_price_provider import FakePriceProvider
+from .quote import Quote
+from .quote_cache import QuoteCache
+from .history_provider import Bar, HistoryProvider
+from .yahoo_history_provider import YahooHistoryProvider
+from .fake_history_provider import FakeHistoryProvider
+
+
+def __getattr__(name : str):
+    '''
+    PriceStore, OHLCStore and HistoryCache are imported the first time they are used, so NumPy isn't loaded at startup.
+    '''
+    if name in ('PriceStore', 'OHLCStore'):
+        from . import price_store as module
+    elif name == 'HistoryCache':
+        from . import history_cache as module
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = getattr(module, name)
+    return(globals()[name])
+
+
+__all__ = ['PriceProvider', 'YahooPriceProvider', 'FakePriceProvider', 'Quote', 'QuoteCache', 'Bar', 'HistoryProvider', 'YahooHistoryProvider',
+           'FakeHistoryProvider', 'PriceStore', 'OHLCStore', 'HistoryCache']
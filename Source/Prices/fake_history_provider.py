@@ -0,0 +1,48 @@
+from .history_provider import Bar, HistoryProvider
+from datetime import date, timedelta
+import random
+import threading
+import time
+
+
+class FakeHistoryProvider(HistoryProvider):
+    '''
+    Local history provider that doesn't access the network, to work offline and to test the code that depends on price history.
+    Every weekday has a bar, generated from the ticker and the day, so the same day always has the same bar whatever the range it was
+    requested in. Every request takes 'latency' seconds and is recorded in 'calls'.
+    '''
+    _SATURDAY = 5
+
+    def __init__(self, latency : float = 0):
+        self._latency : float = latency
+        self._calls : list[tuple[frozenset[str], date, date]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def calls(self) -> list[tuple[frozenset[str], date, date]]:
+        '''
+        (tickers, start, end) of every request served, in order.
+        '''
+        return(self._calls)
+
+    @property
+    def requests(self) -> int:
+        return(len(self._calls))
+
+    def get_history(self, tickers : set[str], start : date, end : date) -> dict[str, list[Bar]]:
+        if self._latency > 0:
+            time.sleep(self._latency)
+        with self._lock:
+            self._calls.append((frozenset(tickers), start, end))
+        days = [start + timedelta(days=offset) for offset in range((end - start).days)]
+        days = [day for day in days if day.weekday() < FakeHistoryProvider._SATURDAY]
+        return({ticker : [FakeHistoryProvider.bar(ticker, day) for day in days] for ticker in tickers})
+
+    @staticmethod
+    def bar(ticker : str, day : date) -> Bar:
+        generator = random.Random(ticker + day.isoformat())
+        base = 10 + sum(map(ord, ticker)) % 490
+        close = base * (1 + 0.3 * (generator.random() - 0.5))
+        opening = close * generator.uniform(0.98, 1.02)
+        return(Bar(day, opening, max(opening, close) * generator.uniform(1, 1.02), min(opening, close) * generator.uniform(0.98, 1), close,
+                   float(generator.randrange(1000, 100000))))
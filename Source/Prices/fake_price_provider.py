@@ -0,0 +1,41 @@
+from .price_provider import PriceProvider
+import threading
+import time
+
+
+class FakePriceProvider(PriceProvider):
+    '''
+    Local price provider that doesn't access the network. Useful to work offline and to measure the throughput
+    of the code that depends on the prices.
+    Every quote takes 'latency' seconds to arrive, simulating the round-trip of a real API.
+    Tickers without a fixed price get a deterministic price derived from their name.
+    '''
+    def __init__(self, prices : dict[str, float] = None, latency : float = 0, max_workers : int = None):
+        super().__init__(max_workers)
+        self._prices : dict[str, float] = dict(prices or {})
+        self._latency : float = latency
+        self._requests : int = 0
+        self._lock = threading.Lock()
+
+    @property
+    def latency(self) -> float:
+        return(self._latency)
+
+    @property
+    def requests(self) -> int:
+        '''
+        Number of quotes served since the provider was created.
+        '''
+        return(self._requests)
+
+    def set_price(self, ticker : str, price : float) -> None:
+        self._prices[ticker] = price
+
+    def get_price(self, ticker : str) -> float:
+        if self._latency > 0:
+            time.sleep(self._latency)
+        with self._lock:
+            self._requests += 1
+            if ticker not in self._prices:
+                self._prices[ticker] = float(10 + sum(map(ord, ticker)) % 490)
+            return(self._prices[ticker])
@@ -0,0 +1,199 @@
+from .history_provider import HistoryProvider
+from .price_store import OHLCStore, PriceStore
+from ..Instrumentation import span, count
+from concurrent.futures import Future
+from datetime import date, datetime
+import json
+import numpy as np
+import os
+import threading
+
+
+class HistoryCache():
+    '''
+    Local cache of the daily bars of the tickers, kept in an OHLCStore so every day is downloaded only once.
+    The ranges of days already downloaded are recorded per ticker (with the days without trading), so a request only fetches the gaps.
+    The gaps of all the tickers of a request are coalesced into windows: overlapping or adjacent gaps become a single range that is
+    fetched with one request for all the tickers that miss part of it. A gap that another thread is already fetching is awaited
+    instead of fetched again.
+    Only finished days are cached: ranges are cut at today.
+    '''
+    _COVERAGE_FILENAME = 'coverage.json'
+
+    def __init__(self, dirname : str, provider : HistoryProvider):
+        self._store : OHLCStore = OHLCStore(dirname)
+        self._provider : HistoryProvider = provider
+        self._coverage : dict[str, list[tuple[int, int]]] = {}
+        self._pending : dict[str, list[tuple[int, int, Future]]] = {}
+        self._lock = threading.RLock()
+        if os.path.isfile(self.coverage_filename):
+            self._load()
+
+    @property
+    def store(self) -> OHLCStore:
+        '''
+        Returns the store with the bars. It can be used as the price store of a group to value it at past dates.
+        '''
+        return(self._store)
+
+    @property
+    def provider(self) -> HistoryProvider:
+        return(self._provider)
+
+    @property
+    def coverage_filename(self) -> str:
+        return(os.path.join(self._store.dirname, HistoryCache._COVERAGE_FILENAME))
+
+    def covered(self, ticker : str) -> list[tuple[date, date]]:
+        '''
+        Returns the (start, end) ranges of days already downloaded for the ticker, 'end' excluded.
+        '''
+        return([(HistoryCache._date(start), HistoryCache._date(end)) for start, end in self._coverage.get(ticker, [])])
+
+    def missing(self, ticker : str, start : date, end : date) -> list[tuple[date, date]]:
+        '''
+        Returns the (start, end) ranges of days between 'start' and 'end' that would be fetched for the ticker.
+        '''
+        gaps = _subtract([self._range(start, end)], self._coverage.get(ticker, []))
+        return([(HistoryCache._date(first), HistoryCache._date(last)) for first, last in gaps])
+
+    def history(self, tickers : set[str], start : date, end : date = None) -> dict[str, np.ndarray]:
+        '''
+        Returns the bars ('day', 'open', 'high', 'low', 'close', 'volume') of every ticker from 'start' (included) to 'end' (excluded,
+        today by default), fetching the days that aren't cached yet. See OHLCStore.series.
+        '''
+        end = date.today() if end is None else end
+        self.ensure(tickers, start, end)
+        with self._lock:
+            return({ticker : self._store.series(ticker, start, end) for ticker in tickers})
+
+    def ensure(self, tickers : set[str], start : date, end : date) -> int:
+        '''
+        Makes sure the bars of every ticker from 'start' to 'end' are cached, fetching the gaps. Returns the number of requests made.
+        '''
+        first, last = self._range(start, end)
+        if first >= last:
+            return(0)
+        with self._lock:
+            awaited, gaps = set(), {}
+            for ticker in tickers:
+                remaining = _subtract([(first, last)], self._coverage.get(ticker, []))
+                for pending_first, pending_last, future in self._pending.get(ticker, []):
+                    reduced = _subtract(remaining, [(pending_first, pending_last)])
+                    if reduced != remaining:
+                        awaited.add(future)
+                        remaining = reduced
+                if remaining:
+                    gaps[ticker] = remaining
+            windows = [(window_first, window_last, names, Future()) for window_first, window_last, names in _coalesce(gaps)]
+            for window_first, window_last, names, future in windows:
+                for ticker in names:
+                    self._pending.setdefault(ticker, []).append((window_first, window_last, future))
+
+        count('history.requests', len(windows))
+        count('history.awaited', len(awaited))
+        for position, window in enumerate(windows):
+            try:
+                self._fetch(*window)
+            except BaseException as error:
+                for other in windows[position + 1:]:
+                    self._finish(other, error)
+                raise
+        for future in awaited:
+            future.result()
+        return(len(windows))
+
+    def _fetch(self, first : int, last : int, tickers : set[str], future : Future) -> None:
+        try:
+            with span('HistoryProvider.get_history'):
+                history = self._provider.get_history(tickers, HistoryCache._date(first), HistoryCache._date(last))
+            with self._lock:
+                for ticker in tickers:
+                    self._store.merge(ticker, history.get(ticker, []))
+                    self._coverage[ticker] = _add(self._coverage.get(ticker, []), (first, last))
+                self._save()
+        except BaseException as error:
+            self._finish((first, last, tickers, future), error)
+            raise
+        self._finish((first, last, tickers, future))
+
+    def _finish(self, window : tuple, error : BaseException = None) -> None:
+        first, last, tickers, future = window
+        with self._lock:
+            for ticker in tickers:
+                self._pending[ticker] = [entry for entry in self._pending.get(ticker, []) if entry[2] is not future]
+        if error is None:
+            future.set_result(None)
+        else:
+            future.set_exception(error)
+
+    def _range(self, start : date, end : date) -> tuple[int, int]:
+        '''
+        Returns the epoch days of 'start' and 'end', with 'end' cut at today.
+        '''
+        end = min(end.date() if isinstance(end, datetime) else end, date.today())
+        return(PriceStore._epoch_day(start), PriceStore._epoch_day(end))
+
+    def _save(self) -> None:
+        data = {ticker : [[HistoryCache._date(first).isoformat(), HistoryCache._date(last).isoformat()] for first, last in ranges]
+                for ticker, ranges in self._coverage.items()}
+        temporary = self.coverage_filename + '.tmp'
+        with open(temporary, 'w') as file:
+            json.dump(data, file)
+        os.replace(temporary, self.coverage_filename)
+
+    def _load(self) -> None:
+        with open(self.coverage_filename, 'r') as file:
+            data = json.load(file)
+        for ticker, ranges in data.items():
+            self._coverage[ticker] = [(PriceStore._epoch_day(date.fromisoformat(first)), PriceStore._epoch_day(date.fromisoformat(last)))
+                                      for first, last in ranges]
+
+    @staticmethod
+    def _date(epoch_day : int) -> date:
+        return(PriceStore._date(epoch_day))
+
+
+def _subtract(ranges : list[tuple[int, int]], covered : list[tuple[int, int]]) -> list[tuple[int, int]]:
+    '''
+    Returns the parts of the sorted (start, end) ranges that aren't in the sorted 'covered' ranges.
+    '''
+    remaining = []
+    for first, last in ranges:
+        for covered_first, covered_last in covered:
+            if covered_last <= first or covered_first >= last:
+                continue
+            if covered_first > first:
+                remaining.append((first, covered_first))
+            first = max(first, covered_last)
+            if first >= last:
+                break
+        if first < last:
+            remaining.append((first, last))
+    return(remaining)
+
+
+def _add(ranges : list[tuple[int, int]], new : tuple[int, int]) -> list[tuple[int, int]]:
+    '''
+    Returns the sorted ranges with 'new' added, merging the ones that overlap or touch.
+    '''
+    merged = []
+    for first, last in sorted(ranges + [new]):
+        if merged and first <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+        else:
+            merged.append((first, last))
+    return(merged)
+
+
+def _coalesce(gaps : dict[str, list[tuple[int, int]]]) -> list[tuple[int, int, set[str]]]:
+    '''
+    Merges the gaps of all the tickers that overlap or touch into windows, each one with the tickers that miss part of it.
+    '''
+    windows = []
+    for first, last, ticker in sorted((first, last, ticker) for ticker, ranges in gaps.items() for first, last in ranges):
+        if windows and first <= windows[-1][1]:
+            windows[-1] = (windows[-1][0], max(windows[-1][1], last), windows[-1][2] | {ticker})
+        else:
+            windows.append((first, last, {ticker}))
+    return(windows)
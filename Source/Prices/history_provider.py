@@ -0,0 +1,28 @@
+from abc import ABC, abstractmethod
+from datetime import date
+from typing import NamedTuple
+
+
+class Bar(NamedTuple):
+    '''
+    Prices of a ticker during a day.
+    '''
+    day : date
+    open : float
+    high : float
+    low : float
+    close : float
+    volume : float
+
+
+class HistoryProvider(ABC):
+    '''
+    Source of the daily bars of the tickers. Every request asks for several tickers over the same range of days, so a provider
+    that can download them together pays a single round-trip.
+    '''
+    @abstractmethod
+    def get_history(self, tickers : set[str], start : date, end : date) -> dict[str, list[Bar]]:
+        '''
+        Returns the bars of every ticker in 'tickers' from 'start' (included) to 'end' (excluded). Days without trading have no bar.
+        '''
+        pass
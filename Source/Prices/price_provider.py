@@ -0,0 +1,40 @@
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+
+
+class PriceProvider(ABC):
+    '''
+    Source of the latest quotes of the tickers the group invests in.
+    Subclasses only have to know how to quote a single ticker. Quoting several tickers is done concurrently
+    through a bounded thread pool unless the subclass can do it in a single request (overriding get_prices).
+    '''
+    _MAX_WORKERS = 8
+
+    def __init__(self, max_workers : int = None):
+        self._max_workers : int = max_workers or type(self)._MAX_WORKERS
+
+    @property
+    def max_workers(self) -> int:
+        return(self._max_workers)
+
+    @abstractmethod
+    def get_price(self, ticker : str) -> float:
+        '''
+        Returns the latest quote of 'ticker'.
+        '''
+        pass
+
+    def get_prices(self, tickers : set[str]) -> dict[str, float]:
+        '''
+        Returns a dictionary with the latest quote of every ticker in 'tickers'.
+        '''
+        tickers = list(tickers)
+        if len(tickers) == 0:
+            return({})
+        if len(tickers) == 1:
+            return({tickers[0] : self.get_price(tickers[0])})
+
+        workers = min(self._max_workers, len(tickers))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            prices = executor.map(self.get_price, tickers)
+            return(dict(zip(tickers, prices)))
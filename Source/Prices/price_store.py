@@ -0,0 +1,208 @@
+from datetime import date, datetime
+from typing import Iterable
+import mmap
+import numpy as np
+import os
+
+
+class PriceStore():
+    '''
+    Local store of daily closing prices, so past prices never have to be downloaded again.
+    Every ticker has its own file of fixed-width records (epoch day as int64, close as float64) sorted by day. The files are opened
+    with mmap and read through NumPy views: looking up a date is a binary search over the mapped file and a range of days is a view
+    over its pages, so a series is never loaded whole in memory.
+    New days are appended at the end of the file and only the ones after the last stored day are written. Days before it can be
+    merged, which rewrites the file of the ticker.
+    Subclasses can store more fields per day by redefining '_DTYPE' (its first field must be 'day') and '_EXTENSION'.
+    '''
+    _EXTENSION = '.prices'
+    _DTYPE = np.dtype([('day', '<i8'), ('close', '<f8')])
+    _EPOCH = date(1970, 1, 1).toordinal()
+
+    def __init__(self, dirname : str):
+        self._dirname : str = dirname
+        self._maps : dict[str, tuple[mmap.mmap, np.ndarray]] = {}
+        os.makedirs(dirname, exist_ok=True)
+
+    @property
+    def dirname(self) -> str:
+        return(self._dirname)
+
+    def filename(self, ticker : str) -> str:
+        return(os.path.join(self._dirname, ticker + self._EXTENSION))
+
+    def tickers(self) -> list[str]:
+        extension = self._EXTENSION
+        return(sorted(name[:-len(extension)] for name in os.listdir(self._dirname) if name.endswith(extension)))
+
+    def __contains__(self, ticker : str) -> bool:
+        return(os.path.isfile(self.filename(ticker)))
+
+    def __enter__(self):
+        return(self)
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def size(self, ticker : str) -> int:
+        '''
+        Returns the number of days stored for the ticker.
+        '''
+        return(len(self._view(ticker)))
+
+    def first_day(self, ticker : str) -> date:
+        view = self._view(ticker)
+        return(PriceStore._date(view['day'][0]) if len(view) else None)
+
+    def last_day(self, ticker : str) -> date:
+        view = self._view(ticker)
+        return(PriceStore._date(view['day'][-1]) if len(view) else None)
+
+    def series(self, ticker : str, start : date = None, end : date = None) -> np.ndarray:
+        '''
+        Returns the records ('day', 'close' and the other fields of the store) of the ticker from 'start' (included) to 'end' (excluded)
+        as a view over the mapped file. The view is read-only and stays valid after the store appends new days or is closed.
+        '''
+        view = self._view(ticker)
+        first = 0 if start is None else PriceStore._bisect(view['day'], PriceStore._epoch_day(start))
+        last = len(view) if end is None else PriceStore._bisect(view['day'], PriceStore._epoch_day(end))
+        return(view[first:max(first, last)])
+
+    def closes(self, ticker : str, start : date = None, end : date = None) -> np.ndarray:
+        return(self.series(ticker, start, end)['close'])
+
+    def price_at(self, ticker : str, day : date) -> float:
+        '''
+        Returns the close of the ticker on 'day', or on the last stored day before it (weekends and holidays have no close).
+        Raises a KeyError if there is no price on or before that day.
+        '''
+        view = self._view(ticker)
+        position = PriceStore._bisect(view['day'], PriceStore._epoch_day(day) + 1) - 1
+        if position < 0:
+            raise KeyError(ticker + " has no price on or before " + str(day))
+        return(float(view['close'][position]))
+
+    def prices_at(self, tickers : set[str], day : date) -> dict[str, float]:
+        return({ticker : self.price_at(ticker, day) for ticker in tickers})
+
+    def append(self, ticker : str, prices : Iterable[tuple]) -> int:
+        '''
+        Stores the (day, close) pairs of 'prices' (a tuple with all the fields of the store, day first) that are later than the last
+        stored day of the ticker, in any order (for repeated days the last one wins). Returns the number of days added.
+        '''
+        last = self._view(ticker)
+        last = int(last['day'][-1]) if len(last) else None
+        new = {}
+        for day, *values in prices:
+            day = PriceStore._epoch_day(day)
+            if last is None or day > last:
+                new[day] = values
+        if not new:
+            return(0)
+
+        records = self._records(new)
+        self._release(ticker)
+        with open(self.filename(ticker), 'ab') as file:
+            file.truncate(self._complete_size(file.tell())) #Drops a record left half-written by a crash.
+            file.write(records.tobytes())
+        return(len(records))
+
+    def merge(self, ticker : str, prices : Iterable[tuple]) -> int:
+        '''
+        Stores the days of 'prices' (like append) whatever their dates. Stored days that come again are replaced.
+        Days after the last stored one are appended; otherwise the file of the ticker is rewritten with all the days merged, and
+        replaced atomically. Returns the number of days written.
+        '''
+        new = {PriceStore._epoch_day(day) : values for day, *values in prices}
+        if not new:
+            return(0)
+        stored = self._view(ticker)
+        if len(stored) == 0 or min(new) > stored['day'][-1]:
+            return(self.append(ticker, ((PriceStore._date(day), *values) for day, values in new.items())))
+
+        records = self._records(new)
+        kept = stored[~np.isin(stored['day'], records['day'])]
+        merged = np.concatenate([kept, records])
+        merged = merged[np.argsort(merged['day'], kind='stable')]
+        filename = self.filename(ticker)
+        self._release(ticker)
+        with open(filename + '.tmp', 'wb') as file:
+            file.write(merged.tobytes())
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(filename + '.tmp', filename)
+        return(len(records))
+
+    def close(self) -> None:
+        for ticker in list(self._maps):
+            self._release(ticker)
+
+    def _records(self, days : dict[int, list]) -> np.ndarray:
+        '''
+        Builds the records of the store from a dictionary with the epoch day as key and the rest of the fields as value, sorted by day.
+        '''
+        records = np.empty(len(days), dtype=self._DTYPE)
+        records['day'] = sorted(days)
+        for position, field in enumerate(self._DTYPE.names[1:]):
+            records[field] = [days[day][position] for day in records['day']]
+        return(records)
+
+    def _view(self, ticker : str) -> np.ndarray:
+        '''
+        Returns all the records of the ticker as a view over its mapped file (empty if the ticker has no file).
+        '''
+        if ticker in self._maps:
+            return(self._maps[ticker][1])
+        filename = self.filename(ticker)
+        size = self._complete_size(os.path.getsize(filename)) if os.path.isfile(filename) else 0
+        if size == 0:
+            return(np.empty(0, dtype=self._DTYPE))
+        with open(filename, 'rb') as file:
+            mapped = mmap.mmap(file.fileno(), size, access=mmap.ACCESS_READ)
+        view = np.frombuffer(mapped, dtype=self._DTYPE)
+        self._maps[ticker] = (mapped, view)
+        return(view)
+
+    def _release(self, ticker : str) -> None:
+        mapped, view = self._maps.pop(ticker, (None, None))
+        if mapped is not None:
+            try:
+                mapped.close()
+            except BufferError:
+                pass #Views returned to the caller still use it. It is unmapped once they are gone.
+
+    def _complete_size(self, size : int) -> int:
+        return(size - size % self._DTYPE.itemsize)
+
+    @staticmethod
+    def _bisect(days : np.ndarray, key : int) -> int:
+        '''
+        Returns the position of the first day not earlier than 'key'. Only the visited records are read from the file.
+        '''
+        low, high = 0, len(days)
+        while low < high:
+            middle = (low + high) // 2
+            if days[middle] < key:
+                low = middle + 1
+            else:
+                high = middle
+        return(low)
+
+    @staticmethod
+    def _epoch_day(day : date) -> int:
+        if isinstance(day, datetime):
+            day = day.date()
+        return(day.toordinal() - PriceStore._EPOCH)
+
+    @staticmethod
+    def _date(epoch_day : int) -> date:
+        return(date.fromordinal(int(epoch_day) + PriceStore._EPOCH))
+
+
+class OHLCStore(PriceStore):
+    '''
+    PriceStore with the whole daily bar of every ticker: open, high, low, close and volume. Days are stored as
+    (day, open, high, low, close, volume) tuples and the closes are read like in any PriceStore.
+    '''
+    _EXTENSION = '.ohlc'
+    _DTYPE = np.dtype([('day', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'), ('close', '<f8'), ('volume', '<f8')])
@@ -0,0 +1,28 @@
+import time
+
+
+class Quote():
+    '''
+    Price of a ticker together with the moment it was fetched.
+    '''
+    def __init__(self, price : float, timestamp : float = None):
+        self.price = price
+        self.timestamp = time.time() if timestamp is None else timestamp
+
+    def age(self, now : float = None) -> float:
+        '''
+        Returns the seconds elapsed since the quote was fetched.
+        '''
+        now = time.time() if now is None else now
+        return(now - self.timestamp)
+
+    def to_dict(self) -> dict:
+        data = {
+            "Precio": self.price,
+            "Fecha": self.timestamp,
+        }
+        return(data)
+
+    @classmethod
+    def from_dict(cls, data : dict):
+        return(cls(data["Precio"], data["Fecha"]))
@@ -0,0 +1,197 @@
+from .price_provider import PriceProvider
+from .quote import Quote
+from ..Instrumentation import span, count
+from concurrent.futures import Future, wait
+import json
+import logging
+import os
+import threading
+import time
+
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class QuoteCache():
+    '''
+    Cache of the latest quotes, keyed by ticker.
+    A quote is served from the cache while it is younger than 'max_age' seconds, otherwise it is fetched again
+    from the provider. All the missing or stale tickers of a request are fetched together in a single call.
+    If a filename is given, the quotes are persisted there so a new process can start with a warm cache
+    (stale entries are kept on disk but never served).
+    Quotes can be fetched ahead of time in a background thread (prefetch) or kept fresh by a refresh thread. A request for a
+    ticker that is already being fetched waits for that fetch instead of starting another one.
+    '''
+    _DEFAULT_MAX_AGE = 300
+    _REFRESH_FRACTION = 0.5
+
+    def __init__(self, provider : PriceProvider, max_age : float = _DEFAULT_MAX_AGE, filename : str = None):
+        self._provider : PriceProvider = provider
+        self._max_age : float = max_age
+        self._filename : str = filename
+        self._quotes : dict[str, Quote] = {}
+        self._pending : dict[str, Future] = {}
+        self._lock = threading.RLock()
+        self._refresh_stop : threading.Event = None
+
+        if filename and os.path.isfile(filename):
+            self.load()
+
+    @property
+    def provider(self) -> PriceProvider:
+        return(self._provider)
+
+    @property
+    def max_age(self) -> float:
+        return(self._max_age)
+
+    @max_age.setter
+    def max_age(self, max_age : float) -> None:
+        self._max_age = max_age
+
+    @property
+    def refreshing(self) -> bool:
+        return(self._refresh_stop is not None)
+
+    def is_fresh(self, ticker : str, now : float = None, max_age : float = None) -> bool:
+        quote = self._quotes.get(ticker)
+        return(quote is not None and quote.age(now) <= (self._max_age if max_age is None else max_age))
+
+    def stale(self, tickers : set[str], max_age : float = None) -> set[str]:
+        '''
+        Returns the tickers of 'tickers' that have to be fetched again (older than 'max_age', the one of the cache by default).
+        '''
+        now = time.time()
+        return({ticker for ticker in tickers if not self.is_fresh(ticker, now, max_age)})
+
+    def get(self, tickers : set[str]) -> dict[str, float]:
+        '''
+        Returns a dictionary with the current price of every ticker in 'tickers', fetching only the stale ones.
+        Stale tickers that are already being fetched in the background are awaited instead of fetched again, and fetched by this
+        request if that fetch fails. Tickers another fetch takes over while this request is starting its own are awaited after it
+        and the error of that fetch, if any, is raised.
+        '''
+        stale = self.stale(tickers)
+        count('quotes.cached', len(tickers) - len(stale))
+        if stale:
+            with self._lock:
+                in_flight = {self._pending[ticker] for ticker in stale if ticker in self._pending}
+            if in_flight:
+                count('quotes.awaited', len(in_flight))
+                with span('QuoteCache.await'):
+                    wait(in_flight)
+                stale = self.stale(stale)
+        if stale:
+            own, future = self._start(stale)
+            self._fetch(own, future)
+            future.result()
+            # Whatever was already in flight when this fetch started is awaited too, and fails like it.
+            with self._lock:
+                in_flight = {self._pending[ticker] for ticker in stale if ticker in self._pending}
+            for awaited in in_flight:
+                awaited.result()
+        return({ticker : self._quotes[ticker].price for ticker in tickers})
+
+    def prefetch(self, tickers : set[str], max_age : float = None) -> Future:
+        '''
+        Starts fetching the tickers older than 'max_age' (the maximum age of the cache by default) in a background thread and
+        returns immediately. The returned Future holds the fetched prices. Tickers already being fetched are not requested again.
+        '''
+        own, future = self._start(self.stale(tickers, max_age))
+        if own:
+            threading.Thread(target=self._fetch, args=(own, future), daemon=True).start()
+        else:
+            future.set_result({})
+        return(future)
+
+    def start_refresh(self, tickers, interval : float = None) -> None:
+        '''
+        Starts a background thread that prefetches the tickers returned by the callable 'tickers' every 'interval' seconds (half the
+        maximum age by default). Every round fetches the quotes that would become stale before the next one, so they are always fresh.
+        '''
+        self.stop_refresh()
+        interval = self._max_age * QuoteCache._REFRESH_FRACTION if interval is None else interval
+        stop = self._refresh_stop = threading.Event()
+
+        def refresh() -> None:
+            while not stop.is_set():
+                try:
+                    self.prefetch(tickers(), max(self._max_age - interval, 0)).result()
+                except Exception:
+                    #The next request fetches the quotes by itself, so the thread keeps going.
+                    _LOGGER.warning("Error al actualizar las cotizaciones en segundo plano.", exc_info=True)
+                stop.wait(interval)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def stop_refresh(self) -> None:
+        if self._refresh_stop is not None:
+            self._refresh_stop.set()
+            self._refresh_stop = None
+
+    def _start(self, tickers : set[str]) -> tuple[set[str], Future]:
+        '''
+        Registers a fetch of the tickers of 'tickers' that are not being fetched already. Returns those tickers and the Future of the fetch.
+        '''
+        future = Future()
+        with self._lock:
+            own = {ticker for ticker in tickers if ticker not in self._pending}
+            for ticker in own:
+                self._pending[ticker] = future
+        return(own, future)
+
+    def _fetch(self, tickers : set[str], future : Future) -> None:
+        try:
+            if tickers:
+                count('quotes.fetched', len(tickers))
+                with span('PriceProvider.get_prices'):
+                    prices = self._provider.get_prices(tickers)
+                self.update(prices)
+            else:
+                prices = {}
+        except BaseException as error:
+            future.set_exception(error)
+        else:
+            future.set_result(prices)
+        finally:
+            with self._lock:
+                for ticker in tickers:
+                    if self._pending.get(ticker) is future:
+                        del self._pending[ticker]
+
+    def update(self, prices : dict[str, float], timestamp : float = None) -> None:
+        '''
+        Stores the given prices as freshly fetched quotes and persists them if the cache has a file.
+        '''
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            for ticker, price in prices.items():
+                self._quotes[ticker] = Quote(price, timestamp)
+            if self._filename:
+                self.save()
+
+    def invalidate(self, tickers : set[str] = None) -> None:
+        '''
+        Forces the given tickers (all of them if None) to be fetched again on their next request.
+        '''
+        with self._lock:
+            if tickers is None:
+                self._quotes.clear()
+            else:
+                for ticker in tickers:
+                    self._quotes.pop(ticker, None)
+            if self._filename:
+                self.save()
+
+    def to_dict(self) -> dict:
+        return({ticker : quote.to_dict() for ticker, quote in self._quotes.items()})
+
+    def save(self) -> None:
+        with open(self._filename, 'w') as file:
+            json.dump(self.to_dict(), file)
+
+    def load(self) -> None:
+        with open(self._filename, 'r') as file:
+            data = json.load(file)
+        for ticker, quote in data.items():
+            self._quotes[ticker] = Quote.from_dict(quote)
@@ -0,0 +1,31 @@
+from .history_provider import Bar, HistoryProvider
+from datetime import date
+
+
+class YahooHistoryProvider(HistoryProvider):
+    '''
+    Downloads the daily bars through the Yahoo Finance API, with a single multi-symbol request for all the tickers of a range.
+    yfinance (and pandas with it) is imported on the first request, so creating the provider doesn't slow the startup.
+    '''
+    _INTERVAL = '1d'
+    _FIELDS = ('Open', 'High', 'Low', 'Close', 'Volume')
+    _MAX_WORKERS = 8
+
+    def get_history(self, tickers : set[str], start : date, end : date) -> dict[str, list[Bar]]:
+        tickers = sorted(tickers)
+        if len(tickers) == 0:
+            return({})
+
+        import yfinance as yf
+        data = yf.download(tickers, start=start.isoformat(), end=end.isoformat(), interval=YahooHistoryProvider._INTERVAL,
+                           group_by='column', auto_adjust=False, progress=False, threads=YahooHistoryProvider._MAX_WORKERS)
+        days = [day.date() for day in data.index]
+        history = {}
+        for ticker in tickers:
+            columns = [data[field] if data[field].ndim == 1 else data[field][ticker] for field in YahooHistoryProvider._FIELDS]
+            bars = []
+            for day, *values in zip(days, *columns):
+                if values[3] == values[3]: #Days the ticker didn't trade have a NaN close.
+                    bars.append(Bar(day, *map(float, values)))
+            history[ticker] = bars
+        return(history)
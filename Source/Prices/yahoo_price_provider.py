@@ -0,0 +1,38 @@
+from .price_provider import PriceProvider
+
+
+class YahooPriceProvider(PriceProvider):
+    '''
+    Quotes the tickers through the Yahoo Finance API.
+    All the tickers are requested at once in a single multi-symbol download and only the last daily bar is asked for,
+    whose close is the latest quote while the market is open.
+    Raises a ValueError if any of the tickers has no close, so an unknown ticker never becomes a NaN price.
+    yfinance (and pandas with it) is imported on the first request, so creating the provider doesn't slow the startup.
+    '''
+    _PERIOD = '1d'
+    _INTERVAL = '1d'
+
+    def get_price(self, ticker : str) -> float:
+        return(self.get_prices({ticker})[ticker])
+
+    def get_prices(self, tickers : set[str]) -> dict[str, float]:
+        tickers = sorted(tickers)
+        if len(tickers) == 0:
+            return({})
+
+        import yfinance as yf
+        data = yf.download(tickers, period=YahooPriceProvider._PERIOD, interval=YahooPriceProvider._INTERVAL,
+                           group_by='column', auto_adjust=False, progress=False, threads=self.max_workers)
+        closes = data['Close'].ffill().iloc[-1] if len(data) else {}
+        if len(tickers) == 1 and not hasattr(closes, 'index') and not isinstance(closes, dict): #Old versions return a Series for a single ticker.
+            closes = {tickers[0] : closes}
+
+        current_prices, missing = {}, []
+        for ticker in tickers:
+            close = float(closes[ticker]) if ticker in closes else float('nan')
+            if close != close: #Unknown or delisted tickers, or without any close, come as NaN.
+                missing.append(ticker)
+            current_prices[ticker] = close
+        if missing:
+            raise ValueError("No hay cotización de: " + ", ".join(missing))
+        return(current_prices)
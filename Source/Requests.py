@@ -3,4 +3,6 @@ from enum import Enum, auto
 class Request(Enum):
     MASS_INVESTMENT = auto()
     DISPLAY_ALL_DATA = auto()
+    PAY_DEBT = auto()
+    WITHDRAW = auto()
     EXIT = auto()
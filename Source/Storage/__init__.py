@@ -0,0 +1,22 @@
+# Storage package initialization
+from .storage_engine import StorageEngine
+from importlib import import_module
+
+_BACKENDS = {
+    'JSONStorage': 'json_storage',
+    'SQLiteStorage': 'sqlite_storage',
+}
+
+
+def __getattr__(name : str):
+    '''
+    The storage backends are imported the first time they are used, so their dependencies aren't loaded at startup.
+    '''
+    if name not in _BACKENDS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    backend = getattr(import_module('.' + _BACKENDS[name], __name__), name)
+    globals()[name] = backend
+    return(backend)
+
+
+__all__ = ['StorageEngine', 'JSONStorage', 'SQLiteStorage']
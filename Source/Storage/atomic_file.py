@@ -0,0 +1,35 @@
+import os
+import tempfile
+
+
+def atomic_write(filename : str, text : str) -> None:
+    '''
+    Replaces the content of the file with 'text' so that, even if the process crashes, the file has either its old content or the new one.
+    The text is written to a temporary file in the same directory, synced to disk and then renamed over the original file.
+    '''
+    directory = os.path.dirname(filename) or os.curdir
+    descriptor, temporary = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(filename) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as file:
+            file.write(text)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, filename)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+    _sync_directory(directory)
+
+
+def _sync_directory(directory : str) -> None:
+    '''
+    Syncs the directory entry of a renamed file. Not available on Windows, where the rename is already durable.
+    '''
+    if os.name != 'posix':
+        return
+    descriptor = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
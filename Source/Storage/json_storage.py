@@ -0,0 +1,166 @@
+from .storage_engine import StorageEngine
+from .atomic_file import atomic_write
+from ..Instrumentation import timed
+from ..Investors.investor import Investor
+from ..Investors.transaction_journal import TransactionJournal
+from ..Investors.transaction_history import TransactionHistory
+from datetime import datetime
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
+import json
+import os
+
+
+class JSONStorage(StorageEngine):
+    '''
+    Stores a group in a directory with the layout:
+        - InvestmentGroup.json: Header of the group.
+        - <name>/<name>-info.json: One document for every investor.
+        - Transactions/journal.jsonl (+ .idx): Journal with all the transactions.
+        - Snapshots/<position>.json: Snapshots of the group, named after the number of transactions in the journal when they were taken.
+    Every document is replaced atomically, so a crash while saving never leaves a half-written file. The documents of different
+    investors are written concurrently.
+    '''
+    _FILENAME = 'InvestmentGroup.json'
+    _MAX_WORKERS = 8
+    _TRANSACTIONS_DIR = 'Transactions'
+    _JOURNAL_NAME = 'journal'
+    _SNAPSHOTS_DIR = 'Snapshots'
+    _SNAPSHOT_DIGITS = 12
+
+    def __init__(self, dirname : str):
+        self._dirname : str = dirname
+        self._journal : TransactionJournal = None
+
+    @property
+    def dirname(self) -> str:
+        return(self._dirname)
+
+    @property
+    def header_filename(self) -> str:
+        return(os.path.join(self._dirname, JSONStorage._FILENAME))
+
+    def exists(self) -> bool:
+        '''
+        Returns whether a group has been saved in the directory.
+        '''
+        return(os.path.isfile(self.header_filename))
+
+    @property
+    def journal(self) -> TransactionJournal:
+        '''
+        Returns the journal of the group. It is opened the first time it is needed.
+        '''
+        if self._journal is None:
+            self._journal = TransactionJournal(os.path.join(self._dirname, JSONStorage._TRANSACTIONS_DIR, JSONStorage._JOURNAL_NAME))
+        return(self._journal)
+
+    def investor_filename(self, name : str) -> str:
+        return(os.path.join(self._dirname, name, name + Investor.filename()))
+
+    def investor_names(self) -> list[str]:
+        names = []
+        for name in sorted(os.listdir(self._dirname)):
+            if os.path.isfile(self.investor_filename(name)):
+                names.append(name)
+        return(names)
+
+    @timed()
+    def load_group(self, group) -> None:
+        with open(self.header_filename, 'r') as file:
+            data = json.load(file)
+        investors = [self.load_investor(name) for name in self.investor_names()]
+        group._restore(data, investors)
+
+    @timed()
+    def save_group(self, group, names : set[str] = None, removed : set[str] = ()) -> None:
+        os.makedirs(self._dirname, exist_ok=True)
+        investors = [investor for investor in group.investors if names is None or investor.name in names]
+        if len(investors) > 1:
+            with ThreadPoolExecutor(min(JSONStorage._MAX_WORKERS, len(investors))) as executor:
+                list(executor.map(self.save_investor, investors))
+        else:
+            for investor in investors:
+                self.save_investor(investor)
+        for name in removed:
+            self.remove_investor(name)
+        atomic_write(self.header_filename, json.dumps(group.to_dict()))
+        self.flush()
+
+    @timed()
+    def load_investor(self, name : str) -> Investor:
+        return(Investor.load(self.investor_filename(name)))
+
+    @timed()
+    def save_investor(self, investor : Investor) -> None:
+        os.makedirs(os.path.join(self._dirname, investor.name), exist_ok=True)
+        atomic_write(self.investor_filename(investor.name), json.dumps(investor.to_dict()))
+
+    def remove_investor(self, name : str) -> None:
+        '''
+        Deletes the document of the investor, and its directory if nothing else is left in it.
+        '''
+        if os.path.isfile(self.investor_filename(name)):
+            os.remove(self.investor_filename(name))
+        try:
+            os.rmdir(os.path.join(self._dirname, name))
+        except OSError:
+            pass
+
+    def append(self, transaction, owner : str = None) -> None:
+        self.journal.append(transaction, owner)
+
+    def transactions(self, owner : str = None, start : datetime = None, end : datetime = None, ticker : str = None,
+                     kinds : tuple[type] = None, counterparty : str = None) -> Iterator:
+        return(TransactionHistory(self.journal).read(owner, start, end, kinds, ticker, counterparty))
+
+    def position(self) -> int:
+        self.flush()
+        return(len(self.journal))
+
+    def replay(self, since : int = None, end : datetime = None) -> Iterator:
+        self.flush()
+        for owner, transaction in self.journal.replay(since or 0):
+            if end is None or transaction.date < end:
+                yield((owner, transaction))
+
+    @timed()
+    def save_snapshot(self, snapshot : dict) -> None:
+        directory = os.path.join(self._dirname, JSONStorage._SNAPSHOTS_DIR)
+        os.makedirs(directory, exist_ok=True)
+        filename = str(snapshot["Posición"]).zfill(JSONStorage._SNAPSHOT_DIGITS) + '.json'
+        atomic_write(os.path.join(directory, filename), json.dumps(snapshot, ensure_ascii=False))
+
+    @timed()
+    def snapshot(self, end : datetime = None) -> dict:
+        directory = os.path.join(self._dirname, JSONStorage._SNAPSHOTS_DIR)
+        if not os.path.isdir(directory):
+            return(None)
+        for filename in sorted((name for name in os.listdir(directory) if name.endswith('.json')), reverse=True):
+            with open(os.path.join(directory, filename), 'r') as file:
+                snapshot = json.load(file)
+            if end is None or datetime.fromisoformat(snapshot["Fecha"]) <= end:
+                return(snapshot)
+        return(None)
+
+    @timed()
+    def flush(self) -> None:
+        if self._journal is not None:
+            self._journal.flush()
+
+    def discard(self) -> None:
+        if self._journal is not None:
+            self._journal.discard()
+
+    @contextmanager
+    def deferred(self):
+        '''
+        The journal holds all the transactions in its buffer. Raises a ValueError if it writes every transaction straight away.
+        '''
+        with self.journal.held():
+            yield self
+
+    def close(self) -> None:
+        if self._journal is not None:
+            self._journal.close()
@@ -0,0 +1,42 @@
+'''
+Imports a group stored with the JSON layout into a SQLite file:
+
+    python -m Source.Storage.migrate <group directory> <sqlite file>
+'''
+from .json_storage import JSONStorage
+from .sqlite_storage import SQLiteStorage
+from ..Investors import InvestmentGroup
+import argparse
+
+
+def migrate(source : str, destination : str) -> int:
+    '''
+    Copies the header, the investors and all the transactions of the JSON group in 'source' into the SQLite file 'destination'.
+    The group is loaded like InvestmentGroup.load does (latest snapshot plus the transactions after it), since the documents of the
+    investors can be older than the journal, and a snapshot of it is written after the copied transactions.
+    The transactions are streamed from the journal and inserted in batches, in the order they were recorded (see
+    StorageEngine.copy_log). Returns the number of transactions copied.
+    '''
+    json_storage = JSONStorage(source)
+    group = InvestmentGroup()
+    group.load(json_storage)
+
+    with SQLiteStorage(destination) as sqlite_storage:
+        copied = json_storage.copy_log(sqlite_storage)
+        sqlite_storage.save_group(group)
+        sqlite_storage.save_snapshot(group.snapshot(sqlite_storage.position()))
+    json_storage.close()
+    return(copied)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa un grupo guardado en JSON a un fichero SQLite.")
+    parser.add_argument('source', help="Directorio del grupo en JSON.")
+    parser.add_argument('destination', help="Fichero SQLite de destino.")
+    arguments = parser.parse_args()
+    copied = migrate(arguments.source, arguments.destination)
+    print("Transacciones migradas: " + str(copied))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,399 @@
+from .storage_engine import StorageEngine
+from ..Instrumentation import timed
+from ..Investors.investor import Investor
+from ..Investors.investment import Investment
+from ..Investors.savings import Savings
+from ..Investors.transfer import Transfer
+from ..Investors.sale import Sale
+from datetime import datetime
+from typing import Iterator
+import heapq
+import json
+import sqlite3
+
+
+class SQLiteStorage(StorageEngine):
+    '''
+    Stores a group in a single SQLite file.
+    Every investor is a row of 'investors' and their holdings (and the lots behind them) and target weights are rows of 'holdings'
+    (and 'ledgers') and 'target_weights', so a single investor can be loaded on its own. Investments, savings, transfers and sales
+    have a table each, indexed by investor, ticker and date, so a date range can be queried without reading the whole history.
+    Every transaction gets a number of a sequence shared by the four tables ('seq'), in the order it was recorded, which is the
+    position of the log and the order it is replayed in.
+    Appended transactions are kept in memory and inserted in bulk, inside a single database transaction, when the storage is flushed.
+    '''
+    _SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS group_info (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS investors (
+            name TEXT PRIMARY KEY,
+            savings REAL NOT NULL,
+            debt REAL NOT NULL,
+            total_contribution REAL NOT NULL,
+            periodic_contribution REAL NOT NULL,
+            relation_savings_inversion REAL NOT NULL,
+            cost_basis TEXT NOT NULL DEFAULT 'FIFO'
+        );
+        CREATE TABLE IF NOT EXISTS holdings (
+            investor TEXT NOT NULL REFERENCES investors(name),
+            ticker TEXT NOT NULL,
+            quantity REAL NOT NULL,
+            PRIMARY KEY (investor, ticker)
+        );
+        CREATE INDEX IF NOT EXISTS holdings_ticker ON holdings(ticker);
+        CREATE TABLE IF NOT EXISTS ledgers (
+            investor TEXT NOT NULL REFERENCES investors(name),
+            ticker TEXT NOT NULL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (investor, ticker)
+        );
+        CREATE TABLE IF NOT EXISTS target_weights (
+            investor TEXT NOT NULL REFERENCES investors(name),
+            ticker TEXT NOT NULL,
+            weight REAL NOT NULL,
+            PRIMARY KEY (investor, ticker)
+        );
+        CREATE TABLE IF NOT EXISTS investments (
+            id INTEGER PRIMARY KEY,
+            seq INTEGER NOT NULL,
+            investor TEXT,
+            ticker TEXT NOT NULL,
+            date TEXT NOT NULL,
+            purchase_price REAL NOT NULL,
+            quantity REAL NOT NULL,
+            fee REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS investments_investor_date ON investments(investor, date);
+        CREATE INDEX IF NOT EXISTS investments_ticker_date ON investments(ticker, date);
+        CREATE INDEX IF NOT EXISTS investments_date ON investments(date);
+        CREATE INDEX IF NOT EXISTS investments_seq ON investments(seq);
+        CREATE TABLE IF NOT EXISTS savings (
+            id INTEGER PRIMARY KEY,
+            seq INTEGER NOT NULL,
+            investor TEXT,
+            date TEXT NOT NULL,
+            amount REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS savings_investor_date ON savings(investor, date);
+        CREATE INDEX IF NOT EXISTS savings_date ON savings(date);
+        CREATE INDEX IF NOT EXISTS savings_seq ON savings(seq);
+        CREATE TABLE IF NOT EXISTS transfers (
+            id INTEGER PRIMARY KEY,
+            seq INTEGER NOT NULL,
+            investor TEXT,
+            source TEXT NOT NULL,
+            destination TEXT NOT NULL,
+            date TEXT NOT NULL,
+            amount REAL NOT NULL,
+            fee REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS transfers_source_date ON transfers(source, date);
+        CREATE INDEX IF NOT EXISTS transfers_destination_date ON transfers(destination, date);
+        CREATE INDEX IF NOT EXISTS transfers_date ON transfers(date);
+        CREATE INDEX IF NOT EXISTS transfers_seq ON transfers(seq);
+        CREATE TABLE IF NOT EXISTS sales (
+            id INTEGER PRIMARY KEY,
+            seq INTEGER NOT NULL,
+            investor TEXT,
+            ticker TEXT NOT NULL,
+            date TEXT NOT NULL,
+            sale_price REAL NOT NULL,
+            quantity REAL NOT NULL,
+            fee REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS sales_investor_date ON sales(investor, date);
+        CREATE INDEX IF NOT EXISTS sales_ticker_date ON sales(ticker, date);
+        CREATE INDEX IF NOT EXISTS sales_date ON sales(date);
+        CREATE INDEX IF NOT EXISTS sales_seq ON sales(seq);
+        CREATE TABLE IF NOT EXISTS snapshots (
+            id INTEGER PRIMARY KEY,
+            date TEXT NOT NULL,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS snapshots_date ON snapshots(date);
+    '''
+    _INVESTOR_COLUMNS = 'name, savings, debt, total_contribution, periodic_contribution, relation_savings_inversion, cost_basis'
+
+    def __init__(self, filename : str):
+        self._filename : str = filename
+        self._connection = sqlite3.connect(filename)
+        self._connection.executescript(SQLiteStorage._SCHEMA)
+        self._pending : list[tuple[str, object]] = []
+
+    def _last_sequence(self) -> int:
+        return(max(self._connection.execute('SELECT COALESCE(MAX(seq), 0) FROM ' + table).fetchone()[0] for table in SQLiteStorage._LOG_TABLES))
+
+    @property
+    def filename(self) -> str:
+        return(self._filename)
+
+    @timed()
+    def load_group(self, group) -> None:
+        row = self._connection.execute('SELECT data FROM group_info WHERE id = 1').fetchone()
+        if row is None:
+            raise FileNotFoundError("No group stored in " + self._filename)
+        holdings, ledgers, weights = self._holdings(), self._ledgers(), self._weights()
+        investors = []
+        for data in self._connection.execute('SELECT ' + SQLiteStorage._INVESTOR_COLUMNS + ' FROM investors ORDER BY name'):
+            investors.append(SQLiteStorage._investor_from_row(data, holdings.get(data[0], {}), ledgers.get(data[0], {}), weights.get(data[0], {})))
+        group._restore(json.loads(row[0]), investors)
+
+    @timed()
+    def save_group(self, group, names : set[str] = None, removed : set[str] = ()) -> None:
+        with self._connection:
+            self._connection.execute('INSERT OR REPLACE INTO group_info (id, data) VALUES (1, ?)', (json.dumps(group.to_dict()),))
+            if names is None:
+                self._connection.execute('DELETE FROM holdings')
+                self._connection.execute('DELETE FROM ledgers')
+                self._connection.execute('DELETE FROM target_weights')
+                self._connection.execute('DELETE FROM investors')
+            else:
+                deleted = [(name,) for name in set(names) | set(removed)]
+                self._connection.executemany('DELETE FROM holdings WHERE investor = ?', deleted)
+                self._connection.executemany('DELETE FROM ledgers WHERE investor = ?', deleted)
+                self._connection.executemany('DELETE FROM target_weights WHERE investor = ?', deleted)
+                self._connection.executemany('DELETE FROM investors WHERE name = ?', deleted)
+            for investor in group.investors:
+                if names is None or investor.name in names:
+                    self._insert_investor(investor)
+        self.flush()
+
+    @timed()
+    def load_investor(self, name : str) -> Investor:
+        data = self._connection.execute('SELECT ' + SQLiteStorage._INVESTOR_COLUMNS + ' FROM investors WHERE name = ?', (name,)).fetchone()
+        if data is None:
+            raise KeyError(name)
+        return(SQLiteStorage._investor_from_row(data, self._holdings(name).get(name, {}), self._ledgers(name).get(name, {}), self._weights(name).get(name, {})))
+
+    @timed()
+    def save_investor(self, investor : Investor) -> None:
+        with self._connection:
+            self._connection.execute('DELETE FROM holdings WHERE investor = ?', (investor.name,))
+            self._connection.execute('DELETE FROM ledgers WHERE investor = ?', (investor.name,))
+            self._connection.execute('DELETE FROM target_weights WHERE investor = ?', (investor.name,))
+            self._insert_investor(investor)
+
+    def append(self, transaction, owner : str = None) -> None:
+        self._pending.append((owner, transaction))
+
+    def append_all(self, transactions : list) -> None:
+        self._pending.extend(transactions)
+
+    @timed()
+    def flush(self) -> None:
+        '''
+        Inserts all the pending transactions with one bulk insert per table, inside a single database transaction.
+        '''
+        if not self._pending:
+            return
+        with self._connection:
+            sequence = self._last_sequence()
+            investments, savings, transfers, sales = [], [], [], []
+            for owner, transaction in self._pending:
+                sequence += 1
+                date = transaction.date.isoformat()
+                if isinstance(transaction, Investment):
+                    investments.append((sequence, owner, transaction.ticker, date, transaction.purchase_price, transaction.stock_quantity, transaction.fee))
+                elif isinstance(transaction, Savings):
+                    savings.append((sequence, owner, date, transaction.amount))
+                elif isinstance(transaction, Transfer):
+                    transfers.append((sequence, owner, transaction.source, transaction.destination, date, transaction.amount, transaction.fee))
+                elif isinstance(transaction, Sale):
+                    sales.append((sequence, owner, transaction.ticker, date, transaction.sale_price, transaction.stock_quantity, transaction.fee))
+                else:
+                    raise TypeError("Unsupported transaction: " + type(transaction).__name__)
+
+            self._connection.executemany('INSERT INTO investments (seq, investor, ticker, date, purchase_price, quantity, fee) VALUES (?, ?, ?, ?, ?, ?, ?)', investments)
+            self._connection.executemany('INSERT INTO savings (seq, investor, date, amount) VALUES (?, ?, ?, ?)', savings)
+            self._connection.executemany('INSERT INTO transfers (seq, investor, source, destination, date, amount, fee) VALUES (?, ?, ?, ?, ?, ?, ?)', transfers)
+            self._connection.executemany('INSERT INTO sales (seq, investor, ticker, date, sale_price, quantity, fee) VALUES (?, ?, ?, ?, ?, ?, ?)', sales)
+        self._pending.clear()
+
+    def discard(self) -> None:
+        self._pending.clear()
+
+    def close(self) -> None:
+        self.flush()
+        self._connection.close()
+
+    def position(self) -> int:
+        '''
+        The marker is the last number of the sequence of the transactions.
+        '''
+        self.flush()
+        return(self._last_sequence())
+
+    def replay(self, since : int = None, end : datetime = None) -> Iterator:
+        '''
+        The rows of every table are merged by their number of the sequence, so they are replayed in the order they were recorded:
+        the result of sales (and of the lots they consume) depends on it.
+        '''
+        self.flush()
+        streams = []
+        for select, parse in SQLiteStorage._LOG_TABLES.values():
+            query, parameters = select.replace('SELECT ', 'SELECT seq, ', 1) + ' WHERE seq > ?', [since or 0]
+            if end is not None:
+                query += ' AND date < ?'
+                parameters.append(end.isoformat())
+            rows = self._connection.execute(query + ' ORDER BY seq', parameters)
+            streams.append(SQLiteStorage._sequenced(rows, parse))
+        for sequence, record in heapq.merge(*streams, key=lambda item : item[0]):
+            yield record
+
+    @staticmethod
+    def _sequenced(rows, parse) -> Iterator[tuple[int, tuple]]:
+        for row in rows:
+            yield((row[0], parse(row[1:])))
+
+    @timed()
+    def save_snapshot(self, snapshot : dict) -> None:
+        with self._connection:
+            self._connection.execute('INSERT INTO snapshots (date, data) VALUES (?, ?)', (snapshot["Fecha"], json.dumps(snapshot)))
+
+    @timed()
+    def snapshot(self, end : datetime = None) -> dict:
+        if end is None:
+            row = self._connection.execute('SELECT data FROM snapshots ORDER BY id DESC LIMIT 1').fetchone()
+        else:
+            row = self._connection.execute('SELECT data FROM snapshots WHERE date <= ? ORDER BY date DESC, id DESC LIMIT 1', (end.isoformat(),)).fetchone()
+        return(None if row is None else json.loads(row[0]))
+
+    def transactions(self, owner : str = None, start : datetime = None, end : datetime = None, ticker : str = None,
+                     kinds : tuple[type] = None, counterparty : str = None) -> Iterator:
+        '''
+        Yields the (owner, transaction) pairs between 'start' and 'end' sorted by date. The tables are queried through
+        their date indexes and merged as they are read, so only the requested range is ever loaded.
+        '''
+        self.flush()
+        kinds = {Investment, Savings, Transfer, Sale} if kinds is None else set(kinds)
+        if ticker is not None:
+            kinds &= {Investment, Sale}
+        if counterparty is not None:
+            kinds &= {Transfer}
+
+        streams = []
+        if Investment in kinds:
+            rows = self._query('SELECT investor, ticker, date, purchase_price, quantity, fee FROM investments', owner, start, end, ticker=ticker)
+            streams.append(SQLiteStorage._investment_from_row(row) for row in rows)
+        if Savings in kinds:
+            rows = self._query('SELECT investor, date, amount FROM savings', owner, start, end)
+            streams.append(SQLiteStorage._savings_from_row(row) for row in rows)
+        if Transfer in kinds:
+            rows = self._query('SELECT investor, source, destination, date, amount, fee FROM transfers', owner, start, end, counterparty=counterparty, transfer=True)
+            streams.append(SQLiteStorage._transfer_from_row(row) for row in rows)
+        if Sale in kinds:
+            rows = self._query('SELECT investor, ticker, date, sale_price, quantity, fee FROM sales', owner, start, end, ticker=ticker)
+            streams.append(SQLiteStorage._sale_from_row(row) for row in rows)
+        yield from heapq.merge(*streams, key=lambda record : record[1].date)
+
+    def _query(self, select : str, owner : str, start : datetime, end : datetime, ticker : str = None, counterparty : str = None, transfer : bool = False):
+        conditions, parameters = [], []
+        if counterparty is not None:
+            conditions.append('(source = ? OR destination = ?)')
+            parameters += [counterparty, counterparty]
+        if owner is not None:
+            if transfer:
+                conditions.append('(investor = ? OR source = ? OR destination = ?)')
+                parameters += [owner, owner, owner]
+            else:
+                conditions.append('investor = ?')
+                parameters.append(owner)
+        if ticker is not None:
+            conditions.append('ticker = ?')
+            parameters.append(ticker)
+        if start is not None:
+            conditions.append('date >= ?')
+            parameters.append(start.isoformat())
+        if end is not None:
+            conditions.append('date < ?')
+            parameters.append(end.isoformat())
+        if conditions:
+            select += ' WHERE ' + ' AND '.join(conditions)
+        return(self._connection.execute(select + ' ORDER BY date, id', parameters))
+
+    def _holdings(self, name : str = None) -> dict[str, dict[str, float]]:
+        if name is None:
+            rows = self._connection.execute('SELECT investor, ticker, quantity FROM holdings')
+        else:
+            rows = self._connection.execute('SELECT investor, ticker, quantity FROM holdings WHERE investor = ?', (name,))
+        holdings = {}
+        for investor, ticker, quantity in rows:
+            holdings.setdefault(investor, {})[ticker] = quantity
+        return(holdings)
+
+    def _ledgers(self, name : str = None) -> dict[str, dict[str, dict]]:
+        if name is None:
+            rows = self._connection.execute('SELECT investor, ticker, data FROM ledgers')
+        else:
+            rows = self._connection.execute('SELECT investor, ticker, data FROM ledgers WHERE investor = ?', (name,))
+        ledgers = {}
+        for investor, ticker, data in rows:
+            ledgers.setdefault(investor, {})[ticker] = json.loads(data)
+        return(ledgers)
+
+    def _weights(self, name : str = None) -> dict[str, dict[str, float]]:
+        if name is None:
+            rows = self._connection.execute('SELECT investor, ticker, weight FROM target_weights')
+        else:
+            rows = self._connection.execute('SELECT investor, ticker, weight FROM target_weights WHERE investor = ?', (name,))
+        weights = {}
+        for investor, ticker, weight in rows:
+            weights.setdefault(investor, {})[ticker] = weight
+        return(weights)
+
+    def _insert_investor(self, investor : Investor) -> None:
+        data = investor.to_dict()
+        self._connection.execute('INSERT OR REPLACE INTO investors (' + SQLiteStorage._INVESTOR_COLUMNS + ') VALUES (?, ?, ?, ?, ?, ?, ?)',
+                                 (data["Nombre"], data["Ahorros"], data["Deuda"], data["Contribución total"],
+                                  data["Contribución periódica"], data["Relación ahorros-inversiones"], data["Método de coste"]))
+        self._connection.executemany('INSERT INTO holdings (investor, ticker, quantity) VALUES (?, ?, ?)',
+                                     [(investor.name, ticker, quantity) for ticker, quantity in data["Inversiones"].items()])
+        self._connection.executemany('INSERT INTO ledgers (investor, ticker, data) VALUES (?, ?, ?)',
+                                     [(investor.name, ticker, json.dumps(ledger)) for ticker, ledger in data["Lotes"].items()])
+        self._connection.executemany('INSERT INTO target_weights (investor, ticker, weight) VALUES (?, ?, ?)',
+                                     [(investor.name, ticker, weight) for ticker, weight in data["Pesos objetivo"].items()])
+
+    @staticmethod
+    def _investor_from_row(row : tuple, holdings : dict[str, float], ledgers : dict[str, dict], weights : dict[str, float]) -> Investor:
+        data = {
+            "Nombre": row[0],
+            "Ahorros": row[1],
+            "Inversiones": dict(holdings),
+            "Deuda": row[2],
+            "Contribución total": row[3],
+            "Contribución periódica": row[4],
+            "Relación ahorros-inversiones": row[5],
+            "Método de coste": row[6],
+            "Lotes": ledgers,
+            "Pesos objetivo": weights,
+        }
+        return(Investor.from_dict(data))
+
+    @staticmethod
+    def _investment_from_row(row : tuple) -> tuple[str, Investment]:
+        investor, ticker, date, price, quantity, fee = row
+        return((investor, Investment(ticker, price, quantity, datetime.fromisoformat(date), fee)))
+
+    @staticmethod
+    def _savings_from_row(row : tuple) -> tuple[str, Savings]:
+        investor, date, amount = row
+        return((investor, Savings(amount, datetime.fromisoformat(date))))
+
+    @staticmethod
+    def _transfer_from_row(row : tuple) -> tuple[str, Transfer]:
+        investor, source, destination, date, amount, fee = row
+        return((investor, Transfer(amount, source, destination, datetime.fromisoformat(date), fee)))
+
+    @staticmethod
+    def _sale_from_row(row : tuple) -> tuple[str, Sale]:
+        investor, ticker, date, price, quantity, fee = row
+        return((investor, Sale(ticker, price, quantity, datetime.fromisoformat(date), fee)))
+
+    _LOG_TABLES = { #Transaction tables, with the query and the parser of their rows.
+        'investments': ('SELECT investor, ticker, date, purchase_price, quantity, fee FROM investments', _investment_from_row),
+        'savings': ('SELECT investor, date, amount FROM savings', _savings_from_row),
+        'transfers': ('SELECT investor, source, destination, date, amount, fee FROM transfers', _transfer_from_row),
+        'sales': ('SELECT investor, ticker, date, sale_price, quantity, fee FROM sales', _sale_from_row),
+    }
@@ -0,0 +1,141 @@
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator
+import itertools
+
+
+class StorageEngine(ABC):
+    '''
+    Persistence backend of an InvestmentGroup: its header, its investors and the transactions of all of them.
+    Transactions are appended through 'append'/'append_all' and may be buffered until 'flush' is called.
+    '''
+    _COPY_BATCH_SIZE = 10000
+
+    @abstractmethod
+    def load_group(self, group) -> None:
+        '''
+        Restores the header and all the investors of 'group' (InvestmentGroup) from the storage.
+        '''
+        pass
+
+    @abstractmethod
+    def save_group(self, group, names : set[str] = None, removed : set[str] = ()) -> None:
+        '''
+        Stores the header and the investors of 'group' (InvestmentGroup): all of them, or only the ones in 'names' if given.
+        The investors in 'removed' are deleted from the storage.
+        '''
+        pass
+
+    @abstractmethod
+    def load_investor(self, name : str):
+        '''
+        Returns the Investor with the name 'name' without loading the rest of the group.
+        '''
+        pass
+
+    @abstractmethod
+    def save_investor(self, investor) -> None:
+        pass
+
+    @abstractmethod
+    def append(self, transaction, owner : str = None) -> None:
+        '''
+        Records a transaction of 'owner'. It can stay buffered until the storage is flushed.
+        '''
+        pass
+
+    def append_all(self, transactions : list) -> None:
+        '''
+        Records several (owner, transaction) pairs.
+        '''
+        for owner, transaction in transactions:
+            self.append(transaction, owner)
+
+    @abstractmethod
+    def transactions(self, owner : str = None, start : datetime = None, end : datetime = None, ticker : str = None,
+                     kinds : tuple[type] = None, counterparty : str = None) -> Iterator:
+        '''
+        Yields the (owner, transaction) pairs recorded between 'start' (included) and 'end' (excluded), lazily.
+        If 'owner' is given, only the transactions of that investor (or transfers from/to them) are returned.
+        If 'ticker' is given, only the investments and sales of that ticker are returned.
+        If 'kinds' is given, only the transactions of those types (Investment, Savings, Transfer, Sale) are returned.
+        If 'counterparty' is given, only the transfers from or to that name are returned.
+        '''
+        pass
+
+    @abstractmethod
+    def position(self):
+        '''
+        Returns a marker of the end of the log of transactions (written pending transactions included), to replay what is recorded after it.
+        The marker can be stored in JSON.
+        '''
+        pass
+
+    @abstractmethod
+    def replay(self, since = None, end : datetime = None) -> Iterator:
+        '''
+        Yields the (owner, transaction) pairs recorded after the marker 'since' (all of them if None) and dated before 'end', in the
+        order they were recorded. Applying them to the state of a snapshot taken at 'since' gives the current state.
+        '''
+        pass
+
+    def copy_log(self, destination : 'StorageEngine') -> int:
+        '''
+        Appends all the transactions of the log to 'destination', in the order they were recorded and in batches of
+        '_COPY_BATCH_SIZE', each one written before the next is read. Returns the number of transactions copied.
+        Raises a ValueError if 'destination' already has transactions, since both logs would be mixed.
+        '''
+        if destination.position():
+            raise ValueError("The destination already has transactions.")
+        copied = 0
+        transactions = self.replay()
+        batch = list(itertools.islice(transactions, StorageEngine._COPY_BATCH_SIZE))
+        while batch:
+            destination.append_all(batch)
+            destination.flush()
+            copied += len(batch)
+            batch = list(itertools.islice(transactions, StorageEngine._COPY_BATCH_SIZE))
+        return(copied)
+
+    @abstractmethod
+    def save_snapshot(self, snapshot : dict) -> None:
+        '''
+        Stores a snapshot of a group (see InvestmentGroup.snapshot).
+        '''
+        pass
+
+    @abstractmethod
+    def snapshot(self, end : datetime = None) -> dict:
+        '''
+        Returns the latest snapshot (taken before 'end' if given), or None if there is none.
+        '''
+        pass
+
+    @abstractmethod
+    def flush(self) -> None:
+        pass
+
+    @abstractmethod
+    def discard(self) -> None:
+        '''
+        Drops the appended transactions that haven't been written yet.
+        '''
+        pass
+
+    @contextmanager
+    def deferred(self):
+        '''
+        Keeps all the transactions appended inside the block pending until the storage is flushed, so nothing is written before then
+        and they can still be discarded. Storages that write on their own once enough transactions are pending override it.
+        '''
+        yield self
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self):
+        return(self)
+
+    def __exit__(self, *args) -> None:
+        self.close()
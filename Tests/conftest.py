@@ -0,0 +1,34 @@
+from Source.Storage import JSONStorage, SQLiteStorage
+import os
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def working_directory(tmp_path, monkeypatch):
+    '''
+    Groups without a storage record their transactions under the working directory, so every test runs in its own.
+    '''
+    monkeypatch.chdir(tmp_path)
+
+
+@pytest.fixture(params=['json', 'sqlite'])
+def storage_factory(request, tmp_path):
+    '''
+    Returns a function that opens the storage of the test (a new one every time it is called with a different name).
+    '''
+    storages = []
+
+    def open_storage(name : str = 'group'):
+        if request.param == 'json':
+            storage = JSONStorage(os.path.join(tmp_path, name))
+        else:
+            storage = SQLiteStorage(os.path.join(tmp_path, name + '.db'))
+        storages.append(storage)
+        return(storage)
+
+    yield open_storage
+    for storage in storages:
+        try:
+            storage.close()
+        except Exception:
+            pass
@@ -0,0 +1,60 @@
+'''
+Groups shared by the tests, with the operations every storage has to persist.
+'''
+from Source.Investors import InvestmentGroup
+from Source.Investors.investor import Investor
+from Source.Investors.lot_ledger import CostBasisPolicy
+from Source.Prices import FakePriceProvider, PriceProvider
+
+
+PRICES = {'AAA': 10.0, 'BBB': 25.0}
+
+
+def new_investor(name : str, periodic_contribution : float, investments : dict[str, float] = None,
+                 policy : CostBasisPolicy = CostBasisPolicy.FIFO) -> Investor:
+    investor = Investor(name, policy)
+    investor._periodic_contribution = periodic_contribution
+    investor._investments = dict(investments or {})
+    return(investor)
+
+
+def new_group(storage = None, provider : PriceProvider = None) -> InvestmentGroup:
+    '''
+    Group of three investors that hold 'AAA' and 'BBB' and invest in 'AAA', one of them with the average cost basis.
+    '''
+    group = InvestmentGroup(provider or FakePriceProvider(dict(PRICES)), storage=storage)
+    group.investment_ticker = 'AAA'
+    group.add_investors([new_investor('ana', 100, {'AAA': 5}, CostBasisPolicy.AVERAGE), new_investor('bob', 200, {'AAA': 2, 'BBB': 1}), new_investor('eva', 300)])
+    return(group)
+
+
+def operate(group : InvestmentGroup) -> None:
+    '''
+    Two monthly investments at different prices, two debt payments, a withdrawal and two sales.
+    '''
+    group.mass_invest()
+    group.quotes.update({'AAA': 12.0})
+    group.mass_invest()
+    group.pay_debt('ana', 50)
+    group.pay_debt('eva', 30)
+    group.withdraw('bob', 10)
+    group.sell('ana', 'AAA', 4)
+    group.sell('eva', 'AAA', 7.5)
+
+
+def state(group : InvestmentGroup) -> dict:
+    '''
+    State of the group that doesn't depend on when the transactions were made.
+    '''
+    investors = {}
+    for investor in group.investors:
+        investors[investor.name] = (round(investor.savings, 9), round(investor.debt, 9), round(investor.total_contribution, 9),
+                                    {ticker : round(quantity, 9) for ticker, quantity in investor.investments.items()},
+                                    round(investor.realized_gain(), 9), investor.cost_basis_policy)
+    return({'balance': round(group.balance, 9), 'investors': investors})
+
+
+def loaded(location) -> InvestmentGroup:
+    group = InvestmentGroup(FakePriceProvider(dict(PRICES)))
+    group.load(location)
+    return(group)
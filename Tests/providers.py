@@ -0,0 +1,17 @@
+'''
+Price providers shared by the tests.
+'''
+from Source.Prices import FakePriceProvider
+
+
+class CountingProvider(FakePriceProvider):
+    '''
+    Fake provider that records every batch it is asked for.
+    '''
+    def __init__(self, prices : dict[str, float] = None, latency : float = 0):
+        super().__init__(prices, latency)
+        self.batches = []
+
+    def get_prices(self, tickers : set[str]) -> dict[str, float]:
+        self.batches.append(set(tickers))
+        return(super().get_prices(tickers))
@@ -0,0 +1,85 @@
+from .groups import new_group
+from Source.Backtesting import Backtester, PriceHistory
+from datetime import date, timedelta
+import csv
+import numpy as np
+import os
+import pytest
+
+
+RELATIONS = [0.1, 0.3, 0.5]
+RATES = [1, 0.8, 0.5]
+
+
+def price_file(directory) -> str:
+    '''
+    Writes 90 days of closes for 'AAA' and 'BBB', so the backtest has three months.
+    '''
+    filename = os.path.join(directory, 'prices.csv')
+    with open(filename, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['Date', 'AAA', 'BBB'])
+        for i in range(90):
+            writer.writerow([(date(2024, 1, 1) + timedelta(days=i)).isoformat(), 10 + i % 7, 25 - i % 5])
+    return(filename)
+
+
+def funded():
+    '''
+    The shared group with some savings for every investor, since Investor.difference can't value an investor with nothing.
+    '''
+    group = new_group()
+    for investor in group.investors:
+        investor._savings = 30.0
+    return(group)
+
+
+def replayed(prices : PriceHistory, relation : float, rate : float) -> np.ndarray:
+    '''
+    Equity curves (investors x months) of investing the group every month with Investor.add_investment.
+    '''
+    group = funded()
+    equity = []
+    for day, row in prices.monthly():
+        current_prices = dict(zip(prices.tickers, row.tolist()))
+        month = []
+        for investor in group.investors:
+            investor._relation_savings_inversion = relation
+            investor.add_investment(current_prices, 'AAA', inversion_percent=rate)
+            month.append(investor.investments_current_value(current_prices) + investor.savings)
+        equity.append(month)
+    return(np.array(equity).T)
+
+
+def test_backtest_matches_add_investment(tmp_path):
+    prices = PriceHistory(price_file(tmp_path), ['AAA', 'BBB'])
+    result = Backtester.from_holdings(prices, 'AAA', funded().holdings()).run(RELATIONS, RATES)
+
+    assert result.dates == [date(2024, 1, 1), date(2024, 2, 1), date(2024, 3, 1)]
+    for p, (relation, rate) in enumerate(zip(RELATIONS, RATES)):
+        np.testing.assert_allclose(result.equity[p], replayed(prices, relation, rate))
+
+
+def test_process_pool_matches_serial_run(tmp_path):
+    prices = PriceHistory(price_file(tmp_path), ['AAA', 'BBB'])
+    backtester = Backtester.from_holdings(prices, 'AAA', funded().holdings())
+    serial = backtester.run(RELATIONS, RATES)
+    pooled = backtester.run(RELATIONS, RATES, workers=2)
+
+    assert pooled.dates == serial.dates
+    np.testing.assert_allclose(pooled.equity, serial.equity)
+
+
+def test_parquet_history_matches_csv(tmp_path):
+    pa = pytest.importorskip('pyarrow')
+    import pyarrow.parquet as pq
+    filename = price_file(tmp_path)
+    with open(filename, newline='') as file:
+        rows = list(csv.DictReader(file))
+    parquet = os.path.join(tmp_path, 'prices.parquet')
+    pq.write_table(pa.table({column : [row[column] if column == 'Date' else float(row[column]) for row in rows] for column in ('Date', 'AAA', 'BBB')}), parquet)
+
+    from_csv = list(PriceHistory(filename, ['BBB', 'AAA']).monthly())
+    from_parquet = list(PriceHistory(parquet, ['BBB', 'AAA']).monthly())
+    assert [day for day, _ in from_parquet] == [day for day, _ in from_csv]
+    np.testing.assert_allclose([row for _, row in from_parquet], [row for _, row in from_csv])
@@ -0,0 +1,41 @@
+from .groups import PRICES, new_group, new_investor, operate
+from .providers import CountingProvider
+from Source.Investors import InvestmentGroup
+import pytest
+
+
+def test_aggregates_match_a_recompute():
+    group = new_group()
+    group._check_invariants = True
+    operate(group)
+    group.add_investor(new_investor('leo', 50, {'BBB': 3}))
+    group.remove_investor('ana')
+
+    summary = group.summary()
+    assert summary.total_savings == pytest.approx(sum(investor.savings for investor in group.investors))
+    assert summary.total_debt == pytest.approx(sum(investor.debt for investor in group.investors))
+    held = {ticker : sum(investor.investments.get(ticker, 0) for investor in group.investors) for ticker in PRICES}
+    prices = group.quotes.get(set(PRICES))
+    assert dict(summary.quantities) == pytest.approx(held)
+    assert group.total_investments_value() == pytest.approx(sum(held[ticker] * prices[ticker] for ticker in PRICES))
+
+
+def test_aggregates_out_of_sync_are_reported():
+    group = new_group()
+    group.investors['ana']._savings += 1
+
+    with pytest.raises(AssertionError):
+        group.check_aggregates()
+    group.refresh_aggregates()
+    group.check_aggregates()
+
+
+def test_tickers_not_held_are_not_quoted():
+    provider = CountingProvider(dict(PRICES))
+    group = InvestmentGroup(provider)
+    group.add_investor(new_investor('ana', 100, {'AAA': 5, 'BBB': 0}))
+    group.add_investor(new_investor('bob', 100, {'CCC': 2}))
+    group.remove_investor('bob')
+
+    assert group.total_investments_value() == pytest.approx(5 * PRICES['AAA'])
+    assert provider.batches == [{'AAA'}]
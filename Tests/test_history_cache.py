@@ -0,0 +1,66 @@
+from Source.Prices import FakeHistoryProvider, HistoryCache
+from datetime import date
+import threading
+
+
+JANUARY, FEBRUARY, MARCH = date(2024, 1, 1), date(2024, 2, 1), date(2024, 3, 1)
+
+
+def closes(cache : HistoryCache, ticker : str, start : date, end : date) -> list[float]:
+    return(cache.history({ticker}, start, end)[ticker]['close'].tolist())
+
+
+def test_only_the_gaps_are_fetched(tmp_path):
+    provider = FakeHistoryProvider()
+    cache = HistoryCache(str(tmp_path), provider)
+    cache.ensure({'AAA'}, FEBRUARY, MARCH)
+
+    assert cache.missing('AAA', JANUARY, MARCH) == [(JANUARY, FEBRUARY)]
+    assert cache.ensure({'AAA'}, JANUARY, MARCH) == 1
+    assert provider.calls[-1] == (frozenset({'AAA'}), JANUARY, FEBRUARY)
+    assert cache.ensure({'AAA'}, JANUARY, MARCH) == 0
+    assert cache.covered('AAA') == [(JANUARY, MARCH)]
+
+
+def test_backfilled_days_are_merged_in_order(tmp_path):
+    cache = HistoryCache(str(tmp_path), FakeHistoryProvider())
+    cache.ensure({'AAA'}, FEBRUARY, MARCH)
+    cache.ensure({'AAA'}, JANUARY, FEBRUARY)
+    days = cache.store.series('AAA')['day']
+
+    assert (days[1:] > days[:-1]).all()
+    fresh = HistoryCache(str(tmp_path / 'fresh'), FakeHistoryProvider())
+    assert closes(cache, 'AAA', JANUARY, MARCH) == closes(fresh, 'AAA', JANUARY, MARCH)
+
+
+def test_gaps_of_several_tickers_are_coalesced(tmp_path):
+    provider = FakeHistoryProvider()
+    cache = HistoryCache(str(tmp_path), provider)
+    cache.ensure({'AAA'}, JANUARY, FEBRUARY)
+    cache.ensure({'BBB'}, FEBRUARY, MARCH)
+
+    assert cache.ensure({'AAA', 'BBB', 'CCC'}, JANUARY, MARCH) == 1
+    assert provider.calls[-1] == (frozenset({'AAA', 'BBB', 'CCC'}), JANUARY, MARCH)
+
+
+def test_coverage_is_kept_between_executions(tmp_path):
+    HistoryCache(str(tmp_path), FakeHistoryProvider()).ensure({'AAA'}, JANUARY, MARCH)
+    provider = FakeHistoryProvider()
+    cache = HistoryCache(str(tmp_path), provider)
+
+    assert cache.ensure({'AAA'}, JANUARY, MARCH) == 0
+    assert provider.requests == 0
+    assert cache.store.price_at('AAA', date(2024, 2, 10)) == FakeHistoryProvider.bar('AAA', date(2024, 2, 9)).close
+
+
+def test_concurrent_requests_fetch_a_range_once(tmp_path):
+    provider = FakeHistoryProvider(latency=0.05)
+    cache = HistoryCache(str(tmp_path), provider)
+    threads = [threading.Thread(target=cache.ensure, args=({'AAA'}, JANUARY, MARCH)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert provider.requests == 1
+    assert cache.covered('AAA') == [(JANUARY, MARCH)]
@@ -0,0 +1,54 @@
+from .groups import PRICES, new_group, operate
+from Source.Investors.holdings_matrix import HoldingsMatrix
+import pytest
+
+
+def savers(group) -> None:
+    '''
+    Gives the investors of the group different savings, debts and contributions.
+    '''
+    for i, investor in enumerate(group.investors):
+        investor._savings = 40.0 * i
+        investor._total_contribution = 500.0 + 100 * i
+        investor._relation_savings_inversion = 0.1 * (i + 1)
+
+
+def test_matrix_matches_every_investor():
+    group = new_group()
+    savers(group)
+    holdings = HoldingsMatrix(group.investors)
+    prices = holdings.price_vector(PRICES)
+
+    values = holdings.investments_value(prices)
+    profits = holdings.profit(prices)
+    differences = holdings.difference(prices)
+    distributions = holdings.distributions(prices, 0.75)
+    for row, investor in enumerate(group.investors):
+        assert values[row] == pytest.approx(investor.investments_current_value(PRICES))
+        assert profits[row] == pytest.approx(investor.profit(PRICES))
+        assert differences[row] == pytest.approx(investor.difference(PRICES))
+        expected = investor.value_distribution(PRICES, 0.75)
+        assert distributions[investor.name].investment == pytest.approx(expected.investment)
+        assert distributions[investor.name].saving == pytest.approx(expected.saving)
+
+
+def test_group_totals_match_the_investors():
+    group = new_group()
+    savers(group)
+    group.refresh_aggregates()
+    operate(group)
+    prices = group.quotes.get(set(PRICES))
+
+    assert group.total_investments_value() == pytest.approx(sum(investor.investments_current_value(prices) for investor in group.investors))
+    assert group.total_profit() == pytest.approx(sum(investor.profit(prices) for investor in group.investors))
+    assert group.total_savings() == pytest.approx(sum(investor.savings for investor in group.investors))
+    assert group.value_to_invest() == pytest.approx(sum(investor.value_distribution(prices).investment for investor in group.investors))
+
+
+def test_matrix_is_rebuilt_after_the_group_operates():
+    group = new_group()
+    holdings = group.holdings()
+    group.pay_debt('ana', 50)
+
+    assert group.holdings() is not holdings
+    assert group.holdings() is group.holdings()
@@ -0,0 +1,56 @@
+from .groups import new_group, new_investor, operate, state, loaded
+from Source.Storage.atomic_file import atomic_write
+import os
+import pytest
+
+
+def test_saving_again_writes_only_the_modified_investors(tmp_path, monkeypatch):
+    directory = str(tmp_path)
+    group = new_group()
+    group.save(directory)
+    written = []
+    save_investor = group.storage.save_investor
+    monkeypatch.setattr(group.storage, 'save_investor', lambda investor : written.append(investor.name) or save_investor(investor))
+
+    group.pay_debt('ana', 50)
+    group.save(directory)
+    assert written == ['ana']
+    assert group.dirty_investors == frozenset()
+
+    group.mass_invest()
+    group.save()
+    assert sorted(written) == ['ana', 'ana', 'bob', 'eva']
+    assert state(loaded(directory)) == state(group)
+
+
+def test_incremental_saves_match_a_full_save(storage_factory):
+    group = new_group(storage_factory())
+    group.save()
+    operate(group)
+    group.save()
+    group.remove_investor('bob')
+    group.add_investor(new_investor('leo', 50, {'BBB': 3}))
+    group.save()
+
+    assert state(loaded(storage_factory())) == state(group)
+    full = new_group(storage_factory('full'))
+    operate(full)
+    full.remove_investor('bob')
+    full.add_investor(new_investor('leo', 50, {'BBB': 3}))
+    full.save()
+    assert state(loaded(storage_factory('full'))) == state(group)
+
+
+def test_a_failed_write_keeps_the_old_content(tmp_path, monkeypatch):
+    filename = os.path.join(tmp_path, 'group.json')
+    atomic_write(filename, 'old')
+
+    def crash(source, destination):
+        raise OSError("Disco lleno.")
+    monkeypatch.setattr(os, 'replace', crash)
+    with pytest.raises(OSError):
+        atomic_write(filename, 'new')
+
+    with open(filename) as file:
+        assert file.read() == 'old'
+    assert os.listdir(tmp_path) == ['group.json']
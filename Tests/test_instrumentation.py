@@ -0,0 +1,68 @@
+from .groups import new_group
+from Source.Instrumentation import Instrumentation, INSTRUMENTATION
+import json
+import os
+import pytest
+
+
+@pytest.fixture
+def instrumentation():
+    INSTRUMENTATION.reset()
+    INSTRUMENTATION.enable()
+    yield INSTRUMENTATION
+    INSTRUMENTATION.disable()
+    INSTRUMENTATION.reset()
+
+
+def test_spans_are_aggregated_by_their_path():
+    instrumentation = Instrumentation()
+    instrumentation.enable()
+    inner = instrumentation.timed('inner')(lambda : None)
+    for _ in range(3):
+        with instrumentation.span('outer'):
+            inner()
+    inner()
+    instrumentation.count('reads', 2)
+
+    spans = instrumentation.spans()
+    assert {path : calls for path, (calls, _, _) in spans.items()} == {'outer': 3, 'outer/inner': 3, 'inner': 1}
+    assert instrumentation.counters() == {'reads': 2}
+    assert 'outer' in instrumentation.report()
+
+
+def test_disabled_instrumentation_records_nothing():
+    instrumentation = Instrumentation()
+    with instrumentation.span('outer'):
+        instrumentation.timed()(lambda : None)()
+    instrumentation.count('reads')
+
+    assert instrumentation.span('outer') is instrumentation.span('other')
+    assert instrumentation.spans() == {} and instrumentation.counters() == {}
+
+
+def test_metrics_are_exported(tmp_path):
+    instrumentation = Instrumentation()
+    instrumentation.enable()
+    with instrumentation.span('load "group"'):
+        instrumentation.count('journal.records', 5)
+
+    jsonl = os.path.join(tmp_path, 'metrics.jsonl')
+    instrumentation.export(jsonl)
+    with open(jsonl) as file:
+        lines = [json.loads(line) for line in file]
+    assert [line.get('span', line.get('counter')) for line in lines] == ['load "group"', 'journal.records']
+
+    prom = os.path.join(tmp_path, 'metrics.prom')
+    instrumentation.export(prom)
+    with open(prom) as file:
+        text = file.read()
+    assert 'inversion_management_span_calls_total{span="load \\"group\\""} 1' in text
+    assert 'inversion_management_journal_records_total 5' in text
+
+
+def test_group_operations_are_timed(tmp_path, instrumentation):
+    group = new_group()
+    group.save(str(tmp_path))
+    group.mass_invest()
+
+    assert any(path.endswith('mass_invest') for path in instrumentation.spans())
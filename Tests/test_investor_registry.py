@@ -0,0 +1,45 @@
+from .groups import new_group, new_investor
+from Source.Investors.investor_registry import InvestorRegistry
+import pytest
+
+
+def test_registry_keeps_the_order_and_finds_by_name():
+    registry = InvestorRegistry([new_investor('eva', 1), new_investor('ana', 2)])
+    registry.add(new_investor('bob', 3))
+
+    assert [investor.name for investor in registry] == ['eva', 'ana', 'bob']
+    assert registry['ana'].periodic_contribution == 2
+    assert 'bob' in registry and registry.get('leo') is None
+
+
+def test_bulk_changes_are_applied_completely_or_not_at_all():
+    registry = InvestorRegistry([new_investor('ana', 1)])
+
+    with pytest.raises(ValueError):
+        registry.add_all([new_investor('bob', 1), new_investor('ana', 1)])
+    with pytest.raises(KeyError):
+        registry.remove_all(['ana', 'leo'])
+    assert registry.names() == ['ana']
+
+
+def test_unknown_investors_are_rejected_without_recording(tmp_path):
+    group = new_group()
+    group.save(str(tmp_path))
+    recorded = len(list(group.storage.transactions()))
+
+    with pytest.raises(KeyError):
+        group.pay_debt('leo', 10)
+    with pytest.raises(KeyError):
+        group.withdraw_all([('bob', 5), ('leo', 5)])
+    assert len(list(group.storage.transactions())) == recorded
+    assert group.investors['bob'].savings == 0
+
+
+def test_batches_are_written_together(tmp_path):
+    group = new_group()
+    group.save(str(tmp_path))
+    group.pay_debts([('ana', 10), ('bob', 20)], flush=False)
+    group.pay_debt('eva', 30)
+
+    assert [transaction.amount for _, transaction in group.storage.transactions()] == [10, 20, 30]
+    assert [investor.debt for investor in group.investors] == [-10, -20, -30]
@@ -0,0 +1,125 @@
+from Source.Investors.investment import Investment
+from Source.Investors.savings import Savings
+from Source.Investors.transaction_journal import TransactionJournal, FsyncPolicy
+from datetime import datetime, timedelta
+import os
+import pytest
+
+
+def records(count : int, start : datetime = datetime(2024, 1, 1)) -> list:
+    return([('ana' if number % 2 else 'bob', Savings(number + 1, start + timedelta(days=number))) for number in range(count)])
+
+
+def recorded(pairs) -> list:
+    return([(owner, type(transaction), transaction.date, transaction.amount) for owner, transaction in pairs])
+
+
+def test_journal_round_trip(tmp_path):
+    filename = os.path.join(tmp_path, 'journal')
+    appended = records(10) + [('ana', Investment('AAA', 10, 3, datetime(2024, 2, 1)))]
+    with TransactionJournal(filename) as journal:
+        journal.append_all(appended)
+        assert len(journal) == len(appended)
+
+    journal = TransactionJournal(filename)
+    assert len(journal) == len(appended)
+    assert recorded(journal.replay()) == recorded(appended)
+    assert recorded(journal.replay(4)) == recorded(appended[4:])
+    assert recorded([journal.read(7)]) == recorded([appended[7]])
+    journal.close()
+
+
+def test_index_points_at_every_record(tmp_path):
+    appended = records(5)
+    with TransactionJournal(os.path.join(tmp_path, 'journal')) as journal:
+        journal.append_all(appended)
+        journal.flush()
+        offsets = journal.offsets()
+        with open(journal.log_filename, 'rb') as file:
+            lines = file.readlines()
+
+    assert len(offsets) == 2 * len(appended)
+    assert list(offsets[0::2]) == [int(transaction.date.timestamp()) for owner, transaction in appended]
+    assert list(offsets[1::2]) == [sum(len(line) for line in lines[:number]) for number in range(len(lines))]
+
+
+def test_index_left_behind_is_rebuilt(tmp_path):
+    filename = os.path.join(tmp_path, 'journal')
+    with TransactionJournal(filename) as journal:
+        journal.append_all(records(6))
+        journal.flush()
+        offsets = journal.offsets()
+    with open(filename + '.idx', 'r+b') as file:
+        file.truncate(3 * TransactionJournal._ENTRY_SIZE) #Crash between the write of the log and the one of the index.
+
+    journal = TransactionJournal(filename)
+    assert len(journal) == 6
+    assert journal.offsets() == offsets
+    journal.close()
+
+
+def test_torn_record_is_dropped(tmp_path):
+    filename = os.path.join(tmp_path, 'journal')
+    with TransactionJournal(filename) as journal:
+        journal.append_all(records(3))
+    with open(journal.log_filename, 'ab') as file:
+        file.write(b'{"Tipo": "Savings", "Cantidad": 4') #Crash in the middle of a write.
+
+    with TransactionJournal(filename) as journal:
+        assert recorded(journal.replay()) == recorded(records(3))
+        journal.append_all(records(1, datetime(2024, 3, 1)))
+    assert recorded(TransactionJournal(filename).replay()) == recorded(records(3) + records(1, datetime(2024, 3, 1)))
+
+
+def test_journal_with_only_a_torn_record_is_empty(tmp_path):
+    filename = os.path.join(tmp_path, 'journal')
+    with open(filename + '.jsonl', 'wb') as file:
+        file.write(b'{"Tipo": "Sav')
+
+    with TransactionJournal(filename) as journal:
+        assert len(journal) == 0
+        assert list(journal.replay()) == []
+    assert os.path.getsize(filename + '.jsonl') == 0
+
+
+def test_older_transactions_mark_the_journal_unsorted(tmp_path):
+    filename = os.path.join(tmp_path, 'journal')
+    with TransactionJournal(filename) as journal:
+        journal.append_all(records(5))
+        assert journal.sorted
+        journal.append_all(records(1))
+        assert not journal.sorted
+
+    with TransactionJournal(filename) as journal:
+        assert not journal.sorted
+
+
+def test_discard_drops_the_pending_transactions(tmp_path):
+    filename = os.path.join(tmp_path, 'journal')
+    with TransactionJournal(filename) as journal:
+        journal.append_all(records(3))
+        journal.flush()
+        journal.append_all(records(2))
+        journal.discard()
+        assert len(journal) == 3
+
+    assert len(list(TransactionJournal(filename).replay())) == 3
+
+
+def test_held_transactions_are_written_once(tmp_path):
+    filename = os.path.join(tmp_path, 'journal')
+    size = 2 * TransactionJournal._DEFAULT_BUFFER_SIZE
+    with TransactionJournal(filename) as journal:
+        with journal.held():
+            journal.append_all(records(size))
+            assert not os.path.isfile(journal.log_filename)
+        journal.flush()
+
+    assert len(TransactionJournal(filename)) == size
+
+
+def test_a_journal_that_writes_every_transaction_cannot_hold_them(tmp_path):
+    with TransactionJournal(os.path.join(tmp_path, 'journal'), FsyncPolicy.ALWAYS) as journal:
+        with pytest.raises(ValueError):
+            with journal.held():
+                pass
@@ -0,0 +1,85 @@
+from .groups import new_group, state
+from Source.Investors.lot_ledger import LotLedger, CostBasisPolicy
+from Source.Investors.sale import Sale
+from datetime import datetime
+import pytest
+
+
+def bought(policy : CostBasisPolicy) -> LotLedger:
+    '''
+    10 stocks at 10 with a fee of 2 and 10 more at 20: 302 of cost.
+    '''
+    ledger = LotLedger(policy)
+    ledger.buy(10, 10, datetime(2024, 1, 1), 2)
+    ledger.buy(10, 20, datetime(2024, 2, 1))
+    return(ledger)
+
+
+def test_fifo_sells_the_oldest_lots_first():
+    ledger = bought(CostBasisPolicy.FIFO)
+
+    assert ledger.sell(15, 30, 1) == pytest.approx(15 * 30 - 1 - (102 + 5 * 20))
+    assert ledger.quantity == pytest.approx(5)
+    assert ledger.cost == pytest.approx(100)
+    assert ledger.unrealized(30) == pytest.approx(50)
+    assert len(ledger) == 1
+
+
+def test_average_sells_at_the_average_cost():
+    ledger = bought(CostBasisPolicy.AVERAGE)
+
+    assert ledger.average_cost == pytest.approx(15.1)
+    assert ledger.sell(15, 30, 1) == pytest.approx(15 * 30 - 1 - 15 * 15.1)
+    assert ledger.cost == pytest.approx(5 * 15.1)
+    assert ledger.average_cost == pytest.approx(15.1)
+
+
+def test_realized_adds_up_every_sale():
+    ledger = bought(CostBasisPolicy.FIFO)
+    gains = ledger.sell(5, 12) + ledger.sell(15, 25)
+
+    assert ledger.realized == pytest.approx(gains)
+    assert ledger.quantity == 0
+    assert ledger.cost == 0
+
+
+def test_selling_more_than_held_raises():
+    ledger = bought(CostBasisPolicy.FIFO)
+
+    with pytest.raises(ValueError):
+        ledger.sell(21, 30)
+    assert ledger.quantity == pytest.approx(20)
+
+
+def test_group_sales_go_to_the_savings(storage_factory):
+    group = new_group(storage_factory())
+    group.mass_invest()
+    eva = group.investors['eva']
+    held, savings, cost = eva.investments['AAA'], eva.savings, eva.ledger('AAA').cost
+    sale = group.sell('eva', 'AAA', 2, fee=1)
+
+    assert eva.investments['AAA'] == pytest.approx(held - 2)
+    assert eva.savings == pytest.approx(savings + 2 * 10 - 1)
+    assert eva.realized_gain() == pytest.approx(sale.proceeds - (cost - eva.ledger('AAA').cost))
+    assert [owner for owner, transaction in group.storage.transactions(kinds=(Sale,))] == ['eva']
+
+
+def test_group_refuses_to_sell_more_than_held(storage_factory):
+    group = new_group(storage_factory())
+    group.mass_invest()
+    before = state(group)
+
+    with pytest.raises(ValueError):
+        group.sell('bob', 'BBB', 2)
+    assert state(group) == before
+
+
+@pytest.mark.parametrize('policy', list(CostBasisPolicy))
+def test_ledger_round_trip(policy):
+    ledger = bought(policy)
+    ledger.sell(4, 30)
+    copy = LotLedger.from_dict(ledger.to_dict())
+
+    assert copy.to_dict() == ledger.to_dict()
+    assert copy.quantity == pytest.approx(ledger.quantity)
+    assert copy.sell(6, 30) == pytest.approx(ledger.sell(6, 30))
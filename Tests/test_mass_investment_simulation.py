@@ -0,0 +1,55 @@
+from .groups import new_group
+import numpy as np
+import pytest
+
+
+SCENARIOS = [{'AAA': 10.0, 'BBB': 25.0}, {'AAA': 8.0, 'BBB': 30.0}, {'AAA': 14.5, 'BBB': 20.0}]
+
+
+def invested(group, prices : dict[str, float], rate : float) -> dict[str, tuple]:
+    '''
+    Invests every investor of 'group' in 'AAA' with Investor.add_investment, returning what each one invested, saved and bought.
+    '''
+    outcome = {}
+    for investor in group.investors:
+        investor._savings = 30.0
+        registry = investor.add_investment(prices, 'AAA', inversion_percent=rate)
+        investment = registry.investment
+        outcome[investor.name] = (investment.amount, registry.amount_saved, investment.stock_quantity, investor.savings, investor.investments['AAA'])
+    return(outcome)
+
+
+def simulated(workers : int = None):
+    group = new_group()
+    for investor in group.investors:
+        investor._savings = 30.0
+    group.holdings(refresh=True)
+    return(group.simulate_mass_invest('AAA', SCENARIOS, [1, 0.5], workers))
+
+
+def test_simulation_matches_add_investment():
+    result = simulated()
+
+    for r, rate in enumerate([1, 0.5]):
+        for s, prices in enumerate(SCENARIOS):
+            expected = invested(new_group(), prices, rate)
+            for i, name in enumerate(result.names):
+                column = result.tickers.index('AAA')
+                actual = (result.invested[r, s, i], result.saved[r, s, i], result.bought[r, s, i], result.savings[r, s, i], result.holdings[r, s, i, column])
+                assert actual == pytest.approx(expected[name])
+
+
+def test_simulation_leaves_the_group_untouched():
+    group = new_group()
+    before = [(investor.savings, dict(investor.investments)) for investor in group.investors]
+    group.simulate_mass_invest('CCC', [dict(SCENARIOS[0], CCC=5.0)])
+
+    assert [(investor.savings, dict(investor.investments)) for investor in group.investors] == before
+
+
+def test_process_pool_matches_serial_run():
+    serial = simulated()
+    pooled = simulated(workers=2)
+
+    for array in ('invested', 'saved', 'bought', 'savings', 'holdings'):
+        np.testing.assert_allclose(getattr(pooled, array), getattr(serial, array))
@@ -0,0 +1,63 @@
+from .groups import PRICES, new_group, loaded
+from .providers import CountingProvider
+from Source.Batch.monthly_run import _PrefetchedPriceProvider, discover, report, run_all
+from Source.Storage import JSONStorage
+import os
+import pytest
+
+
+class FailingProvider(CountingProvider):
+    def get_prices(self, tickers : set[str]) -> dict[str, float]:
+        raise ConnectionError("Sin conexión.")
+
+
+def groups(root) -> list[str]:
+    '''
+    Saves two groups under 'root' and leaves a third directory with a broken header.
+    '''
+    directories = []
+    for name in ('uno', 'dos'):
+        directory = os.path.join(root, name)
+        group = new_group(JSONStorage(directory))
+        group.save()
+        group.storage.close()
+        directories.append(directory)
+    broken = os.path.join(root, 'roto')
+    os.makedirs(broken)
+    with open(JSONStorage(broken).header_filename, 'w') as file:
+        file.write('{')
+    os.makedirs(os.path.join(root, 'vacío'))
+    return(sorted(directories + [broken]))
+
+
+def test_every_group_is_invested_with_a_single_quote(tmp_path):
+    groups(tmp_path)
+    provider = CountingProvider(dict(PRICES))
+    results = run_all(discover(str(tmp_path)), provider, workers=2)
+
+    assert [os.path.basename(result.directory) for result in results] == ['dos', 'roto', 'uno']
+    assert [result.ok for result in results] == [True, False, True]
+    assert provider.batches == [{'AAA', 'BBB'}]
+    for result in (results[0], results[2]):
+        assert result.investors == 3 and result.invested == pytest.approx(600)
+        group = loaded(result.directory)
+        assert group.balance == pytest.approx(-600)
+        assert len(list(group.storage.transactions())) == 6
+    assert "con errores: 1" in report(results)
+
+
+def test_a_price_failure_fails_every_group(tmp_path):
+    groups(tmp_path)
+    results = run_all(discover(str(tmp_path)), FailingProvider(), workers=2)
+
+    assert not any(result.ok for result in results)
+    assert all('ConnectionError' in result.error for result in results if not result.directory.endswith('roto'))
+    assert loaded(os.path.join(tmp_path, 'uno')).balance == 0
+
+
+def test_workers_only_serve_the_fetched_prices():
+    provider = _PrefetchedPriceProvider({'AAA': 10.0})
+
+    assert provider.get_prices({'AAA'}) == {'AAA': 10.0}
+    with pytest.raises(KeyError):
+        provider.get_prices({'AAA', 'CCC'})
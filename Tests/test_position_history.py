@@ -0,0 +1,66 @@
+from .groups import new_group, state
+from Source.Investors.investment import Investment
+from Source.Investors.sale import Sale
+from Source.Investors.savings import Savings
+from Source.Investors.transfer import Transfer
+from Source.Prices import PriceStore
+from datetime import date, datetime
+import math
+
+
+RECORDS = [
+    ('ana', Savings(50, datetime(2024, 1, 5))),
+    ('ana', Investment('AAA', 10, 2, datetime(2024, 1, 10), fee=1)),
+    ('bob', Investment('BBB', 25, 1, datetime(2024, 2, 1))),
+    ('ana', Sale('AAA', 12, 1, datetime(2024, 2, 10), fee=0.5)),
+    ('bob', Transfer(40, 'bob', 'Group', datetime(2024, 2, 15))),
+    ('ana', Transfer(10, 'Group', 'ana', datetime(2024, 3, 1))),
+]
+
+DATES = [date(2023, 12, 31), date(2024, 1, 31), date(2024, 2, 20), date(2024, 3, 31)]
+
+
+def history(storage):
+    '''
+    Group with the records of RECORDS applied and recorded.
+    '''
+    group = new_group(storage)
+    group.replay(RECORDS)
+    group.storage.append_all(RECORDS)
+    group.storage.flush()
+    return(group)
+
+
+def state_on(day : date) -> dict:
+    '''
+    State of the group with only the records dated up to the end of 'day'.
+    '''
+    group = new_group()
+    group.replay([record for record in RECORDS if record[1].date.date() <= day])
+    return(state(group))
+
+
+def as_state(statement : dict[str, dict]) -> dict:
+    return({name : (round(data["Ahorros"], 9), round(data["Deuda"], 9), round(data["Contribución total"], 9),
+                    {ticker : round(quantity, 9) for ticker, quantity in data["Inversiones"].items()}) for name, data in statement.items()})
+
+
+def test_positions_match_replaying_up_to_each_date(storage_factory):
+    series = history(storage_factory()).positions(DATES)
+
+    for index, day in enumerate(DATES):
+        expected = state_on(day)
+        assert as_state(series.statement(index)) == {name : values[:4] for name, values in expected['investors'].items()}
+        assert round(float(series.balance[index]), 9) == expected['balance']
+
+
+def test_statement_values_the_holdings_with_the_price_store(storage_factory, tmp_path):
+    group = history(storage_factory())
+    with PriceStore(str(tmp_path / 'prices')) as store:
+        store.append('AAA', [(date(2024, 1, 2), 11.0), (date(2024, 3, 1), 13.0)])
+        group.price_store = store
+        january, march = group.statement(date(2024, 1, 31)), group.statement(date(2024, 3, 31))
+
+    assert january['ana']["Valor"] == (5 + 2) * 11.0
+    assert march['ana']["Valor"] == (5 + 2 - 1) * 13.0
+    assert math.isnan(march['bob']["Valor"]) #'BBB' has no closes.
@@ -0,0 +1,65 @@
+from .providers import CountingProvider
+from Source.Investors import InvestmentGroup
+from Source.Prices import FakePriceProvider, YahooPriceProvider
+import pytest
+import time
+
+
+def closes(rows : dict[str, list[float]]):
+    '''
+    Frame like the ones yf.download returns, with one 'Close' column per ticker.
+    '''
+    pd = pytest.importorskip('pandas')
+    index = pd.date_range('2024-01-01', periods=len(next(iter(rows.values()))))
+    columns = pd.MultiIndex.from_tuples([('Close', ticker) for ticker in rows])
+    return(pd.DataFrame({('Close', ticker) : values for ticker, values in rows.items()}, index=index, columns=columns))
+
+
+def test_fake_provider_quotes_every_ticker_once():
+    provider = FakePriceProvider({'AAA': 10.0})
+    prices = provider.get_prices({'AAA', 'BBB', 'CCC'})
+
+    assert prices['AAA'] == 10.0
+    assert prices == FakePriceProvider().get_prices({'BBB', 'CCC'}) | {'AAA': 10.0} #Unknown tickers get deterministic prices.
+    assert provider.requests == 3
+
+
+def test_single_quotes_are_fetched_concurrently():
+    provider = FakePriceProvider(latency=0.05, max_workers=8)
+    start = time.perf_counter()
+    provider.get_prices({'T' + str(i) for i in range(8)})
+
+    assert time.perf_counter() - start < 4 * provider.latency
+
+
+def test_group_quotes_all_its_tickers_in_one_batch():
+    provider = CountingProvider({'AAA': 10.0, 'BBB': 20.0})
+    group = InvestmentGroup(provider)
+
+    assert group._get_current_prices({'AAA', 'BBB'}) == {'AAA': 10.0, 'BBB': 20.0}
+    assert provider.batches == [{'AAA', 'BBB'}]
+
+
+def test_yahoo_reads_the_last_close_of_every_ticker(monkeypatch):
+    yf = pytest.importorskip('yfinance')
+    monkeypatch.setattr(yf, 'download', lambda tickers, **options : closes({'AAA': [10.0, 11.0], 'BBB': [20.0, float('nan')]}))
+
+    assert YahooPriceProvider().get_prices({'AAA', 'BBB'}) == {'AAA': 11.0, 'BBB': 20.0}
+
+
+def test_yahoo_rejects_tickers_without_close(monkeypatch):
+    yf = pytest.importorskip('yfinance')
+    monkeypatch.setattr(yf, 'download', lambda tickers, **options : closes({'AAA': [10.0], 'ZZZ': [float('nan')]}))
+
+    with pytest.raises(ValueError, match='ZZZ'):
+        YahooPriceProvider().get_prices({'AAA', 'ZZZ'})
+    with pytest.raises(ValueError, match='ZZZ'):
+        YahooPriceProvider().get_prices({'ZZZ'})
+
+
+def test_yahoo_rejects_an_empty_download(monkeypatch):
+    yf = pytest.importorskip('yfinance')
+    monkeypatch.setattr(yf, 'download', lambda tickers, **options : closes({'AAA': []}))
+
+    with pytest.raises(ValueError, match='AAA'):
+        YahooPriceProvider().get_prices({'AAA'})
@@ -0,0 +1,68 @@
+from .groups import PRICES, new_group
+from Source.Investors import InvestmentGroup
+from Source.Prices import FakePriceProvider, PriceStore
+from datetime import date, timedelta
+import os
+import pytest
+
+
+START = date(2024, 1, 1)
+
+
+def weekdays(count : int, close : float = 10) -> list[tuple[date, float]]:
+    days = [START + timedelta(days=day) for day in range(count * 7 // 5 + 7) if (START + timedelta(days=day)).weekday() < 5]
+    return([(day, close + i) for i, day in enumerate(days[:count])])
+
+
+def test_closes_are_looked_up_by_day(tmp_path):
+    with PriceStore(str(tmp_path)) as store:
+        assert store.append('AAA', weekdays(20)) == 20
+
+        assert store.tickers() == ['AAA'] and 'AAA' in store and 'BBB' not in store
+        assert (store.first_day('AAA'), store.last_day('AAA')) == (date(2024, 1, 1), date(2024, 1, 26))
+        assert store.price_at('AAA', date(2024, 1, 8)) == 15
+        assert store.price_at('AAA', date(2024, 1, 7)) == 14 #Sunday: the close of the Friday before.
+        assert store.closes('AAA', date(2024, 1, 8), date(2024, 1, 10)).tolist() == [15, 16]
+        with pytest.raises(KeyError):
+            store.price_at('AAA', date(2023, 12, 31))
+
+
+def test_only_new_days_are_appended(tmp_path):
+    with PriceStore(str(tmp_path)) as store:
+        store.append('AAA', weekdays(10))
+        view = store.series('AAA')
+        assert store.append('AAA', weekdays(15, close=50)) == 5
+
+        assert store.size('AAA') == 15
+        assert store.closes('AAA').tolist() == list(range(10, 20)) + list(range(60, 65))
+        assert len(view) == 10 and view['close'][-1] == 19 #Views taken before the append stay valid.
+
+
+def test_a_torn_record_is_dropped(tmp_path):
+    with PriceStore(str(tmp_path)) as store:
+        store.append('AAA', weekdays(5))
+    with open(store.filename('AAA'), 'ab') as file:
+        file.write(b'\x01\x02\x03')
+
+    with PriceStore(str(tmp_path)) as store:
+        assert store.size('AAA') == 5
+        store.append('AAA', [(date(2024, 2, 1), 30.0)])
+        assert store.size('AAA') == 6
+    assert os.path.getsize(store.filename('AAA')) == 6 * 16
+
+
+def test_the_group_is_valued_at_a_past_day(tmp_path):
+    store = PriceStore(str(tmp_path))
+    store.append('AAA', [(date(2024, 1, 1), 8.0), (date(2024, 2, 1), 9.0)])
+    store.append('BBB', [(date(2024, 1, 1), 20.0)])
+    group = new_group()
+    group._price_store = store
+
+    assert group.investments_value_at(date(2024, 1, 15)) == {'ana': 40.0, 'bob': 36.0, 'eva': 0.0}
+    assert group.total_investments_value_at(date(2024, 2, 10)) == 5 * 9.0 + 2 * 9.0 + 20.0
+    assert group.quotes.stale(set(PRICES)) == set(PRICES) #No current price was asked for.
+    with pytest.raises(KeyError):
+        group.total_investments_value_at(date(2023, 12, 1))
+    with pytest.raises(ValueError):
+        InvestmentGroup(FakePriceProvider()).total_investments_value_at(date(2024, 1, 1))
+    store.close()
@@ -0,0 +1,137 @@
+from .groups import PRICES, new_group
+from .providers import CountingProvider
+from Source.Controllers.controller import Controller
+from Source.Investors import InvestmentGroup
+from Source.Prices import QuoteCache
+import os
+import pytest
+import threading
+import time
+
+
+def test_fresh_quotes_are_served_from_the_cache():
+    provider = CountingProvider({'AAA': 10.0})
+    cache = QuoteCache(provider, max_age=60)
+
+    assert cache.get({'AAA'}) == {'AAA': 10.0}
+    provider.set_price('AAA', 11.0)
+    assert cache.get({'AAA'}) == {'AAA': 10.0}
+    assert provider.batches == [{'AAA'}]
+
+
+def test_only_the_stale_tickers_are_fetched_together():
+    provider = CountingProvider({'AAA': 10.0, 'BBB': 20.0, 'CCC': 30.0})
+    cache = QuoteCache(provider, max_age=60)
+    cache.update({'AAA': 9.0})
+    cache.update({'BBB': 19.0}, time.time() - 120)
+
+    assert cache.stale({'AAA', 'BBB', 'CCC'}) == {'BBB', 'CCC'}
+    assert cache.get({'AAA', 'BBB', 'CCC'}) == {'AAA': 9.0, 'BBB': 20.0, 'CCC': 30.0}
+    assert provider.batches == [{'BBB', 'CCC'}]
+
+
+def test_invalidated_quotes_are_fetched_again():
+    provider = CountingProvider({'AAA': 10.0, 'BBB': 20.0})
+    cache = QuoteCache(provider, max_age=60)
+    cache.get({'AAA', 'BBB'})
+    provider.set_price('AAA', 12.0)
+    cache.invalidate({'AAA'})
+
+    assert cache.get({'AAA', 'BBB'}) == {'AAA': 12.0, 'BBB': 20.0}
+    cache.invalidate()
+    assert cache.stale({'AAA', 'BBB'}) == {'AAA', 'BBB'}
+
+
+def test_quotes_are_persisted_between_executions(tmp_path):
+    filename = os.path.join(tmp_path, 'quotes.json')
+    cache = QuoteCache(CountingProvider(), max_age=60, filename=filename)
+    cache.update({'AAA': 10.0})
+    cache.update({'BBB': 20.0}, time.time() - 120)
+
+    provider = CountingProvider({'BBB': 21.0})
+    warm = QuoteCache(provider, max_age=60, filename=filename)
+    assert warm.get({'AAA', 'BBB'}) == {'AAA': 10.0, 'BBB': 21.0} #Stale quotes are kept on disk but never served.
+    assert provider.batches == [{'BBB'}]
+
+
+def test_group_reuses_the_quotes_until_they_are_updated():
+    provider = CountingProvider({'AAA': 10.0})
+    group = InvestmentGroup(provider, max_price_age=60)
+    group._get_current_prices({'AAA'})
+    group._get_current_prices({'AAA'})
+    assert len(provider.batches) == 1
+
+    group.quotes.invalidate({'AAA'})
+    group._get_current_prices({'AAA'})
+    assert len(provider.batches) == 2
+
+
+class FailingProvider(CountingProvider):
+    '''
+    Counting provider whose first 'failures' batches fail after the latency.
+    '''
+    def __init__(self, prices : dict[str, float], latency : float, failures : int = 1):
+        super().__init__(prices, latency)
+        self.failures = failures
+
+    def get_prices(self, tickers : set[str]) -> dict[str, float]:
+        prices = super().get_prices(tickers)
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("Sin conexión.")
+        return(prices)
+
+
+def test_requests_wait_for_the_prefetch():
+    provider = CountingProvider({'AAA': 10.0, 'BBB': 20.0}, latency=0.05)
+    cache = QuoteCache(provider, max_age=60)
+    future = cache.prefetch({'AAA', 'BBB'})
+
+    assert cache.get({'AAA', 'BBB'}) == {'AAA': 10.0, 'BBB': 20.0}
+    assert future.result() == {'AAA': 10.0, 'BBB': 20.0}
+    assert provider.batches == [{'AAA', 'BBB'}]
+
+
+def test_a_failed_prefetch_is_fetched_again_by_the_request():
+    provider = FailingProvider({'AAA': 10.0}, latency=0.05)
+    cache = QuoteCache(provider, max_age=60)
+    future = cache.prefetch({'AAA'})
+
+    assert cache.get({'AAA'}) == {'AAA': 10.0}
+    assert isinstance(future.exception(), ConnectionError)
+    assert len(provider.batches) == 2
+
+
+def test_requests_raise_the_error_of_a_fetch_they_waited_for():
+    cache = QuoteCache(CountingProvider({'AAA': 10.0, 'BBB': 20.0}), max_age=60)
+    _, future = cache._start({'BBB'})
+    threading.Timer(0.05, future.set_exception, [ConnectionError("Sin conexión.")]).start()
+
+    with pytest.raises(ConnectionError):
+        cache.get({'AAA', 'BBB'})
+    assert cache.get({'AAA'}) == {'AAA': 10.0}
+
+
+def test_refresh_quotes_the_copy_of_the_tickers_and_logs_its_errors(caplog):
+    provider = FailingProvider(dict(PRICES), latency=0)
+    group = new_group(provider=provider)
+    group.remove_investor('bob')
+    group.start_price_refresh(interval=0.02)
+    try:
+        for _ in range(100):
+            if provider.batches[1:]:
+                break
+            time.sleep(0.01)
+    finally:
+        group.stop_price_refresh()
+
+    assert provider.batches[:2] == [{'AAA'}, {'AAA'}]
+    assert "segundo plano" in caplog.text
+
+
+def test_the_controller_refreshes_only_while_it_runs():
+    group = new_group()
+    controller = Controller(None, group)
+
+    assert not group.quotes.refreshing
+    controller.close()
@@ -0,0 +1,62 @@
+from .groups import new_group, state, loaded
+from Source.Controllers import Controller, ScriptRunner
+from Source.Requests import Request
+import pytest
+
+
+def saved_group(storage):
+    group = new_group(storage)
+    group.save()
+    return(group)
+
+
+def test_script_is_saved_once(storage_factory, monkeypatch):
+    group = saved_group(storage_factory())
+    runner = ScriptRunner(Controller(None, group, flush=False))
+    flushes = []
+    flush = type(group.storage).flush
+    monkeypatch.setattr(type(group.storage), 'flush', lambda storage : flushes.append(1) or flush(storage))
+
+    results = runner.run(['mass_invest', 'pay_debt ana 50  # Transferencia', '', 'withdraw bob 10', 'mass_invest 1.5 AAA'])
+
+    assert [result.request for result in results] == [Request.MASS_INVESTMENT, Request.PAY_DEBT, Request.WITHDRAW, Request.MASS_INVESTMENT]
+    assert all(result.ok for result in results)
+    assert runner.commit_seconds is not None
+    assert len(flushes) == 1
+    assert state(loaded(storage_factory())) == state(group)
+
+
+def test_failing_request_rolls_the_script_back(storage_factory):
+    group = saved_group(storage_factory())
+    before = state(group)
+    runner = ScriptRunner(Controller(None, group, flush=False))
+
+    results = runner.run(['mass_invest', 'pay_debt nadie 50', 'withdraw bob 10'])
+
+    assert [result.ok for result in results] == [True, False]
+    assert runner.commit_seconds is None
+    assert state(group) == before
+    assert state(loaded(storage_factory())) == before
+
+
+def test_wrong_lines_stop_the_script_before_running(storage_factory):
+    group = saved_group(storage_factory())
+    before = state(group)
+    runner = ScriptRunner(Controller(None, group, flush=False))
+
+    results = runner.run(['mass_invest', 'pay_debt ana', 'vender ana AAA 1', 'withdraw bob diez'])
+
+    assert [result.line for result in results] == [2, 3, 4]
+    assert not any(result.ok for result in results)
+    assert runner.commit_seconds is None
+    assert state(group) == before
+
+
+@pytest.mark.parametrize('command, request_, arguments', [
+    ('mass_invest', Request.MASS_INVESTMENT, []),
+    ('MASS_INVEST 2 AAA', Request.MASS_INVESTMENT, [2.0, 'AAA']),
+    ('pay_debt "ana maría" 10', Request.PAY_DEBT, ['ana maría', 10.0]),
+    ('display', Request.DISPLAY_ALL_DATA, []),
+])
+def test_parse(command, request_, arguments):
+    assert ScriptRunner.parse(command) == (request_, arguments)
@@ -0,0 +1,31 @@
+import os
+import subprocess
+import sys
+
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def loaded_modules(code : str) -> list[str]:
+    '''
+    Runs 'code' in a new interpreter and returns which of the heavy dependencies it loaded.
+    '''
+    script = code + "\nimport sys\nprint(' '.join(m for m in ('yfinance', 'pandas', 'numpy', 'sqlite3') if m in sys.modules))"
+    output = subprocess.run([sys.executable, '-c', script], cwd=_ROOT, capture_output=True, text=True, check=True).stdout
+    return(output.split())
+
+
+def test_importing_the_program_loads_no_heavy_dependency():
+    assert loaded_modules("import Source") == []
+
+
+def test_a_group_without_operations_loads_no_heavy_dependency():
+    assert loaded_modules("from Source import InvestmentGroup\nInvestmentGroup().to_dict()") == []
+
+
+def test_the_sqlite_backend_is_loaded_on_first_use():
+    assert loaded_modules("from Source.Storage import SQLiteStorage") == ['sqlite3']
+
+
+def test_the_yahoo_provider_is_created_without_yfinance():
+    assert loaded_modules("from Source.Prices import YahooPriceProvider\nYahooPriceProvider()") == []
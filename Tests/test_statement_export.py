@@ -0,0 +1,68 @@
+from .groups import new_group, operate
+from Source.Export import ExportFormat, StatementExporter
+from Source.Export import statement_export
+import csv
+import os
+import pytest
+
+
+def exported_group(storage_factory):
+    group = new_group(storage_factory())
+    group.save()
+    operate(group)
+    return(group)
+
+
+def read_csv(filename : str) -> list[list[str]]:
+    with open(filename, newline='', encoding='utf-8') as file:
+        return(list(csv.reader(file)))
+
+
+def test_csv_files_hold_the_state_and_the_history(storage_factory, tmp_path):
+    group = exported_group(storage_factory)
+    exporter = StatementExporter(group, str(tmp_path / 'export'), chunk_size=2, workers=2)
+    files = exporter.export()
+
+    assert len(files) == 1 + 3 * len(group.investors)
+    summary = read_csv(exporter.filename(StatementExporter._SUMMARY))
+    assert [row[0] for row in summary[1:]] == [investor.name for investor in group.investors]
+    for investor in group.investors:
+        history = read_csv(exporter.filename(StatementExporter._HISTORY, investor.name))[1:]
+        assert len(history) == len(list(group.storage.transactions(investor.name)))
+        holdings = read_csv(exporter.filename(StatementExporter._HOLDINGS, investor.name))[1:]
+        assert {row[0] : float(row[1]) for row in holdings} == pytest.approx(investor.investments)
+
+
+def test_parquet_matches_csv(storage_factory, tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    group = exported_group(storage_factory)
+    csv_exporter = StatementExporter(group, str(tmp_path / 'csv'))
+    parquet_exporter = StatementExporter(group, str(tmp_path / 'parquet'), ExportFormat.PARQUET, chunk_size=3)
+    csv_exporter.export()
+    parquet_exporter.export()
+
+    for investor in group.investors:
+        rows = read_csv(csv_exporter.filename(StatementExporter._HISTORY, investor.name))[1:]
+        table = pq.read_table(parquet_exporter.filename(StatementExporter._HISTORY, investor.name))
+        assert table.num_rows == len(rows)
+        assert table.column("Fecha").to_pylist() == [row[0] for row in rows]
+
+
+def test_history_files_are_closed_when_a_write_fails(storage_factory, tmp_path, monkeypatch):
+    group = exported_group(storage_factory)
+    opened = []
+
+    class FailingWriter(statement_export._CSVWriter):
+        def __init__(self, filename, columns):
+            super().__init__(filename, columns)
+            opened.append(self)
+
+        def write(self, rows):
+            if self._file.name.endswith(os.path.join('bob', StatementExporter._HISTORY + '.csv')):
+                raise OSError("Disco lleno.")
+            super().write(rows)
+
+    monkeypatch.setitem(StatementExporter._WRITERS, ExportFormat.CSV, FailingWriter)
+    with pytest.raises(OSError):
+        StatementExporter(group, str(tmp_path / 'export'), chunk_size=1).export()
+    assert opened and all(writer._file.closed for writer in opened)
@@ -0,0 +1,198 @@
+from .groups import new_group, new_investor, operate, state, loaded, PRICES
+from Source.Investors import InvestmentGroup
+from Source.Investors.investment import Investment
+from Source.Investors.investor import Investor
+from Source.Investors.lot_ledger import CostBasisPolicy
+from Source.Investors.sale import Sale
+from Source.Investors.savings import Savings
+from Source.Investors.transfer import Transfer
+from Source.Storage import JSONStorage, SQLiteStorage
+from Source.Storage.migrate import migrate
+from datetime import datetime
+import os
+import pytest
+
+
+RECORDS = [
+    ('ana', Investment('AAA', 10, 2, datetime(2024, 1, 1))),
+    ('ana', Savings(5, datetime(2024, 1, 1))),
+    ('bob', Investment('BBB', 25, 1, datetime(2024, 2, 1))),
+    ('bob', Transfer(40, 'bob', 'Group', datetime(2024, 2, 15))),
+    ('ana', Transfer(10, 'Group', 'ana', datetime(2024, 3, 1))),
+    ('bob', Sale('BBB', 30, 0.5, datetime(2024, 3, 15), 1)),
+]
+
+
+def described(pairs) -> list:
+    return([(owner, type(transaction), transaction.date, transaction.amount) for owner, transaction in pairs])
+
+
+def test_load_matches_the_saved_group(storage_factory):
+    group = new_group(storage_factory())
+    operate(group)
+    group.save()
+
+    assert state(loaded(storage_factory())) == state(group)
+
+
+def test_json_and_sqlite_agree(tmp_path):
+    states = []
+    for storage in (JSONStorage(os.path.join(tmp_path, 'json')), SQLiteStorage(os.path.join(tmp_path, 'group.db'))):
+        group = new_group(storage)
+        operate(group)
+        group.save()
+        states.append((state(loaded(storage)), [(owner, kind, amount) for owner, kind, _, amount in described(storage.transactions())]))
+    assert states[0] == states[1]
+
+
+def test_transactions_are_queried_by_owner_date_and_ticker(storage_factory):
+    storage = storage_factory()
+    storage.append_all(RECORDS)
+    storage.flush()
+
+    assert described(storage.transactions()) == described(RECORDS)
+    assert described(storage.transactions('ana')) == described([RECORDS[0], RECORDS[1], RECORDS[4]])
+    assert described(storage.transactions(start=datetime(2024, 2, 1), end=datetime(2024, 3, 1))) == described(RECORDS[2:4])
+    assert described(storage.transactions(ticker='BBB')) == described([RECORDS[2], RECORDS[5]])
+    assert described(storage.transactions(kinds=(Savings, Transfer))) == described([RECORDS[1], RECORDS[3], RECORDS[4]])
+    assert described(storage.transactions(counterparty='ana')) == described([RECORDS[4]])
+    assert described(storage.transactions(kinds=(Sale,))) == described([RECORDS[5]])
+
+
+def test_a_single_investor_is_loaded(storage_factory):
+    group = new_group(storage_factory())
+    group.save()
+    investor = storage_factory().load_investor('bob')
+
+    assert (investor.name, investor.periodic_contribution, investor.investments) == ('bob', 200, {'AAA': 2, 'BBB': 1})
+
+
+def test_transactions_after_the_snapshot_are_replayed(storage_factory):
+    group = new_group(storage_factory())
+    group.save()
+    operate(group) #Recorded in the log, but the group isn't saved again.
+    group.storage.flush()
+
+    assert state(loaded(storage_factory())) == state(group)
+
+
+def test_state_at_a_past_snapshot(storage_factory):
+    group = new_group(storage_factory())
+    group.save()
+    group.mass_invest()
+    group.save()
+    before = state(group)
+    moment = datetime.now()
+    group.pay_debt('bob', 40)
+
+    assert state(group.state_at(moment)) == before
+
+
+def test_replay_keeps_the_recording_order(storage_factory):
+    storage = storage_factory()
+    late, early = datetime(2024, 1, 2), datetime(2024, 1, 1)
+    records = [
+        ('ana', Investment('AAA', 10, 2, late)),
+        ('ana', Savings(5, early)),
+        ('ana', Sale('AAA', 12, 1, early)),
+        ('ana', Investment('AAA', 11, 1, early)),
+        ('ana', Transfer(3, 'ana', InvestmentGroup._GROUP_ACCOUNT, late)),
+        ('ana', Sale('AAA', 13, 2, late)),
+    ]
+    storage.append_all(records[:3])
+    position = storage.position()
+    storage.append_all(records[3:])
+
+    assert described(storage.replay()) == described(records)
+    assert described(storage.replay(position)) == described(records[3:])
+
+
+def test_cost_basis_policy_is_persisted(storage_factory):
+    group = new_group(storage_factory())
+    group.save()
+    storage = storage_factory()
+
+    assert storage.load_investor('ana').cost_basis_policy == CostBasisPolicy.AVERAGE
+    assert storage.load_investor('bob').cost_basis_policy == CostBasisPolicy.FIFO
+    assert {investor.name : investor.cost_basis_policy for investor in loaded(storage).investors}['ana'] == CostBasisPolicy.AVERAGE
+
+
+def test_sales_use_the_persisted_lots(storage_factory):
+    group = new_group(storage_factory())
+    group.mass_invest()
+    group.quotes.update({'AAA': 12.0})
+    group.mass_invest()
+    group.save()
+
+    reloaded = loaded(storage_factory())
+    for sold in (group, reloaded):
+        sold.quotes.update({'AAA': 15.0})
+        sold.sell('eva', 'AAA', 3)
+    assert reloaded.gains() == group.gains()
+
+
+def test_saving_to_another_storage_copies_the_log(tmp_path):
+    group = new_group(JSONStorage(os.path.join(tmp_path, 'json')))
+    group.save()
+    operate(group)
+    group.storage.flush()
+    history = described(group.storage.replay())
+    other = SQLiteStorage(os.path.join(tmp_path, 'other.db'))
+    group.save(other)
+    group.pay_debt('bob', 40)
+    group.save(other)
+
+    assert described(other.replay())[:len(history)] == history
+    assert len(list(other.replay())) > len(history)
+    assert state(loaded(SQLiteStorage(os.path.join(tmp_path, 'other.db')))) == state(group)
+
+
+def test_saving_to_a_storage_with_transactions_is_refused(tmp_path):
+    group = new_group(JSONStorage(os.path.join(tmp_path, 'json')))
+    group.save()
+    other = SQLiteStorage(os.path.join(tmp_path, 'other.db'))
+    other.append_all(RECORDS)
+
+    with pytest.raises(ValueError):
+        group.save(other)
+
+
+def test_migrate_keeps_the_transactions_after_the_snapshot(tmp_path):
+    directory = os.path.join(tmp_path, 'json')
+    group = new_group(JSONStorage(directory))
+    group.save()
+    operate(group)
+    group.storage.flush() #The documents of the investors are older than the journal.
+    group.storage.close()
+
+    filename = os.path.join(tmp_path, 'group.db')
+    copied = migrate(directory, filename)
+    migrated = SQLiteStorage(filename)
+
+    assert copied == len(list(JSONStorage(directory).replay()))
+    assert migrated.snapshot() is not None
+    assert state(loaded(migrated)) == state(group)
+
+
+def test_migrate_copies_the_group_and_its_transactions(tmp_path):
+    directory = os.path.join(tmp_path, 'json')
+    group = new_group(JSONStorage(directory))
+    group.storage.append_all(RECORDS)
+    operate(group)
+    group.save()
+    group.storage.close()
+
+    filename = os.path.join(tmp_path, 'group.db')
+    copied = migrate(directory, filename)
+    migrated = SQLiteStorage(filename)
+
+    assert copied == len(RECORDS) + 17
+    assert state(loaded(migrated)) == state(group)
+    assert described(migrated.transactions()) == described(JSONStorage(directory).transactions())
+
+
+def test_investor_documents_round_trip():
+    investor = new_investor('ana', 100, policy=CostBasisPolicy.AVERAGE)
+    investor.add_investment(PRICES, 'AAA')
+
+    assert Investor.from_dict(investor.to_dict()).to_dict() == investor.to_dict()
@@ -0,0 +1,39 @@
+from .groups import PRICES, new_group
+from Benchmarks.synthetic_group import build_group
+from Source.Storage import JSONStorage
+import os
+import pytest
+
+
+def described(group) -> list:
+    return([(investor.name, investor.savings, investor.total_contribution, investor.investments) for investor in group.investors])
+
+
+def test_same_seed_builds_the_same_group(tmp_path):
+    group = build_group(20, 5, 2, JSONStorage(os.path.join(tmp_path, 'group')))
+
+    assert described(group) == described(build_group(20, 5, 2))
+    assert described(group) != described(build_group(20, 5, 2, seed=1))
+    assert len(list(group.storage.transactions())) == 20 * 24 * 3
+
+
+def test_mass_invest_splits_every_contribution(tmp_path):
+    group = new_group(JSONStorage(str(tmp_path)))
+    group._investment_rate = 0.5
+    expected = {investor.name : investor.value_distribution(PRICES, 0.5) for investor in group.investors}
+    group.mass_invest()
+
+    for investor in group.investors:
+        assert investor.total_contribution == investor.periodic_contribution
+        assert investor.savings == pytest.approx(expected[investor.name].saving)
+    assert group.balance == -600
+    assert len(list(group.storage.transactions())) == 6
+    group.check_aggregates()
+
+
+def test_mass_invest_needs_a_ticker():
+    group = new_group()
+    group.investment_ticker = None
+
+    with pytest.raises(ValueError):
+        group.mass_invest()
@@ -0,0 +1,73 @@
+from .groups import PRICES as QUOTES, new_group, state, loaded
+from .providers import CountingProvider
+from Source.Investors.target_allocation import TargetAllocator
+import numpy as np
+import pytest
+
+
+TICKERS = ['AAA', 'BBB', 'CCC']
+PRICES = np.array([10.0, 25.0, 7.0])
+VALUES = np.array([[0.0, 0.0, 0.0], [500.0, 0.0, 70.0], [0.0, 1000.0, 0.0]])
+BUDGETS = np.array([300.0, 250.0, 90.0])
+WEIGHTS = np.array([[0.5, 0.3, 0.2], [0.2, 0.5, 0.3], [1.0, 0.0, 0.0]])
+
+
+def test_fractional_allocation_spends_every_budget():
+    allocation = TargetAllocator(TICKERS, whole_shares=False).allocate(VALUES, BUDGETS, WEIGHTS, PRICES)
+
+    assert (allocation.quantities >= 0).all()
+    assert allocation.invested == pytest.approx(BUDGETS)
+    assert allocation.leftover == pytest.approx(np.zeros(3))
+    assert allocation.quantities[2, 1:] == pytest.approx(np.zeros(2)) #Only tickers with weight are bought.
+
+
+def test_allocation_moves_holdings_toward_the_targets():
+    allocation = TargetAllocator(TICKERS, whole_shares=False).allocate(VALUES, BUDGETS, WEIGHTS, PRICES)
+
+    #The second investor holds too much of 'AAA', so the budget goes to the other tickers.
+    assert allocation.quantities[1, 0] == 0
+    assert allocation.quantities[0] * PRICES == pytest.approx(WEIGHTS[0] * BUDGETS[0])
+
+
+def test_whole_shares_do_not_exceed_the_budget():
+    allocation = TargetAllocator(TICKERS).allocate(VALUES, BUDGETS, WEIGHTS, PRICES)
+
+    assert (allocation.quantities >= 0).all()
+    assert (allocation.quantities == np.floor(allocation.quantities)).all()
+    assert (allocation.invested <= BUDGETS + 1e-9).all()
+    assert allocation.invested + allocation.leftover == pytest.approx(BUDGETS)
+
+
+@pytest.mark.parametrize('whole_shares', [True, False])
+def test_orders_below_the_threshold_are_dropped(whole_shares):
+    allocator = TargetAllocator(TICKERS, minimum_order=50, fee=2, max_fee_ratio=0.02, whole_shares=whole_shares)
+    allocation = allocator.allocate(VALUES, BUDGETS, WEIGHTS, PRICES)
+    amounts = allocation.quantities * PRICES
+
+    assert allocator.threshold == pytest.approx(100)
+    assert ((amounts == 0) | (amounts >= allocator.threshold - 1e-9)).all()
+    assert (allocation.invested <= BUDGETS + 1e-9).all()
+
+
+def test_mass_invest_follows_the_target_weights(storage_factory):
+    group = new_group(storage_factory())
+    group.target_weights = {'AAA': 1, 'BBB': 1}
+    group.set_target_weights('eva', {'BBB': 1})
+    group.save()
+    before = dict(group.investors['eva'].investments)
+    group.mass_invest()
+
+    bought = {ticker for ticker, quantity in group.investors['eva'].investments.items() if quantity > before.get(ticker, 0)}
+    assert bought == {'BBB'}
+    assert state(loaded(storage_factory())) == state(group)
+
+
+def test_tickers_only_in_the_target_weights_are_prefetched():
+    provider = CountingProvider({**QUOTES, 'CCC': 7.0})
+    group = new_group(provider=provider)
+    group.set_target_weights('eva', {'CCC': 1})
+    group.prefetch_prices().result()
+
+    assert 'CCC' in group.quoted_tickers()
+    assert 'CCC' in group._quoted_copy()
+    assert provider.batches == [{'AAA', 'BBB', 'CCC'}]
@@ -0,0 +1,77 @@
+from .groups import new_group
+from Source.Investors.investment import Investment
+from Source.Investors.periodic_registry import PeriodicRegistry
+from Source.Investors.savings import Savings
+from Source.Investors.transaction_history import TransactionHistory
+from Source.Investors.transaction_journal import TransactionJournal
+from Source.Investors.transfer import Transfer
+from datetime import datetime, timedelta
+import os
+import pytest
+
+
+START = datetime(2024, 1, 1)
+
+
+def history(days : int) -> list:
+    '''
+    An investment, its savings and a transfer every day, alternating between two investors.
+    '''
+    pairs = []
+    for day in range(days):
+        owner = 'ana' if day % 2 else 'bob'
+        date = START + timedelta(days=day, hours=12)
+        pairs += [(owner, Investment('AAA' if day % 3 else 'BBB', 10 + day, 1, date)), (owner, Savings(day, date)),
+                  (owner, Transfer(5, owner, 'Group', date))]
+    return(pairs)
+
+
+def described(pairs) -> list:
+    return([(owner, type(transaction), transaction.date, transaction.amount) for owner, transaction in pairs])
+
+
+def expected(pairs, owner=None, start=None, end=None, kinds=None, ticker=None, counterparty=None) -> list:
+    def matches(record_owner, transaction) -> bool:
+        names = (transaction.source, transaction.destination) if isinstance(transaction, Transfer) else ()
+        return((start is None or transaction.date >= start) and (end is None or transaction.date < end)
+               and (kinds is None or isinstance(transaction, kinds)) and (ticker is None or getattr(transaction, 'ticker', None) == ticker)
+               and (counterparty is None or counterparty in names) and (owner is None or owner == record_owner or owner in names))
+    return(described([(record_owner, transaction) for record_owner, transaction in pairs if matches(record_owner, transaction)]))
+
+
+FILTERS = [{}, {'start': START + timedelta(days=10), 'end': START + timedelta(days=20)}, {'end': START + timedelta(days=3)},
+           {'owner': 'ana', 'start': START + timedelta(days=5, hours=12)}, {'kinds': (Investment,), 'ticker': 'BBB'},
+           {'counterparty': 'Group', 'start': START + timedelta(days=28)}]
+
+
+@pytest.mark.parametrize('shuffled', [False, True])
+@pytest.mark.parametrize('filters', FILTERS)
+def test_ranges_match_a_full_scan(tmp_path, shuffled, filters):
+    pairs = history(30)
+    if shuffled:
+        pairs = pairs[45:] + pairs[:45]
+    with TransactionJournal(os.path.join(tmp_path, 'journal')) as journal:
+        journal.append_all(pairs)
+        assert journal.sorted != shuffled
+        read = described(TransactionHistory(journal).read(**filters))
+
+    assert read == expected(pairs, **filters)
+
+
+def test_registries_pair_investments_with_their_savings(tmp_path):
+    with TransactionJournal(os.path.join(tmp_path, 'Transactions', 'journal')) as journal:
+        journal.append_all(history(4))
+
+    registries = list(PeriodicRegistry.from_dir(str(tmp_path), owner='ana'))
+    assert [(owner, registry.date, registry.amount_saved) for owner, registry in registries] == \
+           [('ana', START + timedelta(days=day, hours=12), day) for day in (1, 3)]
+
+
+def test_group_history_streams_its_registries(tmp_path):
+    group = new_group()
+    group.save(str(tmp_path))
+    group.storage.append_all(history(6))
+    group.storage.flush()
+
+    assert len(list(group.history())) == 6
+    assert len(list(group.history('bob', START + timedelta(days=2)))) == 2
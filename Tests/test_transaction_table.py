@@ -0,0 +1,42 @@
+from Source.Investors.investment import Investment
+from Source.Investors.savings import Savings
+from Source.Investors.transaction_table import TransactionTable
+from Source.Investors.transfer import Transfer
+from datetime import datetime
+
+
+RECORDS = [
+    ('ana', Investment('AAA', 10, 2, datetime(2024, 1, 1, 9, 30, 0, 123456), fee=1)),
+    ('ana', Savings(5, datetime(2024, 1, 1))),
+    ('bob', Investment('BBB', 25, 1.5, datetime(2024, 2, 1))),
+    ('bob', Transfer(40, 'bob', 'Group', datetime(2024, 2, 15))),
+    ('Group', Transfer(10, 'Group', 'ana', datetime(2024, 3, 1), 0.5)),
+]
+
+
+def documents(records) -> list:
+    return([(owner, type(transaction), transaction.to_dict()) for owner, transaction in records])
+
+
+def test_rows_round_trip():
+    table = TransactionTable.from_records(RECORDS)
+
+    assert len(table) == len(RECORDS)
+    assert documents(table) == documents(RECORDS)
+    assert documents([table[-1]]) == documents(RECORDS[-1:])
+
+
+def test_select_filters_the_rows():
+    table = TransactionTable.from_records(RECORDS)
+
+    assert table.select(owner='ana').tolist() == [0, 1, 4]
+    assert table.select(start=datetime(2024, 1, 2), end=datetime(2024, 3, 1)).tolist() == [2, 3]
+    assert table.select(kind=Investment, ticker='BBB').tolist() == [2]
+    assert table.select(counterparty='Group').tolist() == [3, 4]
+    assert table.select(ticker='CCC').tolist() == []
+    assert table.amounts(table.select(kind=Transfer)).tolist() == [40, 10]
+
+
+def test_transactions_have_no_instance_dict():
+    for _, transaction in RECORDS:
+        assert not hasattr(transaction, '__dict__')
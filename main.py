@@ -0,0 +1,60 @@
+from Source import Controller, CMDView, InvestmentGroup
+from Source.Controllers.script_runner import ScriptRunner, report
+from Source.Instrumentation import INSTRUMENTATION
+import argparse
+import sys
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gestión de las inversiones del grupo.")
+    parser.add_argument('--profile', action='store_true', help="Muestra al salir el tiempo empleado en cada petición.")
+    parser.add_argument('--metrics', metavar='FICHERO', help="Exporta las métricas al salir (formato Prometheus si acaba en .prom, JSON lines si no).")
+    parser.add_argument('--group', metavar='DIRECTORIO', help="Directorio del grupo a cargar.")
+    parser.add_argument('--script', metavar='FICHERO', help="Ejecuta las órdenes del fichero ('-' para la entrada estándar) sin menús y guarda el grupo al acabar.")
+    arguments = parser.parse_args()
+    if arguments.script and not arguments.group:
+        parser.error("--script necesita --group.")
+
+    if arguments.profile or arguments.metrics:
+        INSTRUMENTATION.enable()
+    status = 0
+    try:
+        group = InvestmentGroup()
+        if arguments.group:
+            group.load(arguments.group)
+        if arguments.script:
+            status = run_script(group, arguments.script)
+        else:
+            controller = Controller(CMDView(), group)
+            try:
+                controller.run()
+            finally:
+                controller.close()
+    finally:
+        if arguments.metrics:
+            INSTRUMENTATION.export(arguments.metrics)
+        if arguments.profile:
+            print(INSTRUMENTATION.report())
+    return(status)
+
+
+def run_script(group : InvestmentGroup, filename : str) -> int:
+    '''
+    Runs the requests of the script and prints the time taken by them. Returns 1 if any of them failed.
+    '''
+    controller = Controller(None, group, flush=False)
+    try:
+        runner = ScriptRunner(controller)
+        if filename == '-':
+            results = runner.run(sys.stdin)
+        else:
+            with open(filename, 'r', encoding='utf-8') as file:
+                results = runner.run(file)
+    finally:
+        controller.close()
+    print(report(results, runner.commit_seconds))
+    return(0 if all(result.ok for result in results) else 1)
+
+
+if __name__ == '__main__':
+    sys.exit(main())